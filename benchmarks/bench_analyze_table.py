@@ -0,0 +1,79 @@
+"""对比原 analyze_table（逐行 find_elements / .text）与单次脚本读取的耗时
+
+使用本地测试页 benchmarks/fixtures/grade_portal.html（默认5000行），需要Chrome和selenium。
+原实现只能读取已渲染的行：滚动加载和虚拟列表模式下读到的行数会少于实际人数。
+用法: python -m benchmarks.bench_analyze_table [--rows 5000] [--modes plain scroll virtual] [--repeat 3]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import statistics
+import time
+from selenium.webdriver.common.by import By
+from benchmarks.bench_web_fill import FIXTURE
+from src.web.page_analyzer import WebPageAnalyzer
+from src.web.table_filler import TableFiller
+
+
+def legacy_analyze_table(driver):
+    """原 WebPageAnalyzer.analyze_table：每行、每个单元格各一次WebDriver往返"""
+    headers = driver.find_elements(By.TAG_NAME, "th")
+    student_id_col = -1
+    grade_col = -1
+    for idx, header in enumerate(headers):
+        header_text = header.text.lower()
+        if "学号" in header_text:
+            student_id_col = idx
+        elif "期末" in header_text:
+            grade_col = idx
+    rows = []
+    for row in driver.find_elements(By.TAG_NAME, "tr")[1:]:
+        cells = row.find_elements(By.TAG_NAME, "td")
+        if len(cells) > student_id_col:
+            student_id = cells[student_id_col].text
+            if student_id.isdigit():
+                rows.append({'student_id': student_id, 'row_element': row})
+    return {'student_id_col': student_id_col, 'grade_col': grade_col, 'rows': rows}
+
+
+async def run(args):
+    filler = TableFiller()
+    await filler.init()
+    driver = filler.driver
+    analyzer = WebPageAnalyzer()
+    try:
+        print(f"{'模式':<10}{'实现':<12}{'中位数(ms)':>12}{'读到行数':>10}")
+        for mode in args.modes:
+            for name in ("原实现", "单次脚本"):
+                if name == "原实现" and args.skip_legacy:
+                    continue
+                timings = []
+                count = 0
+                for _ in range(args.repeat):
+                    driver.get(f"{FIXTURE.as_uri()}?rows={args.rows}&mode={mode}")
+                    started = time.perf_counter()
+                    if name == "原实现":
+                        layout = legacy_analyze_table(driver)
+                    else:
+                        with contextlib.redirect_stdout(io.StringIO()):
+                            layout = await analyzer.analyze_table(driver)
+                    timings.append(time.perf_counter() - started)
+                    count = len(layout['rows'])
+                print(f"{mode:<10}{name:<12}{statistics.median(timings) * 1000:>12.1f}{count:>10d}")
+    finally:
+        await filler.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--modes", nargs="+", default=["plain", "scroll", "virtual"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-legacy", action="store_true", help="不测原实现（5000行时需要几十秒）")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
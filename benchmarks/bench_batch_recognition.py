@@ -0,0 +1,41 @@
+"""对比CPU上逐段识别与批量识别的吞吐
+
+用法: python -m benchmarks.bench_batch_recognition [--wav-dir DIR] [--count 16] [--batch 8]
+"""
+import argparse
+from benchmarks.common import measure, report, synthetic_utterances, load_wavs, SAMPLE_RATE
+from src.speech.speech_recognizer import SenseVoiceRecognizer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--wav-dir", help="录音样本目录，不指定时使用合成音频")
+    parser.add_argument("--count", type=int, default=16, help="语音段数量")
+    parser.add_argument("--batch", type=int, default=8, help="批大小")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.wav_dir:
+        utterances = [audio for _, audio in load_wavs(args.wav_dir)][:args.count]
+    else:
+        utterances = synthetic_utterances(args.count)
+    audio_seconds = sum(len(u) for u in utterances) / SAMPLE_RATE
+    print(f"语音段: {len(utterances)} 段, 共 {audio_seconds:.1f} 秒音频")
+
+    recognizer = SenseVoiceRecognizer(device="cpu")
+
+    def sequential():
+        for audio in utterances:
+            recognizer.transcribe(audio)
+
+    def batched():
+        for i in range(0, len(utterances), args.batch):
+            recognizer.transcribe_batch(utterances[i:i + args.batch])
+
+    seq = report("逐段识别", measure(sequential, repeat=args.repeat), len(utterances))
+    bat = report(f"批量识别 (batch={args.batch})", measure(batched, repeat=args.repeat), len(utterances))
+    print(f"加速比: {seq['median'] / bat['median']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
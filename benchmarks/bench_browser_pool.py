@@ -0,0 +1,87 @@
+"""对比逐个课程启动浏览器并登录与使用浏览器池并行填写多个课程的耗时
+
+在本地测试服务器（benchmarks.fixture_server）上模拟需要登录的教务系统，需要Chrome和selenium。
+  逐个启动  每个课程: 启动Chrome -> 登录 -> 打开页面 -> 分析 -> 填写 -> 退出
+  浏览器池  BrowserPool 预先启动（只登录一次），fill_sections 并行填写；第二轮复用已启动的浏览器
+用法: python -m benchmarks.bench_browser_pool [--sections 10] [--rows 300] [--pool-size 4]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import tempfile
+import time
+from benchmarks.common import make_grades
+from benchmarks.fixture_server import start_fixture_server, fixture_login
+from src.web.browser_pool import BrowserPool
+from src.web.page_analyzer import WebPageAnalyzer
+from src.web.table_filler import TableFiller, create_chrome_driver, fill_sections
+
+
+async def sequential(sections, login, analyzer):
+    """原流程：每个课程启动一个新浏览器并重新登录"""
+    loop = asyncio.get_running_loop()
+    filled = 0
+    for url, grades in sections.items():
+        driver = await loop.run_in_executor(None, create_chrome_driver)
+        try:
+            await loop.run_in_executor(None, login, driver)
+            await loop.run_in_executor(None, driver.get, url)
+            layout = await analyzer.analyze_table(driver)
+            statuses = await TableFiller(driver).fill_grades(layout, grades)
+            filled += sum(1 for status in statuses.values() if status == "ok")
+        finally:
+            driver.quit()
+    return filled
+
+
+def count_filled(results):
+    return sum(sum(1 for status in statuses.values() if status == "ok")
+               for statuses in results.values() if isinstance(statuses, dict))
+
+
+async def run(args):
+    server, base_url = start_fixture_server()
+    stats = server.RequestHandlerClass.stats
+    login = fixture_login(base_url)
+    analyzer = WebPageAnalyzer()
+    grades = make_grades(args.rows, args.rows)
+    sections = {f"{base_url}/course/{i}?rows={args.rows}&seed={i}": grades for i in range(args.sections)}
+    total = len(grades) * args.sections
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            filled = await sequential(sections, login, analyzer)
+        elapsed = time.perf_counter() - started
+        print(f"逐个启动: {elapsed:6.2f} 秒, 填写 {filled}/{total}, 登录 {stats['logins']} 次")
+
+        with tempfile.TemporaryDirectory() as profile_dir:
+            pool = BrowserPool(size=args.pool_size, profile_dir=profile_dir, login=login)
+            stats["logins"] = 0
+            with contextlib.redirect_stdout(io.StringIO()):
+                started = time.perf_counter()
+                await pool.start()
+                warmed = time.perf_counter()
+                results = await fill_sections(pool, analyzer, sections)
+                finished = time.perf_counter()
+                again = await fill_sections(pool, analyzer, sections)
+                reused = time.perf_counter() - finished
+                await pool.close()
+            print(f"浏览器池: {finished - started:6.2f} 秒 (启动 {warmed - started:.2f} 秒), "
+                  f"填写 {count_filled(results)}/{total}, 登录 {stats['logins']} 次, 启动浏览器 {pool.launched} 个")
+            print(f"复用浏览器池: {reused:6.2f} 秒, 填写 {count_filled(again)}/{total}")
+    finally:
+        server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sections", type=int, default=10, help="课程数量")
+    parser.add_argument("--rows", type=int, default=300, help="每个课程的学生人数")
+    parser.add_argument("--pool-size", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
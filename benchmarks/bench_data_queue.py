@@ -0,0 +1,218 @@
+"""对比原 DataQueue、asyncio.Queue 与 AsyncChannel 的吞吐
+
+场景:
+  spsc        单生产者单消费者
+  mpsc        4个生产者写入容量64的队列（原 DataQueue 满时丢弃，其余等待）
+  threadsafe  录音回调线程按块写入，事件循环中消费（asyncio.Queue 用 call_soon_threadsafe）
+  batch       消费者按批取出，每批最多8条
+
+用法: python -m benchmarks.bench_data_queue [--items 200000] [--repeat 5]
+"""
+import argparse
+import asyncio
+import threading
+from collections import deque
+from benchmarks.common import measure, report
+from src.utils.data_queue import AsyncChannel, ChannelClosed
+
+PRODUCERS = 4
+CAPACITY = 64
+
+
+class LegacyDataQueue:
+    """原 src.utils.data_queue.DataQueue：一把锁加一个事件，取空时返回None"""
+    def __init__(self, maxsize=0):
+        self.queue = deque()
+        self.lock = asyncio.Lock()
+        self.event = asyncio.Event()
+        self.maxsize = maxsize
+        self.dropped = 0
+
+    async def put(self, item):
+        async with self.lock:
+            if self.maxsize and len(self.queue) >= self.maxsize:
+                self.queue.popleft()
+                self.dropped += 1
+            self.queue.append(item)
+            self.event.set()
+
+    async def get(self):
+        await self.event.wait()
+        async with self.lock:
+            if not self.queue:
+                self.event.clear()
+                return None
+            return self.queue.popleft()
+
+
+async def legacy_spsc(items):
+    queue = LegacyDataQueue()
+
+    async def produce():
+        for i in range(items):
+            await queue.put(i)
+
+    async def consume():
+        received = 0
+        while received < items:
+            if await queue.get() is not None:
+                received += 1
+
+    await asyncio.gather(consume(), produce())
+
+
+async def legacy_mpsc(items):
+    queue = LegacyDataQueue(maxsize=CAPACITY)
+    per_producer = items // PRODUCERS
+
+    async def produce():
+        for i in range(per_producer):
+            await queue.put(i)
+            if i % 64 == 0:
+                await asyncio.sleep(0)
+
+    async def consume():
+        received = 0
+        while received + queue.dropped < per_producer * PRODUCERS:
+            if await queue.get() is not None:
+                received += 1
+
+    await asyncio.gather(consume(), *(produce() for _ in range(PRODUCERS)))
+
+
+async def asyncio_spsc(items):
+    queue = asyncio.Queue()
+
+    async def produce():
+        for i in range(items):
+            await queue.put(i)
+
+    async def consume():
+        for _ in range(items):
+            await queue.get()
+
+    await asyncio.gather(consume(), produce())
+
+
+async def asyncio_mpsc(items):
+    queue = asyncio.Queue(maxsize=CAPACITY)
+    per_producer = items // PRODUCERS
+
+    async def produce():
+        for i in range(per_producer):
+            await queue.put(i)
+            if i % 64 == 0:
+                await asyncio.sleep(0)
+
+    async def consume():
+        for _ in range(per_producer * PRODUCERS):
+            await queue.get()
+
+    await asyncio.gather(consume(), *(produce() for _ in range(PRODUCERS)))
+
+
+async def asyncio_threadsafe(items):
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    thread = threading.Thread(target=lambda: [loop.call_soon_threadsafe(queue.put_nowait, i) for i in range(items)])
+    thread.start()
+    for _ in range(items):
+        await queue.get()
+    thread.join()
+
+
+async def channel_spsc(items):
+    channel = AsyncChannel()
+
+    async def produce():
+        for i in range(items):
+            await channel.put(i)
+        channel.close()
+
+    async def consume():
+        try:
+            while True:
+                await channel.get()
+        except ChannelClosed:
+            pass
+
+    await asyncio.gather(consume(), produce())
+
+
+async def channel_mpsc(items):
+    channel = AsyncChannel(capacity=CAPACITY)
+    per_producer = items // PRODUCERS
+
+    async def produce():
+        for i in range(per_producer):
+            await channel.put(i)
+            if i % 64 == 0:
+                await asyncio.sleep(0)
+
+    async def consume():
+        for _ in range(per_producer * PRODUCERS):
+            await channel.get()
+
+    await asyncio.gather(consume(), *(produce() for _ in range(PRODUCERS)))
+
+
+async def channel_threadsafe(items):
+    channel = AsyncChannel()
+
+    def produce():
+        for i in range(items):
+            channel.put_threadsafe(i)
+        channel.close_threadsafe()
+
+    thread = threading.Thread(target=produce)
+    thread.start()
+    try:
+        while True:
+            await channel.get()
+    except ChannelClosed:
+        pass
+    thread.join()
+
+
+async def channel_batch(items):
+    channel = AsyncChannel(capacity=CAPACITY)
+
+    async def produce():
+        for i in range(items):
+            await channel.put(i)
+        channel.close()
+
+    async def consume():
+        try:
+            while True:
+                await channel.get_many(8)
+        except ChannelClosed:
+            pass
+
+    await asyncio.gather(consume(), produce())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    cases = [
+        ("spsc 原DataQueue", legacy_spsc),
+        ("spsc asyncio.Queue", asyncio_spsc),
+        ("spsc AsyncChannel", channel_spsc),
+        ("mpsc 原DataQueue (满时丢弃)", legacy_mpsc),
+        ("mpsc asyncio.Queue", asyncio_mpsc),
+        ("mpsc AsyncChannel", channel_mpsc),
+        ("threadsafe asyncio.Queue", asyncio_threadsafe),
+        ("threadsafe AsyncChannel", channel_threadsafe),
+        ("batch AsyncChannel.get_many(8)", channel_batch),
+    ]
+    for name, case in cases:
+        timings = measure(lambda: asyncio.run(case(args.items)), repeat=args.repeat)
+        report(name, timings, args.items)
+
+
+if __name__ == "__main__":
+    main()
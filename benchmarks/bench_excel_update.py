@@ -0,0 +1,66 @@
+"""对比整表读写（pandas）与openpyxl增量更新的耗时
+
+用法: python -m benchmarks.bench_excel_update [--rows 50000] [--grades 300]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+from benchmarks.common import make_roster_workbook, make_grades
+from src.utils.excel_processor import ExcelProcessor
+
+
+def legacy_process_grades(excel_path, grades_dict, output_path):
+    """原实现：pandas读取整表、iterrows匹配、重写所有工作表并逐行设置学号格式"""
+    import pandas as pd
+
+    df = pd.read_excel(excel_path, dtype={'学号': str})
+    for index, row in df.iterrows():
+        last_four = str(row['学号'])[-4:]
+        if last_four in grades_dict:
+            df.at[index, '期末(必填)'] = float(grades_dict[last_four])
+    with pd.ExcelWriter(output_path, engine='openpyxl', mode='w') as writer:
+        df.to_excel(writer, index=False, sheet_name='Sheet1')
+        worksheet = writer.sheets['Sheet1']
+        student_id_col = list(df.columns).index('学号') + 1
+        for r in range(2, len(df) + 2):
+            worksheet.cell(row=r, column=student_id_col).number_format = '@'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--grades", type=int, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        excel_path = os.path.join(tmp, "roster.xlsx")
+        json_path = os.path.join(tmp, "grades.json")
+        print(f"生成 {args.rows} 行合成花名册...")
+        make_roster_workbook(excel_path, args.rows)
+        grades = make_grades(args.rows, args.grades)
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(grades, f)
+
+        started = time.perf_counter()
+        legacy_process_grades(excel_path, grades, os.path.join(tmp, "legacy.xlsx"))
+        legacy = time.perf_counter() - started
+
+        processor = ExcelProcessor(excel_path)
+        processor.output_path = os.path.join(tmp, "updated.xlsx")
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            ok = processor.process_grades(json_path, interactive=False)
+        incremental = time.perf_counter() - started
+        assert ok, "增量更新失败"
+
+    print(f"pandas整表读写:    {legacy:8.2f} 秒")
+    print(f"openpyxl增量更新:  {incremental:8.2f} 秒")
+    print(f"加速比: {legacy / incremental:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
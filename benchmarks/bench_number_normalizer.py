@@ -0,0 +1,34 @@
+"""汉字数字转换的吞吐与单句耗时
+
+用法: python -m benchmarks.bench_number_normalizer [--lines 100000]
+"""
+import argparse
+from benchmarks.common import measure, report, synthetic_transcripts
+from src.speech.number_normalizer import ChineseNumberNormalizer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    normalizer = ChineseNumberNormalizer()
+    lines = synthetic_transcripts(args.lines)
+    chinese_lines = [
+        "二零二三一七零二零二一得分九十五点五",
+        "幺两三四，成绩八十五",
+        "一二三四得分一百，二三四五分数六十半",
+    ] * (args.lines // 3)
+
+    def run(corpus):
+        return lambda: [normalizer.normalize(text) for text in corpus]
+
+    mixed = report("混合文本", measure(run(lines), repeat=args.repeat), len(lines))
+    dense = report("全部为汉字数字", measure(run(chinese_lines), repeat=args.repeat), len(chinese_lines))
+    print(f"单句耗时: 混合文本 {mixed['median'] / len(lines) * 1e6:.2f} us, "
+          f"汉字数字 {dense['median'] / len(chinese_lines) * 1e6:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
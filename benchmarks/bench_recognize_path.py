@@ -0,0 +1,107 @@
+"""对比原识别路径与精简路径在CPU上各阶段的耗时
+
+normalize: get_audio_stream 中的音量检查和归一化
+prepare:   numpy -> 模型输入张量（需要torch）
+model:     指定 --model 时再测完整识别的各阶段耗时（需要funasr和模型）
+
+用法: python -m benchmarks.bench_recognize_path [--count 200] [--seconds 4] [--model]
+"""
+import argparse
+import contextlib
+import io
+import numpy as np
+from benchmarks.common import measure, report, synthetic_utterances
+from src.speech.audio_capture import audio_level, normalize_peak
+
+
+def legacy_normalize(audio_data):
+    """原 GradeFillingSystem.get_audio_stream 的音量检查和归一化"""
+    audio_data = audio_data.reshape(1, -1)
+    volume_rms = np.sqrt(np.mean(audio_data**2))
+    if volume_rms < 0.001:
+        return None
+    max_abs = np.max(np.abs(audio_data))
+    if max_abs > 0:
+        audio_data = audio_data / max_abs
+    return audio_data
+
+
+def lean_normalize(audio_data):
+    volume_rms, peak = audio_level(audio_data)
+    if volume_rms < 0.001:
+        return None
+    return normalize_peak(audio_data, peak)
+
+
+def legacy_prepare(audio_stream, device="cpu"):
+    """原 SenseVoiceRecognizer._prepare_audio（调试输出重定向到内存）"""
+    import torch
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        if len(audio_stream.shape) > 1:
+            audio_stream = audio_stream.squeeze()
+            if len(audio_stream.shape) > 1:
+                audio_stream = audio_stream.mean(axis=0)
+        print(f"音频数据形状(numpy): {audio_stream.shape}")
+        audio_tensor = torch.from_numpy(audio_stream).float()
+        if len(audio_tensor) < 16000:
+            audio_tensor = torch.nn.functional.pad(audio_tensor, (0, 16000 - len(audio_tensor)))
+        if device.startswith("cuda"):
+            audio_tensor = audio_tensor.cuda()
+        print(f"音频张量形状(torch): {audio_tensor.shape}")
+        print(f"音频范围: [{audio_tensor.min():.3f}, {audio_tensor.max():.3f}]")
+        print(f"音频设备: {audio_tensor.device}")
+        print(f"音频维度: {audio_tensor.dim()}")
+    return audio_tensor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=200, help="语音段数量")
+    parser.add_argument("--seconds", type=float, default=4.0, help="每段语音时长")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--model", action="store_true", help="加载SenseVoice测完整识别")
+    args = parser.parse_args()
+
+    utterances = synthetic_utterances(args.count, seconds=args.seconds)
+    # 原地归一化会修改输入，每次运行使用新的副本
+    copies = lambda: [u.copy() for u in utterances]
+
+    def run(func):
+        def body():
+            for audio in batch:
+                func(audio)
+        return body
+
+    batch = copies()
+    report("normalize 原实现", measure(run(legacy_normalize), repeat=args.repeat), len(batch))
+    batch = copies()
+    report("normalize 原地归一化", measure(run(lean_normalize), repeat=args.repeat), len(batch))
+
+    try:
+        import torch  # noqa: F401
+    except ImportError:
+        print("未安装torch，跳过 prepare 阶段")
+        return
+
+    from src.speech.speech_recognizer import InputBuffers
+    buffers = InputBuffers("cpu")
+    short = [u[:8000].copy() for u in utterances]
+    for name, data in (("", utterances), (" (0.5秒短音频)", short)):
+        batch = [legacy_normalize(a) for a in data]
+        report("prepare 原实现" + name, measure(run(legacy_prepare), repeat=args.repeat), len(batch))
+        batch = [a.copy() for a in data]
+        report("prepare 复用缓冲区" + name, measure(run(buffers.tensor), repeat=args.repeat), len(batch))
+
+    if args.model:
+        from src.speech.speech_recognizer import SenseVoiceRecognizer
+        recognizer = SenseVoiceRecognizer(device="cpu")
+        recognizer.warmup()
+        recognizer.stage_timer.reset()
+        for audio in copies():
+            recognizer.transcribe(lean_normalize(audio))
+        recognizer.stage_timer.report("完整识别各阶段耗时")
+
+
+if __name__ == "__main__":
+    main()
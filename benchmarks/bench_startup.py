@@ -0,0 +1,45 @@
+"""分别统计启动阶段耗时：模块导入、模型加载、首次推理（可选预热）
+
+需在新进程中运行才能反映冷启动: python -m benchmarks.bench_startup [--warmup]
+"""
+import argparse
+import time
+from benchmarks.common import synthetic_utterances
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--warmup", action="store_true", help="首次推理前先预热")
+    parser.add_argument("--device", default="cpu")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    from src.speech.backends import create_recognizer
+    recognizer = create_recognizer("sensevoice", device=args.device, lazy=True)
+    construct_time = time.perf_counter() - started
+
+    recognizer.load(warmup=args.warmup)
+    audio = synthetic_utterances(2, seconds=3.0)
+
+    started = time.perf_counter()
+    recognizer.transcribe(audio[0])
+    first_inference = time.perf_counter() - started
+
+    started = time.perf_counter()
+    recognizer.transcribe(audio[1])
+    steady_inference = time.perf_counter() - started
+
+    print("\n启动耗时:")
+    print("-" * 50)
+    print(f"创建识别器(延迟加载): {construct_time * 1000:10.1f} ms")
+    print(f"导入 torch/funasr:     {recognizer.load_timings['import'] * 1000:10.1f} ms")
+    print(f"模型加载:              {recognizer.load_timings['model_load'] * 1000:10.1f} ms")
+    if "warmup" in recognizer.load_timings:
+        print(f"预热推理:              {recognizer.load_timings['warmup'] * 1000:10.1f} ms")
+    print(f"首次推理:              {first_inference * 1000:10.1f} ms")
+    print(f"稳定推理:              {steady_inference * 1000:10.1f} ms")
+    print("-" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""对比整句识别与流式识别从说完停止指令到执行停止的延迟
+
+录音文件需要以停止指令（如“……结束”）结尾，按实际语速送入录音流程。
+用法: python -m benchmarks.bench_stop_latency --wav stop.wav [--repeat 3] [--device cpu]
+"""
+import argparse
+import asyncio
+import builtins
+import statistics
+import numpy as np
+from src.speech.audio_capture import AudioCapture
+from src.speech.pipeline import RecognitionPipeline
+from src.speech.speech_recognizer import SenseVoiceRecognizer
+from src.speech.streaming import StreamingDecoder
+
+
+async def run_once(recognizer, wav, streaming):
+    capture = AudioCapture()
+    streamer = StreamingDecoder(recognizer, capture) if streaming else None
+    feed = asyncio.create_task(capture.feed_file(wav, realtime=True))
+
+    async def audio_source():
+        audio = await capture.get_utterance()
+        if audio is None:
+            return None
+        max_abs = np.max(np.abs(audio))
+        return audio / max_abs if max_abs > 0 else audio
+
+    pipeline = RecognitionPipeline(audio_source, recognizer, capture=capture, streamer=streamer)
+    recognizer.stop_detected_at = None
+    await pipeline.run()
+    feed.cancel()
+    return pipeline.metrics.stop_latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--wav", required=True, help="以停止指令结尾的录音")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--device", default="cpu")
+    args = parser.parse_args()
+
+    recognizer = SenseVoiceRecognizer(device=args.device)
+    recognizer.warmup()
+    builtins.input = lambda *_: "n"  # 跳过停止时的确认提示
+
+    for name, streaming in (("整句识别", False), ("流式识别", True)):
+        latencies = []
+        for _ in range(args.repeat):
+            latency = asyncio.run(run_once(recognizer, args.wav, streaming))
+            if latency is None:
+                print(f"{name}: 未检测到停止指令")
+                continue
+            latencies.append(latency)
+        if latencies:
+            print(f"{name:<10} 停止指令延迟 中位数 {statistics.median(latencies) * 1000:8.1f} ms  "
+                  f"最大 {max(latencies) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""对比原有两个解析器与单遍解析器在合成识别文本上的耗时
+
+用法: python -m benchmarks.bench_transcript_parser [--lines 100000]
+"""
+import argparse
+import re
+from benchmarks.common import measure, report, synthetic_transcripts
+from src.speech.keyword_engine import KeywordEngine, load_keyword_config
+from src.speech.transcript_parser import TranscriptParser
+
+
+def legacy_manual_parse(lines):
+    """原 SenseVoiceRecognizer._manual_parse_results 的解析逻辑（去掉打印）"""
+    result_dict = {}
+    invalid_lines = []
+    cancel_words = ["不对", "删除", "错", "作废", "取消", "重说"]
+    for idx, text in enumerate(lines, 1):
+        if any(word in text for word in cancel_words):
+            invalid_lines.append((idx, text, "用户表示需要作废此条记录"))
+            continue
+        import re as re_inner
+        matches = re_inner.findall(r'(\d{4}).*?(?:得分|分数|成绩)[：:]*(\d+)', text)
+        if not matches:
+            invalid_lines.append((idx, text, "未找到有效的学号和分数"))
+            continue
+        valid_pair_found = False
+        for student_id, score in matches:
+            score_int = int(score)
+            if 0 <= score_int <= 100:
+                result_dict[student_id] = str(score_int)
+                valid_pair_found = True
+            else:
+                invalid_lines.append((idx, text, f"分数 {score_int} 超出有效范围(0-100)"))
+        if not valid_pair_found and (idx, text) not in [x[:2] for x in invalid_lines]:
+            invalid_lines.append((idx, text, "未找到有效的学号和分数对"))
+    return result_dict, invalid_lines
+
+
+def legacy_process_text(lines):
+    """原 SpeechProcessor.process_text 的解析逻辑"""
+    pattern = r'(\d{4})[^\d]*(\d{1,3})'
+    entries = []
+    for text in lines:
+        for match in re.finditer(pattern, text):
+            grade = int(match.group(2))
+            if 0 <= grade <= 100:
+                entries.append((match.group(1), grade))
+    return entries
+
+
+def extended_keywords(count):
+    """在默认关键词上追加count个合成关键词，用于观察词表变大时解析耗时的变化"""
+    keywords = load_keyword_config()
+    filler = "甲乙丙丁戊己庚辛壬癸"
+    for i in range(count):
+        kind = ("cue", "cancel", "stop")[i % 3]
+        keywords[kind].append("第" + filler[i % 10] + filler[i // 10 % 10] + "项")
+    return keywords
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--extra-keywords", type=int, default=100)
+    args = parser.parse_args()
+
+    lines = synthetic_transcripts(args.lines)
+    cue_parser = TranscriptParser(require_cue=True)
+    plain_parser = TranscriptParser(require_cue=False)
+
+    def new_plain():
+        for text in lines:
+            plain_parser.parse_line(text)
+
+    # 原实现的无效行检查是O(n²)，行数很多时只测一小部分再按比例估算
+    legacy_lines = lines[:min(len(lines), 20000)]
+    scale = len(lines) / len(legacy_lines)
+    legacy = measure(lambda: legacy_manual_parse(legacy_lines), repeat=args.repeat)
+    report(f"原手动解析 (实测 {len(legacy_lines)} 行, 按比例换算)", [t * scale for t in legacy], len(lines))
+    report("单遍解析器 (需要提示词)", measure(lambda: cue_parser.parse_lines(lines), repeat=args.repeat), len(lines))
+    report("原 SpeechProcessor.process_text", measure(lambda: legacy_process_text(lines), repeat=args.repeat), len(lines))
+    report("单遍解析器 (不要求提示词)", measure(new_plain, repeat=args.repeat), len(lines))
+
+    big_parser = TranscriptParser(require_cue=True, keywords=KeywordEngine(extended_keywords(args.extra_keywords)))
+    report(f"单遍解析器 (追加 {args.extra_keywords} 个关键词)",
+           measure(lambda: big_parser.parse_lines(lines), repeat=args.repeat), len(lines))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""对比逐格填写（fill_grade）与整页一次性填写（fill_grades）的耗时
+
+使用本地测试页 benchmarks/fixtures/grade_portal.html，需要Chrome和selenium。
+逐格填写每格有0.1秒等待，默认只测前 --per-cell-rows 行并按行数折算整页耗时。
+用法: python -m benchmarks.bench_web_fill [--rows 300] [--per-cell-rows 50]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import time
+from pathlib import Path
+from benchmarks.common import make_grades, PORTAL_FIXTURE
+from src.web.page_analyzer import WebPageAnalyzer
+from src.web.table_filler import TableFiller
+
+FIXTURE = Path(PORTAL_FIXTURE)
+
+_READ_GRADES_JS = """
+return Array.from(document.querySelectorAll('#grade-table tbody tr'))
+    .map(row => [row.cells[1].textContent, row.cells[arguments[0]].querySelector('input').value]);
+"""
+
+
+async def open_fixture(filler, rows):
+    filler.driver.get(f"{FIXTURE.as_uri()}?rows={rows}")
+    analyzer = WebPageAnalyzer()
+    with contextlib.redirect_stdout(io.StringIO()):
+        return await analyzer.analyze_table(filler.driver)
+
+
+def check_page(filler, layout, grades):
+    """读回页面上的成绩，返回与期望一致的数量"""
+    values = dict(filler.driver.execute_script(_READ_GRADES_JS, layout['grade_col']))
+    expected = {sid: grade for sid, grade in ((row['student_id'], grades.get(row['student_id'][-4:]))
+                                              for row in layout['rows']) if grade is not None}
+    return sum(1 for sid, grade in expected.items() if values.get(sid) and float(values[sid]) == grade)
+
+
+async def run(args):
+    filler = TableFiller()
+    await filler.init()
+    try:
+        grades = {suffix: float(score) for suffix, score in make_grades(args.rows, args.rows).items()}
+
+        started = time.perf_counter()
+        layout = await open_fixture(filler, args.rows)
+        print(f"加载测试页并分析表格: {(time.perf_counter() - started) * 1000:.1f} ms, {len(layout['rows'])} 行")
+
+        # 逐格填写：每个学生一次等待 + clear + send_keys
+        sample = layout['rows'][:args.per_cell_rows]
+        column = layout['grade_col'] + 1
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i, row in enumerate(sample, 1):
+                grade = grades.get(row['student_id'][-4:])
+                if grade is not None:
+                    await filler.fill_grade(f"#grade-table tbody tr:nth-child({i}) td:nth-child({column}) input",
+                                            int(grade))
+        per_cell = time.perf_counter() - started
+        estimate = per_cell / max(len(sample), 1) * len(layout['rows'])
+        print(f"逐格填写 {len(sample)} 行: {per_cell * 1000:.1f} ms, 折算整页约 {estimate:.1f} 秒")
+
+        layout = await open_fixture(filler, args.rows)
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            statuses = await filler.fill_grades(layout, grades)
+        bulk = time.perf_counter() - started
+        filled = sum(1 for status in statuses.values() if status == "ok")
+        events = filler.driver.execute_script("return window.gradeEvents")
+        print(f"整页一次性填写: {bulk * 1000:.1f} ms, 成功 {filled}/{len(grades)}, "
+              f"input事件 {events['input']} 次, change事件 {events['change']} 次")
+        print(f"页面读回一致: {check_page(filler, layout, grades)}/{len(grades)}, 加速约 {estimate / bulk:.0f} 倍")
+    finally:
+        await filler.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=300)
+    parser.add_argument("--per-cell-rows", type=int, default=50, help="逐格填写实际测量的行数")
+    args = parser.parse_args()
+    if not os.path.exists(FIXTURE):
+        raise SystemExit(f"找不到测试页: {FIXTURE}")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import glob
+import os
+import statistics
+import time
+import numpy as np
+
+SAMPLE_RATE = 16000
+PORTAL_FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "grade_portal.html")
+
+
+def measure(func, repeat=5, warmup=1, setup=None):
+    """多次运行func，返回每次耗时（秒）的列表；setup在每次运行前执行，不计入耗时"""
+    for _ in range(warmup):
+        if setup is not None:
+            setup()
+        func()
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(name, timings, items=None):
+    """打印耗时统计，items为每次运行处理的条数"""
+    best = min(timings)
+    median = statistics.median(timings)
+    line = f"{name:<40} 最优 {best * 1000:10.2f} ms  中位数 {median * 1000:10.2f} ms"
+    if items:
+        line += f"  吞吐 {items / median:12.1f} 条/秒"
+    print(line)
+    return {"best": best, "median": median}
+
+
+def synthetic_utterances(count, seconds=2.0, seed=0):
+    """生成类语音的合成音频（调制噪声加谐波），用于没有录音样本时的压测"""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * SAMPLE_RATE)
+    t = np.arange(n, dtype=np.float32) / SAMPLE_RATE
+    utterances = []
+    for _ in range(count):
+        f0 = rng.uniform(120, 240)
+        envelope = 0.5 * (1 + np.sin(2 * np.pi * rng.uniform(2, 5) * t))
+        voice = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 6))
+        audio = envelope * voice * 0.1 + rng.normal(0, 0.01, n)
+        utterances.append(audio.astype(np.float32))
+    return utterances
+
+
+def load_wavs(directory):
+    """读取目录下的WAV/FLAC文件，返回 [(文件名, 16kHz单声道float32数组)]"""
+    from src.speech.audio_capture import load_audio_file
+
+    files = sorted(glob.glob(os.path.join(directory, "*.wav")) + glob.glob(os.path.join(directory, "*.flac")))
+    result = []
+    for path in files:
+        result.append((os.path.basename(path), load_audio_file(path, SAMPLE_RATE)))
+    return result
+
+
+def _suffix(i, rows):
+    # 后四位只有10000种：超过10000行时后5000个后四位重复使用，前5000个始终唯一
+    if rows <= 10000 or i < 10000:
+        return i
+    return 5000 + i % 5000
+
+
+def unique_suffix_count(rows):
+    """合成花名册中只对应一名学生的后四位数量（即 0 ~ n-1）"""
+    return rows if rows <= 10000 else 5000
+
+
+def make_roster_workbook(path, rows, extra_columns=20, seed=0):
+    """生成合成花名册：学号为12位字符串，后四位 0 ~ unique_suffix_count(rows)-1 各不相同"""
+    import random
+    from openpyxl import Workbook
+
+    rng = random.Random(seed)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Sheet1")
+    extra = [f"备注{i}" for i in range(extra_columns)]
+    sheet.append(["序号", "学号", "姓名"] + extra + ["期中", "期末(必填)"])
+    for i in range(rows):
+        student_id = f"2023{rng.randint(1000, 9999)}{_suffix(i, rows):04d}"
+        sheet.append([i + 1, student_id, f"学生{i}"] + [rng.randint(0, 100) for _ in extra] + [None, None])
+    workbook.save(path)
+    return path
+
+
+def make_grades(rows, count, seed=1):
+    """为合成花名册生成 {学号后四位: 分数}，只使用唯一的后四位"""
+    import random
+
+    rng = random.Random(seed)
+    unique = unique_suffix_count(rows)
+    suffixes = rng.sample(range(unique), min(count, unique))
+    return {f"{s:04d}": str(rng.randint(40, 100)) for s in suffixes}
+
+
+def synthetic_transcripts(count, seed=2):
+    """生成合成识别文本：正常录入、作废、停止、无效和汉字数字等多种句式"""
+    import random
+
+    rng = random.Random(seed)
+    chinese = "零一二三四五六七八九"
+    lines = []
+    for _ in range(count):
+        sid = f"{rng.randint(0, 9999):04d}"
+        score = rng.randint(0, 100)
+        kind = rng.random()
+        if kind < 0.55:
+            lines.append(f"{sid}得分{score}。")
+        elif kind < 0.70:
+            lines.append(f"学号{sid}，成绩：{score}，下一个{rng.randint(0, 9999):04d}分数{rng.randint(0, 100)}。")
+        elif kind < 0.78:
+            lines.append(f"{sid}得分{score}，不对，重说。")
+        elif kind < 0.86:
+            lines.append(f"{''.join(chinese[int(d)] for d in sid)}得分{score}。")
+        elif kind < 0.94:
+            lines.append("嗯，稍等一下，我看看下一个同学。")
+        elif kind < 0.98:
+            lines.append(f"{sid}得分{rng.randint(101, 200)}。")
+        else:
+            lines.append("好的，今天就到这里，结束。")
+    return lines
@@ -0,0 +1,98 @@
+"""在同一组本地录音上对比不同识别后端的准确率和延迟
+
+录音目录中放WAV/FLAC文件和 references.json（{文件名: 参考文本}）。
+默认使用 benchmarks/fixtures/speech 中合成的录入口令（由 make_speech_fixtures 生成），
+有真人录音时用 --wav-dir 指定。
+准确率按去掉标点后的字错误率(CER)和解析出的 (学号, 分数) 是否与参考文本一致统计。
+用法: python -m benchmarks.compare_backends [--wav-dir DIR] [--backends sensevoice sensevoice-onnx]
+      [--intra-op-threads 4] [--no-quantize]
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from benchmarks.common import load_wavs, SAMPLE_RATE
+from benchmarks.make_speech_fixtures import FIXTURE_DIR
+from src.speech.backends import create_recognizer
+from src.speech.transcript_parser import TranscriptParser
+
+_IGNORED = set(" \t\n，。？！、,.?!:：;；\"'“”")
+
+
+def edit_distance(a, b):
+    """字符级编辑距离"""
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def _clean(text):
+    return "".join(c for c in text if c not in _IGNORED)
+
+
+def evaluate(recognizer, fixtures, references, parser):
+    """逐段识别，返回 (总编辑距离, 参考总字数, 成绩一致的段数, 每段耗时列表, 逐段结果)"""
+    errors = chars = grade_matches = 0
+    latencies = []
+    rows = []
+    for name, audio in fixtures:
+        started = time.perf_counter()
+        text = recognizer.transcribe(audio)
+        latencies.append(time.perf_counter() - started)
+        reference = references.get(name, "")
+        distance = edit_distance(_clean(reference), _clean(text))
+        errors += distance
+        chars += len(_clean(reference))
+        same = parser.parse_line(text).entries == parser.parse_line(reference).entries
+        grade_matches += same
+        rows.append((name, text, distance, same))
+    return errors, chars, grade_matches, latencies, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--wav-dir", default=FIXTURE_DIR, help="录音和 references.json 所在目录，默认使用合成录音")
+    parser.add_argument("--backends", nargs="+", default=["sensevoice", "sensevoice-onnx"])
+    parser.add_argument("--intra-op-threads", type=int, default=4, help="ONNX Runtime 单次推理线程数")
+    parser.add_argument("--no-quantize", action="store_true", help="ONNX后端使用未量化的模型")
+    parser.add_argument("--verbose", action="store_true", help="打印每段的识别结果")
+    args = parser.parse_args()
+
+    with open(os.path.join(args.wav_dir, "references.json"), "r", encoding="utf-8") as f:
+        references = json.load(f)
+    fixtures = [(name, audio) for name, audio in load_wavs(args.wav_dir) if name in references]
+    if not fixtures:
+        print("没有找到带参考文本的录音")
+        return
+    audio_seconds = sum(len(audio) for _, audio in fixtures) / SAMPLE_RATE
+    print(f"录音: {len(fixtures)} 段, 共 {audio_seconds:.1f} 秒")
+    text_parser = TranscriptParser(require_cue=False)
+
+    print(f"\n{'后端':<18}{'CER':>8}{'成绩一致':>10}{'加载(s)':>10}{'中位数(ms)':>12}{'P95(ms)':>10}{'RTF':>8}")
+    for backend in args.backends:
+        kwargs = {"device": "cpu", "lazy": True}
+        if backend.endswith("onnx"):
+            kwargs.update(intra_op_threads=args.intra_op_threads, quantize=not args.no_quantize)
+        recognizer = create_recognizer(backend, **kwargs)
+        recognizer.load(warmup=True)
+        load_time = recognizer.load_timings["import"] + recognizer.load_timings["model_load"]
+
+        errors, chars, grade_matches, latencies, rows = evaluate(recognizer, fixtures, references, text_parser)
+        latencies_ms = sorted(t * 1000 for t in latencies)
+        p95 = latencies_ms[min(len(latencies_ms) - 1, int(len(latencies_ms) * 0.95))]
+        rtf = sum(latencies) / audio_seconds
+        print(f"{backend:<18}{errors / max(chars, 1):>8.3f}{grade_matches:>6d}/{len(fixtures):<3d}"
+              f"{load_time:>10.2f}{statistics.median(latencies_ms):>12.1f}{p95:>10.1f}{rtf:>8.3f}")
+        if args.verbose:
+            for name, text, distance, same in rows:
+                print(f"  {name}: {text} (编辑距离 {distance}{'' if same else ', 成绩不一致'})")
+        recognizer.executor.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""本地测试服务器：模拟需要登录的教务系统，课程页面为 fixtures/grade_portal.html
+
+接口:
+  GET /login               登录页（标题为“登录”）
+  GET /login?user=NAME     登录并设置Cookie，有 next 参数时跳转回原页面
+  GET /course/<编号>?rows=300&mode=plain
+                           课程成绩录入页，未登录时跳转到登录页
+单独运行: python -m benchmarks.fixture_server [--port 8766]
+"""
+import argparse
+import secrets
+import threading
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, quote, urlsplit
+from benchmarks.common import PORTAL_FIXTURE
+
+_LOGIN_PAGE = """<!DOCTYPE html><html lang="zh-CN"><head><meta charset="utf-8"><title>登录</title></head>
+<body><form action="/login"><input name="user"><button>登录</button></form></body></html>"""
+
+
+class FixtureRequestHandler(BaseHTTPRequestHandler):
+    sessions = None  # 有效的会话令牌，由 start_fixture_server 设置
+    stats = None  # {"logins": 登录次数, "pages": 课程页面请求次数}
+    portal_html = None
+
+    def _send(self, status, body=b"", content_type="text/html; charset=utf-8", headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _logged_in(self):
+        cookie = SimpleCookie(self.headers.get("Cookie", ""))
+        return "session" in cookie and cookie["session"].value in self.sessions
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/login":
+            if "user" not in query:
+                self._send(200, _LOGIN_PAGE.encode("utf-8"))
+                return
+            token = secrets.token_hex(8)
+            self.sessions.add(token)
+            self.stats["logins"] += 1
+            headers = [("Set-Cookie", f"session={token}; Path=/; Max-Age=86400")]
+            target = query.get("next", ["/"])[0]
+            self._send(302, headers=headers + [("Location", target)])
+        elif url.path.startswith("/course/"):
+            if not self._logged_in():
+                self._send(302, headers=[("Location", "/login?next=" + quote(self.path))])
+                return
+            self.stats["pages"] += 1
+            self._send(200, self.portal_html)
+        elif url.path == "/":
+            self._send(200, "<!DOCTYPE html><title>首页</title>".encode("utf-8"))
+        else:
+            self._send(404, b"not found", "text/plain")
+
+    def log_message(self, format, *args):
+        pass  # 不逐条打印访问日志
+
+
+def start_fixture_server(host="127.0.0.1", port=0):
+    """在后台线程中启动测试服务器，返回 (server, 根地址)；port=0 时使用随机端口"""
+    handler = type("BoundFixtureHandler", (FixtureRequestHandler,), {
+        "sessions": set(),
+        "stats": {"logins": 0, "pages": 0},
+        "portal_html": Path(PORTAL_FIXTURE).read_bytes(),
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="fixture-server", daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+
+def fixture_login(base_url):
+    """测试服务器的登录流程，供 BrowserPool(login=...) 使用：已登录时返回False"""
+    def login(driver):
+        driver.get(base_url + "/course/0?rows=1")
+        if "登录" not in driver.title:
+            return False
+        driver.get(base_url + "/login?user=teacher")
+        return True
+    return login
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+    server, base_url = start_fixture_server(port=args.port)
+    print(f"测试服务器已启动: {base_url}/course/1?rows=300")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        print("\n测试服务器已停止")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""用 espeak-ng 合成普通话录入口令，生成 compare_backends 默认使用的录音和参考文本
+
+合成语音只用于在没有真实录音时对比各后端，准确率会低于真人录音。
+同一版本的 espeak-ng 每次生成的音频相同，生成的FLAC和 references.json 已提交到仓库，
+修改口令后重新运行即可。需要 pip install espeakng-loader（自带 espeak-ng 及其普通话数据）。
+用法: python -m benchmarks.make_speech_fixtures [--out-dir benchmarks/fixtures/speech]
+"""
+import argparse
+import ctypes
+import json
+import os
+import numpy as np
+from benchmarks.common import SAMPLE_RATE
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "speech")
+
+# (文件名, 朗读的文本, 参考文本)；参考文本按识别器开启ITN后的写法给出
+UTTERANCES = [
+    ("01_basic.flac", "一二三四得分九十五", "1234得分95"),
+    ("02_score_word.flac", "学号二三四五，成绩八十七", "学号2345，成绩87"),
+    ("03_half.flac", "三四五六分数七十五点五", "3456分数75.5"),
+    ("04_two_entries.flac", "四五六七得分六十，五六七八得分一百", "4567得分60，5678得分100"),
+    ("05_cancel.flac", "六七八九得分八十八，不对，重说", "6789得分88，不对，重说"),
+    ("06_undo.flac", "作废", "作废"),
+    ("07_leading_zero.flac", "零一二三得分九十九", "0123得分99"),
+    ("08_stop.flac", "好的，结束", "好的，结束"),
+]
+
+_AUDIO_OUTPUT_SYNCHRONOUS = 2
+_POS_CHARACTER = 1
+_ESPEAK_CHARS_UTF8 = 1
+_SYNTH_CALLBACK = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.POINTER(ctypes.c_short), ctypes.c_int, ctypes.c_void_p)
+
+
+class EspeakSynthesizer:
+    """通过 ctypes 调用 espeak-ng 把文本合成为16kHz单声道float32音频"""
+    def __init__(self, voice="cmn", rate=150):
+        import espeakng_loader
+
+        self.lib = ctypes.CDLL(espeakng_loader.get_library_path())
+        self.sample_rate = self.lib.espeak_Initialize(
+            _AUDIO_OUTPUT_SYNCHRONOUS, 0, espeakng_loader.get_data_path().encode(), 0
+        )
+        if self.sample_rate <= 0:
+            raise RuntimeError("espeak-ng 初始化失败")
+        if self.lib.espeak_SetVoiceByName(voice.encode()) != 0:
+            raise RuntimeError(f"espeak-ng 中找不到语音 {voice}")
+        self.lib.espeak_SetParameter(1, rate, 0)  # espeakRATE，每分钟字数
+        self._chunks = []
+        # 回调对象需要一直被引用，否则会被回收
+        self._callback = _SYNTH_CALLBACK(self._collect)
+        self.lib.espeak_SetSynthCallback(self._callback)
+
+    def _collect(self, wav, count, events):
+        if count > 0:
+            self._chunks.append(np.ctypeslib.as_array(wav, shape=(count,)).copy())
+        return 0
+
+    def synthesize(self, text):
+        self._chunks = []
+        data = text.encode("utf-8")
+        self.lib.espeak_Synth(data, len(data) + 1, 0, _POS_CHARACTER, 0, _ESPEAK_CHARS_UTF8, None, None)
+        self.lib.espeak_Synchronize()
+        # espeak-ng 输出接近满幅，降低音量避免重采样后削波
+        audio = np.concatenate(self._chunks).astype(np.float32) * (0.5 / 32768)
+        if self.sample_rate != SAMPLE_RATE:
+            from scipy.signal import resample_poly
+            audio = resample_poly(audio, SAMPLE_RATE, self.sample_rate).astype(np.float32)
+        return audio
+
+
+def main():
+    import soundfile as sf
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out-dir", default=FIXTURE_DIR)
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    synthesizer = EspeakSynthesizer()
+    references = {}
+    for name, spoken, reference in UTTERANCES:
+        audio = synthesizer.synthesize(spoken)
+        sf.write(os.path.join(args.out_dir, name), audio, SAMPLE_RATE, subtype="PCM_16")
+        references[name] = reference
+        print(f"{name}: {len(audio) / SAMPLE_RATE:.1f} 秒  {spoken}")
+    with open(os.path.join(args.out_dir, "references.json"), "w", encoding="utf-8") as f:
+        json.dump(references, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    print(f"已生成 {len(UTTERANCES)} 段录音: {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
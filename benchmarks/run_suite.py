@@ -0,0 +1,217 @@
+"""热点路径基准测试套件：不需要麦克风和网络，结果与保存的基线对比
+
+包含的用例：
+  parser.*      合成识别文本经过两种解析器（需要提示词 / SpeechProcessor）
+  excel.*       1k/10k（--large 时加上100k）行合成花名册经过 ExcelProcessor.process_grades
+  recognize.*   录音（--wav-dir）或合成音频经过 SenseVoiceRecognizer.recognize，只把 _generate 换成固定输出的桩，
+                测量输入缓冲区、结果处理等模型之外的开销（需要torch和funasr）；--real-model 时使用真实的SenseVoice
+  queue.*       多个生产者并发写入 AsyncChannel 时的吞吐
+
+用法: python -m benchmarks.run_suite [--only parser] [--large] [--update-baseline] [--tolerance 0.25]
+按每条的平均耗时与基线对比（--lines 等改变数据量时基线按条数折算），
+超过基线 (1 + tolerance) 倍的用例标记为回退，存在回退时退出码为1。
+基线与机器相关，换机器后先用 --update-baseline 重新生成。
+"""
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+from benchmarks.common import measure, synthetic_transcripts, synthetic_utterances, load_wavs, \
+    make_roster_workbook, make_grades
+from src.speech.speech_processor import SpeechProcessor
+from src.speech.speech_recognizer import SenseVoiceRecognizer, InputBuffers
+from src.speech.transcript_parser import TranscriptParser
+from src.utils.data_queue import AsyncChannel
+from src.utils.excel_processor import ExcelProcessor
+from src.utils.roster_index import RosterIndex
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+
+class StubRecognizer(SenseVoiceRecognizer):
+    """只替换模型推理，输入缓冲区、结果处理和解析走真实代码"""
+    def __init__(self):
+        super().__init__(device="cpu", lazy=True)
+
+    def load(self, warmup=False):
+        if self.model is None:
+            self.model = object()
+            self.input_buffers = InputBuffers(self.device)
+
+    def _generate(self, audio_tensor):
+        # 输出格式与SenseVoice一致
+        return [{"text": "<|zh|><|NEUTRAL|><|Speech|><|withitn|>1234得分90。"}]
+
+
+def parser_cases(args):
+    lines = synthetic_transcripts(args.lines)
+    cue_parser = TranscriptParser(require_cue=True)
+    processor = SpeechProcessor()
+
+    def speech_processor():
+        for text in lines:
+            processor.process_text(text)
+
+    yield "parser.transcript_cue", lambda: cue_parser.parse_lines(lines), None, len(lines)
+    yield "parser.speech_processor", speech_processor, None, len(lines)
+
+
+def excel_cases(args, tmp):
+    sizes = [1000, 10000] + ([100000] if args.large else [])
+    for rows in sizes:
+        name = f"excel.process_grades_{rows // 1000}k"
+        if args.only and args.only not in name:
+            continue
+        excel_path = os.path.join(tmp, f"roster_{rows}.xlsx")
+        json_path = os.path.join(tmp, f"grades_{rows}.json")
+        output_path = os.path.join(tmp, f"updated_{rows}.xlsx")
+        make_roster_workbook(excel_path, rows, extra_columns=5)
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(make_grades(rows, 300), f)
+
+        def setup(output_path=output_path):
+            # 每次都从原始花名册开始（原始文件的索引缓存保留，与日常使用一致）
+            for path in (output_path, RosterIndex.cache_path(output_path)):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        def run(excel_path=excel_path, json_path=json_path, output_path=output_path):
+            processor = ExcelProcessor(excel_path)
+            processor.output_path = output_path
+            if not processor.process_grades(json_path, interactive=False):
+                raise RuntimeError("process_grades 失败")
+
+        yield name, run, setup, rows
+
+
+def recognize_cases(args):
+    if args.wav_dir:
+        utterances = [audio for _, audio in load_wavs(args.wav_dir)]
+    else:
+        utterances = synthetic_utterances(32, seconds=3.0)
+    if args.real_model:
+        recognizer = SenseVoiceRecognizer(device="cpu")
+        name = "recognize.sensevoice"
+    elif all(importlib.util.find_spec(module) for module in ("torch", "funasr")):
+        recognizer = StubRecognizer()
+        name = "recognize.stub_generate"
+    else:
+        if not args.only or args.only in "recognize.stub_generate":
+            print("未安装torch或funasr，跳过 recognize.stub_generate")
+        return
+
+    async def recognize_all():
+        for audio in utterances:
+            await recognizer.recognize(audio.copy())
+        recognizer.recognition_results.clear()
+
+    yield name, lambda: asyncio.run(recognize_all()), None, len(utterances)
+
+
+def queue_cases(args):
+    producers = 4
+    per_producer = args.queue_items // producers
+
+    async def contention(capacity):
+        queue = AsyncChannel(capacity=capacity)
+
+        async def produce():
+            for i in range(per_producer):
+                await queue.put(i)
+                if i % 64 == 0:
+                    await asyncio.sleep(0)  # 让出事件循环，制造生产者之间的交错
+
+        async def consume():
+            for _ in range(producers * per_producer):
+                await queue.get()
+
+        await asyncio.gather(consume(), *(produce() for _ in range(producers)))
+
+    total = producers * per_producer
+    yield "queue.unbounded_4_producers", lambda: asyncio.run(contention(0)), None, total
+    yield "queue.bounded_64_4_producers", lambda: asyncio.run(contention(64)), None, total
+
+
+def load_baselines():
+    if not os.path.exists(BASELINE_PATH):
+        return {"machine": {}, "cases": {}}
+    with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def machine_info():
+    return {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", help="只运行名称包含该字符串的用例")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--lines", type=int, default=20000, help="解析用例的识别文本行数")
+    parser.add_argument("--queue-items", type=int, default=200000)
+    parser.add_argument("--large", action="store_true", help="包含100k行花名册")
+    parser.add_argument("--wav-dir", help="识别用例使用的录音目录")
+    parser.add_argument("--real-model", action="store_true", help="识别用例使用真实的SenseVoice模型")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--update-baseline", action="store_true", help="把本次结果写入基线")
+    args = parser.parse_args()
+
+    baselines = load_baselines()
+    results = {}
+    regressions = []
+    print(f"{'用例':<32}{'中位数(ms)':>12}{'基线(ms)':>12}{'变化':>9}  吞吐(条/秒)")
+    with tempfile.TemporaryDirectory() as tmp:
+        groups = (parser_cases(args), excel_cases(args, tmp), recognize_cases(args), queue_cases(args))
+        for group in groups:
+            for name, func, setup, items in group:
+                if args.only and args.only not in name:
+                    continue
+                # 被测代码的打印输出不计入结果
+                with contextlib.redirect_stdout(io.StringIO()):
+                    repeat = 1 if name.endswith("_100k") else args.repeat
+                    timings = measure(func, repeat=repeat, setup=setup)
+                median = statistics.median(timings)
+                results[name] = {"median": median, "best": min(timings), "items": items}
+
+                line = f"{name:<32}{median * 1000:>12.1f}"
+                baseline = baselines["cases"].get(name)
+                status = ""
+                if baseline:
+                    # 数据量不同时把基线按条数折算，比较的是每条的耗时
+                    expected = baseline["median"] / baseline.get("items", items) * items
+                    change = median / expected - 1
+                    if change > args.tolerance:
+                        status = "  回退"
+                        regressions.append(name)
+                    line += f"{expected * 1000:>12.1f}{change:>+9.1%}"
+                else:
+                    line += f"{'-':>12}{'-':>9}"
+                line += f"  {items / median:>10.1f}{status}"
+                print(line)
+
+    if baselines.get("machine") and baselines["machine"] != machine_info():
+        print("\n注意: 基线来自另一台机器，对比结果仅供参考")
+    if args.update_baseline:
+        baselines["machine"] = machine_info()
+        baselines["cases"].update(results)
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"\n基线已更新: {BASELINE_PATH}")
+    if regressions:
+        print(f"\n以下用例比基线慢 {args.tolerance:.0%} 以上: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,75 @@
+import argparse
 import asyncio
-from src.speech.speech_recognizer import SenseVoiceRecognizer
+import logging
+from src.speech.backends import create_recognizer
 from src.speech.speech_processor import SpeechProcessor
-from src.utils.excel_processor import ExcelProcessor
+from src.speech.audio_capture import AudioCapture, SAMPLE_RATE, audio_level, normalize_peak
+from src.speech.pipeline import RecognitionPipeline
+from src.speech.streaming import StreamingDecoder
+from src.speech.batch_recognizer import BatchingRecognizer
+from src.speech.transcript_parser import TranscriptParser
+from src.speech.id_resolver import RosterIdResolver
+from src.utils.grade_journal import GradeJournal
+from src.utils.live_commit import LiveGradeCommitter
+from src.utils.roster_set import GRADE_KINDS, open_rosters, uses_roster_set
+from src.utils.session_metrics import SessionMetrics, MetricsServer
+from src.utils.stage_timer import StageTimer
 import sounddevice as sd
 import numpy as np
 
 class GradeFillingSystem:
-    def __init__(self):
-        self.recognizer = SenseVoiceRecognizer()
+    def __init__(self, input_wav=None, max_batch=1, backend="sensevoice", live=False,
+                 journal_path="grade_journal.jsonl", streaming=False, backend_options=None,
+                 metrics_path="session_metrics.json", metrics_port=None, rosters=None, grade_kind=None):
+        self.recognizer = create_recognizer(backend, lazy=True, **(backend_options or {}))
+        # 选择录音设备的同时在后台加载模型并预热
+        self.recognizer.load_async(warmup=True)
+        # 识别、录音、解析和写入Excel共用同一个计时器，会话结束时汇总
+        self.stage_timer = getattr(self.recognizer, "stage_timer", None) or StageTimer()
+        self.session_metrics = SessionMetrics(self.stage_timer)
+        self.metrics_path = metrics_path
+        self.metrics_server = MetricsServer(self.session_metrics, port=metrics_port).start() if metrics_port else None
+        # 指定多个花名册（多个班级）或成绩类别时使用 RosterSet
+        self.excel_processor = open_rosters(rosters or ["test_table.xlsx"], grade_kind)
+        self.excel_processor.stage_timer = self.stage_timer
+        self.parser = self._create_parser()
+        self.recognizer.parser = self.parser
+        if max_batch > 1:
+            # 识别跟不上语速时合并排队的语音段批量识别
+            self.recognizer = BatchingRecognizer(self.recognizer, max_batch=max_batch)
         self.processor = SpeechProcessor()
-        self.excel_processor = ExcelProcessor()
-        self.audio_device = self._select_audio_device()  # 选择录音设备
+        self.committer = None
+        if live:
+            # 实时模式：每句话立即解析并写入日志，结束时只需保存
+            self.committer = LiveGradeCommitter(
+                self.excel_processor, GradeJournal(journal_path).open(), parser=self.parser,
+                stage_timer=self.stage_timer,
+            )
+            self.committer.recover()
+            self.recognizer.text_callbacks.append(self.committer.on_text)
+        self.input_wav = input_wav  # 指定WAV文件时用文件代替麦克风
+        self.audio_device = None if input_wav else self._select_audio_device()  # 选择录音设备
+        if not self.recognizer.is_loaded():
+            print("正在等待模型加载完成...")
+        self.recognizer.wait_until_loaded()
+        self.capture = AudioCapture(device=self.audio_device, stage_timer=self.stage_timer)
+        self.streamer = None
+        if streaming:
+            # 边说边解码，停止/作废指令不必等整句识别完
+            self.streamer = StreamingDecoder(self.recognizer, self.capture)
+            if self.committer is not None:
+                self.streamer.keyword_callbacks.append(self.committer.on_keyword)
+        self._feed_task = None
+        
+    def _create_parser(self):
+        """用花名册中的学号建立纠错索引，花名册不可用时不纠错"""
+        try:
+            resolver = RosterIdResolver.from_excel_processor(self.excel_processor)
+            print(f"已加载 {len(resolver.valid_ids)} 个有效学号后四位用于纠错")
+        except Exception as e:
+            print(f"警告: 无法加载花名册，学号不做纠错: {e}")
+            resolver = None
+        return TranscriptParser(require_cue=True, resolver=resolver)
         
     def _select_audio_device(self):
         """选择录音设备"""
@@ -78,91 +137,105 @@ class GradeFillingSystem:
     
     async def start(self):
         """启动系统"""
-        await self.speech_recognition_task()
+        if self.input_wav:
+            # 流式识别按时间步长解码，文件需要按实际语速送入
+            self._feed_task = asyncio.create_task(
+                self.capture.feed_file(self.input_wav, realtime=self.streamer is not None)
+            )
+        else:
+            await self.capture.start()
+        try:
+            await self.speech_recognition_task()
+        finally:
+            if self._feed_task is not None:
+                self._feed_task.cancel()
+            elif not self.capture.finished:
+                await self.capture.stop()
+            self.stage_timer.report()
+            if self.metrics_path:
+                self.session_metrics.write_json(self.metrics_path)
+            if self.metrics_server is not None:
+                self.metrics_server.stop()
     
     async def speech_recognition_task(self):
-        """语音识别任务"""
+        """语音识别任务：录音与识别并行运行"""
         print("\n开始语音识别，说『结束』停止录音...")
-        while True:
-            audio_stream = await self.get_audio_stream()
-            text = await self.recognizer.recognize(audio_stream)
-            
+        pipeline = RecognitionPipeline(
+            self.get_audio_stream, self.recognizer, capture=self.capture, streamer=self.streamer
+        )
+        self.session_metrics.pipeline = pipeline.metrics
+        text = await pipeline.run()
+        if text is None:
+            print("音频输入已结束")
+        
+        if self.committer is not None:
             if text == "STOP_AND_PROCESS":
-                # 处理最终结果
-                result_dict = await self.recognizer.process_final_results()
-                if result_dict:
-                    print("\n是否更新Excel文件？(y/n): ")
-                    if input().lower().startswith('y'):
-                        self.excel_processor.process_grades()
-                break
+                self.committer.finish()
             elif text == "STOP":
-                break
+                self.committer.discard()
+            self.committer.close()
+        elif text == "STOP_AND_PROCESS":
+            # 处理最终结果
+            result_dict = await self.recognizer.process_final_results()
+            if result_dict:
+                print("\n是否更新Excel文件？(y/n): ")
+                if input().lower().startswith('y'):
+                    self.excel_processor.process_grades()
 
     async def get_audio_stream(self):
-        """实时录音实现，增加错误处理和重试机制"""
-        MAX_RETRIES = 3
-        retry_count = 0
-        SAMPLE_RATE = 16000  # 统一使用16kHz采样率
-        
-        while retry_count < MAX_RETRIES:
-            try:
-                duration = 6
-                print(f"\n开始录音...（第 {retry_count + 1} 次尝试）")
-                print("请开始说话...")
-                
-                # 录音
-                audio_data = sd.rec(
-                    int(duration * SAMPLE_RATE), 
-                    samplerate=SAMPLE_RATE,
-                    channels=1, 
-                    dtype=np.float32,
-                    device=self.audio_device
-                )
-                
-                try:
-                    await asyncio.wait_for(
-                        asyncio.get_event_loop().run_in_executor(None, sd.wait),
-                        timeout=duration + 2
-                    )
-                except asyncio.TimeoutError:
-                    print("录音等待超时，正在重试...")
-                    retry_count += 1
-                    continue
-                    
-                # 确保音频数据是二维的 [1, audio_length]
-                if len(audio_data.shape) == 1:
-                    audio_data = audio_data.reshape(1, -1)
-                
-                # 音量检查
-                volume_rms = np.sqrt(np.mean(audio_data**2))
-                print(f"原始音量: {volume_rms:.6f}")
-                
-                if volume_rms < 0.001:
-                    print("警告: 音量太小，正在重试...")
-                    retry_count += 1
-                    continue
-                
-                # 归一化音频数据
-                max_abs = np.max(np.abs(audio_data))
-                if max_abs > 0:
-                    audio_data = audio_data / max_abs
-                
-                print(f"音频形状: {audio_data.shape}")
-                print(f"采样率: {SAMPLE_RATE}")
-                print("录音结束")
-                return audio_data
-                
-            except Exception as e:
-                print(f"录音出错: {e}")
-                retry_count += 1
-                if retry_count < MAX_RETRIES:
-                    await asyncio.sleep(1)
-        
-        # 返回正确采样率的静音数据
-        return np.zeros((1, 6 * SAMPLE_RATE), dtype=np.float32)
+        """等待端点检测输出下一句完整语音，输入结束时返回None"""
+        while True:
+            audio_data = await self.capture.get_utterance()
+            if audio_data is None:
+                return None
+            
+            # 端点检测输出的是独立的一维数组，直接原地归一化后交给模型
+            with self.stage_timer.stage("normalize"):
+                volume_rms, peak = audio_level(audio_data)
+                if volume_rms >= 0.001:
+                    normalize_peak(audio_data, peak)
+            print(f"\n检测到语音: {audio_data.size / SAMPLE_RATE:.2f} 秒, 音量: {volume_rms:.6f}")
+            
+            if volume_rms < 0.001:
+                print("警告: 音量太小，已忽略")
+                continue
+            
+            return audio_data
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="语音录入成绩")
+    parser.add_argument("--input-wav", help="用WAV/FLAC文件代替麦克风输入")
+    parser.add_argument("--backend", default="sensevoice", help="语音识别后端（sensevoice / sensevoice-onnx / remote / azure）")
+    parser.add_argument("--intra-op-threads", type=int, help="sensevoice-onnx 单次推理使用的线程数")
+    parser.add_argument("--no-quantize", action="store_true", help="sensevoice-onnx 使用未量化的模型")
+    parser.add_argument("--live", action="store_true", help="边录入边保存到日志，结束时直接写入Excel")
+    parser.add_argument("--max-batch", type=int, default=1, help="批量识别时每批最多语音段数量")
+    parser.add_argument("--streaming", action="store_true", help="说话过程中输出部分结果并提前检测停止/作废指令")
+    parser.add_argument("--metrics-json", default="session_metrics.json",
+                        help="会话结束时写入各阶段耗时和实时率的JSON文件（为空时不写）")
+    parser.add_argument("--metrics-port", type=int, help="在本机该端口提供Prometheus格式的 /metrics 接口")
+    parser.add_argument("--roster", nargs="+",
+                        help="花名册文件，可写作 文件.xlsx#工作表1,工作表2；多个班级时说出班级名称切换（多个文件或指定工作表时需要 --live）")
+    parser.add_argument("--grade-kind", choices=GRADE_KINDS, help="写入的成绩列（说出“期中/期末/平时”时切换，需要 --live）")
+    parser.add_argument("--debug", action="store_true", help="输出音频张量等调试信息")
+    args = parser.parse_args()
+    if not args.live and uses_roster_set(args.roster or ["test_table.xlsx"], args.grade_kind):
+        # 非实时模式在结束时汇总为 {学号后四位: 成绩}，无法按句切换班级和成绩类别
+        parser.error("多个花名册、指定工作表或 --grade-kind 需要与 --live 一起使用")
+    return args
 
 async def main():
-    system = GradeFillingSystem()
+    args = parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.WARNING, format="%(name)s: %(message)s")
+    backend_options = {}
+    if args.intra_op_threads:
+        backend_options["intra_op_threads"] = args.intra_op_threads
+    if args.no_quantize:
+        backend_options["quantize"] = False
+    system = GradeFillingSystem(input_wav=args.input_wav, max_batch=args.max_batch, backend=args.backend,
+                                live=args.live, streaming=args.streaming, backend_options=backend_options,
+                                metrics_path=args.metrics_json, metrics_port=args.metrics_port,
+                                rosters=args.roster, grade_kind=args.grade_kind)
     await system.start()
 
 if __name__ == "__main__":
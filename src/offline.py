@@ -0,0 +1,144 @@
+"""离线批量转写：处理录好的WAV/FLAC文件，不需要麦克风
+
+用法: python -m src.offline 录音目录或文件 [--excel test_table.xlsx] [--workers N]
+"""
+import argparse
+import glob
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+AUDIO_EXTENSIONS = (".wav", ".flac")
+
+_recognizer = None  # 每个工作进程各自持有一个模型
+
+
+def collect_audio_files(path):
+    """返回待处理的音频文件列表（按文件名排序）"""
+    if os.path.isdir(path):
+        files = []
+        for ext in AUDIO_EXTENSIONS:
+            files.extend(glob.glob(os.path.join(path, "**", "*" + ext), recursive=True))
+        return sorted(files)
+    return [path]
+
+
+def _init_worker(model_dir, threads):
+    """工作进程初始化：限制线程数并加载模型"""
+    global _recognizer
+    import torch
+    from src.speech.speech_recognizer import SenseVoiceRecognizer
+
+    torch.set_num_threads(threads)
+    _recognizer = SenseVoiceRecognizer(model_dir=model_dir, device="cpu")
+
+
+def _transcribe_segment(audio):
+    """在工作进程中识别一段语音"""
+    return _recognizer.transcribe(audio)
+
+
+def iter_segments(files):
+    """逐个文件读取并切分为语音段，产出 (文件路径, 语音段)"""
+    from src.speech.audio_capture import UtteranceSegmenter, SAMPLE_RATE, load_audio_file
+
+    for path in files:
+        audio = load_audio_file(path, SAMPLE_RATE)
+        segmenter = UtteranceSegmenter(sample_rate=SAMPLE_RATE)
+        for utterance in segmenter.process(audio) + segmenter.flush():
+            yield path, utterance
+
+
+def transcribe_files(files, model_dir="iic/SenseVoiceSmall", workers=None, threads_per_worker=1):
+    """用进程池并行识别所有语音段，按录音顺序返回识别文本"""
+    cpu_count = os.cpu_count() or 1
+    if workers is None:
+        workers = max(1, cpu_count // threads_per_worker)
+    print(f"使用 {workers} 个进程，每个进程 {threads_per_worker} 个线程处理 {len(files)} 个文件")
+
+    texts = []
+    pending = deque()  # 按提交顺序保存 (文件路径, future)，保证结果顺序
+    max_in_flight = workers * 4  # 限制同时在途的语音段，避免整学期录音全部读入内存
+
+    def collect_one():
+        path, future = pending.popleft()
+        text = future.result()
+        if text.strip():
+            print(f"{os.path.basename(path)}: {text}")
+            texts.append(text)
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(model_dir, threads_per_worker),
+    ) as pool:
+        for path, utterance in iter_segments(files):
+            pending.append((path, pool.submit(_transcribe_segment, utterance)))
+            if len(pending) >= max_in_flight:
+                collect_one()
+        while pending:
+            collect_one()
+    return texts
+
+
+def parse_args():
+    from src.utils.roster_set import GRADE_KINDS
+
+    parser = argparse.ArgumentParser(description="离线批量转写录音并更新成绩表")
+    parser.add_argument("input", help="录音文件或目录（WAV/FLAC）")
+    parser.add_argument("--excel", nargs="+", default=["test_table.xlsx"],
+                        help="成绩表路径，可写作 文件.xlsx#工作表；多个文件时合并为一个花名册集合")
+    parser.add_argument("--grade-kind", choices=GRADE_KINDS, help="写入的成绩列（期中/期末/平时）")
+    parser.add_argument("--json", default="recognition_results.json", help="解析结果输出路径")
+    parser.add_argument("--model-dir", default="iic/SenseVoiceSmall")
+    parser.add_argument("--workers", type=int, help="进程数，默认按CPU核数计算")
+    parser.add_argument("--threads-per-worker", type=int, default=1, help="每个进程的推理线程数")
+    parser.add_argument("--no-excel", action="store_true", help="只输出JSON，不更新成绩表")
+    return parser.parse_args()
+
+
+def main():
+    from src.speech.speech_recognizer import parse_recognition_results
+    from src.speech.transcript_parser import TranscriptParser
+    from src.speech.id_resolver import RosterIdResolver
+    from src.utils.roster_set import open_rosters
+
+    args = parse_args()
+    files = collect_audio_files(args.input)
+    if not files:
+        print(f"没有找到音频文件: {args.input}")
+        return 1
+
+    started = time.time()
+    texts = transcribe_files(
+        files,
+        model_dir=args.model_dir,
+        workers=args.workers,
+        threads_per_worker=args.threads_per_worker,
+    )
+    print(f"\n识别完成，共 {len(texts)} 段，耗时 {time.time() - started:.1f} 秒")
+
+    parser = None
+    excel_processor = None
+    if not args.no_excel:
+        # 用花名册纠正识别错误的学号
+        excel_processor = open_rosters(args.excel, args.grade_kind)
+        parser = TranscriptParser(resolver=RosterIdResolver.from_excel_processor(excel_processor))
+    result_dict = parse_recognition_results(texts, parser)
+    if not result_dict:
+        return 1
+
+    with open(args.json, "w", encoding="utf-8") as f:
+        json.dump(result_dict, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存到 {args.json}")
+
+    if excel_processor is not None:
+        ok = excel_processor.process_grades(args.json, interactive=False)
+        return 0 if ok else 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,321 @@
+import asyncio
+import math
+import threading
+import time
+import numpy as np
+from src.utils.data_queue import AsyncChannel, ChannelClosed
+from src.utils.stage_timer import StageTimer
+
+SAMPLE_RATE = 16000  # 统一使用16kHz采样率
+
+
+def load_audio_file(path, sample_rate=SAMPLE_RATE):
+    """读取WAV/FLAC文件并转换为单声道float32，必要时重采样"""
+    import soundfile as sf
+
+    data, sr = sf.read(path, dtype='float32', always_2d=True)
+    data = data.mean(axis=1) if data.shape[1] > 1 else data[:, 0]
+    if sr != sample_rate:
+        from scipy.signal import resample_poly
+        data = resample_poly(data, sample_rate, sr).astype(np.float32)
+    return data
+
+
+def audio_level(audio):
+    """返回音频的 (RMS, 峰值)，不产生与音频等长的临时数组"""
+    if audio.size == 0:
+        return 0.0, 0.0
+    flat = audio.reshape(-1)
+    rms = math.sqrt(float(np.dot(flat, flat)) / flat.size)
+    peak = max(float(flat.max()), -float(flat.min()))
+    return rms, peak
+
+
+def normalize_peak(audio, peak=None):
+    """原地把音频峰值归一化到1，返回同一个数组"""
+    if peak is None:
+        peak = audio_level(audio)[1]
+    if peak > 0:
+        audio *= 1.0 / peak
+    return audio
+
+
+class RingBuffer:
+    """固定容量的float32环形缓冲区，按绝对采样序号读取"""
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.buffer = np.zeros(capacity, dtype=np.float32)
+        self.total_written = 0  # 累计写入的采样数（绝对序号）
+
+    def write(self, samples):
+        """写入一段采样，超出容量时覆盖最旧的数据"""
+        n = len(samples)
+        if n >= self.capacity:
+            samples = samples[-self.capacity:]
+            self.total_written += n - self.capacity
+            n = self.capacity
+        start = self.total_written % self.capacity
+        first = min(n, self.capacity - start)
+        self.buffer[start:start + first] = samples[:first]
+        if first < n:
+            self.buffer[:n - first] = samples[first:]
+        self.total_written += n
+
+    def read_range(self, start, end):
+        """读取绝对序号 [start, end) 的采样，返回连续的新数组"""
+        oldest = max(0, self.total_written - self.capacity)
+        start = max(start, oldest)
+        end = min(end, self.total_written)
+        if end <= start:
+            return np.zeros(0, dtype=np.float32)
+        s = start % self.capacity
+        e = end % self.capacity
+        if s < e:
+            return self.buffer[s:e].copy()
+        return np.concatenate((self.buffer[s:], self.buffer[:e]))
+
+
+class UtteranceSegmenter:
+    """基于短时能量的端点检测，把连续音频切分为一句一句的语音段"""
+    def __init__(self, sample_rate=SAMPLE_RATE, frame_ms=30, min_rms=0.005,
+                 noise_ratio=3.0, start_frames=3, hangover_ms=400,
+                 preroll_ms=200, min_utterance_ms=300, max_utterance_s=15):
+        self.sample_rate = sample_rate
+        self.frame_size = int(sample_rate * frame_ms / 1000)
+        self.min_rms = min_rms
+        self.noise_ratio = noise_ratio
+        self.start_frames = start_frames
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.hangover_seconds = self.hangover_frames * self.frame_size / sample_rate
+        self.preroll = int(sample_rate * preroll_ms / 1000)
+        self.min_utterance = int(sample_rate * min_utterance_ms / 1000)
+        self.max_utterance = int(sample_rate * max_utterance_s)
+
+        # 缓冲区需要容纳最长语音段加上前后余量
+        capacity = self.max_utterance + self.preroll + self.hangover_frames * self.frame_size * 2
+        self.ring = RingBuffer(capacity)
+        self.noise_floor = min_rms
+        # 录音回调线程写入，流式识别在事件循环中读取正在进行的语音段
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """重置端点检测状态"""
+        self._pending = np.zeros(0, dtype=np.float32)  # 不足一帧的剩余采样
+        self._in_speech = False
+        self._voiced_run = 0
+        self._silent_run = 0
+        self._speech_start = 0
+        self._last_voiced_end = 0
+        self._hold = False  # 流式识别正在处理句尾时暂缓输出当前语音段
+
+    def process(self, samples):
+        """处理一段音频，返回本次检测到的完整语音段列表"""
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        with self.lock:
+            if len(self._pending):
+                samples = np.concatenate((self._pending, samples))
+
+            utterances = []
+            n_frames = len(samples) // self.frame_size
+            for i in range(n_frames):
+                frame = samples[i * self.frame_size:(i + 1) * self.frame_size]
+                self.ring.write(frame)
+                utterance = self._process_frame(frame)
+                if utterance is not None:
+                    utterances.append(utterance)
+            self._pending = samples[n_frames * self.frame_size:].copy()
+        return utterances
+
+    def current_speech(self):
+        """返回正在进行中的语音段 (起始序号, 结束序号, 最后有声帧的结束序号)，不在语音中时返回None
+
+        只读取位置不复制音频，需要解码时再用 read_speech 读取。
+        """
+        with self.lock:
+            if not self._in_speech:
+                return None
+            return self._speech_start, self.ring.total_written, self._last_voiced_end
+
+    def read_speech(self, speech_start, end, max_samples=None):
+        """复制起始于 speech_start 的语音段 [开头, end) 的音频（含前置余量），指定 max_samples 时只取最后一段"""
+        begin = speech_start - self.preroll
+        if max_samples is not None:
+            begin = max(begin, end - max_samples)
+        with self.lock:
+            return self.ring.read_range(begin, end)
+
+    def hold(self, speech_start):
+        """暂缓输出起始于 speech_start 的语音段，该语音段已结束或不存在时返回False"""
+        with self.lock:
+            if not self._in_speech or self._speech_start != speech_start:
+                return False
+            self._hold = True
+            return True
+
+    def release(self):
+        """取消暂缓，句尾静音已足够长时在下一帧输出语音段"""
+        with self.lock:
+            self._hold = False
+
+    def discard_current(self):
+        """丢弃正在进行中的语音段（流式识别已提前处理）"""
+        with self.lock:
+            self._in_speech = False
+            self._hold = False
+            self._voiced_run = 0
+            self._silent_run = 0
+
+    def flush(self):
+        """输入结束时输出尚未结束的语音段"""
+        with self.lock:
+            if self._in_speech:
+                utterance = self._emit(self._last_voiced_end)
+                self._in_speech = False
+                self._hold = False
+                if utterance is not None:
+                    return [utterance]
+        return []
+
+    def _process_frame(self, frame):
+        rms = float(np.sqrt(np.dot(frame, frame) / len(frame)))
+        threshold = max(self.min_rms, self.noise_floor * self.noise_ratio)
+        frame_end = self.ring.total_written
+        voiced = rms >= threshold
+
+        if not self._in_speech:
+            if voiced:
+                self._voiced_run += 1
+                if self._voiced_run >= self.start_frames:
+                    self._in_speech = True
+                    self._silent_run = 0
+                    self._speech_start = frame_end - self._voiced_run * self.frame_size
+                    self._last_voiced_end = frame_end
+            else:
+                self._voiced_run = 0
+                # 只在静音段更新背景噪声估计
+                self.noise_floor = 0.95 * self.noise_floor + 0.05 * max(rms, self.min_rms / self.noise_ratio)
+            return None
+
+        if voiced:
+            self._silent_run = 0
+            self._last_voiced_end = frame_end
+        else:
+            self._silent_run += 1
+
+        if self._silent_run >= self.hangover_frames and not self._hold:
+            self._in_speech = False
+            self._voiced_run = 0
+            return self._emit(frame_end)
+        if frame_end - self._speech_start >= self.max_utterance:
+            # 超过最长时长，强制切分并继续检测
+            utterance = self._emit(frame_end)
+            self._speech_start = frame_end
+            return utterance
+        return None
+
+    def _emit(self, end):
+        if self._last_voiced_end - self._speech_start < self.min_utterance:
+            return None
+        return self.ring.read_range(self._speech_start - self.preroll, end)
+
+
+class AudioCapture:
+    """基于sd.InputStream的连续录音，逐句输出到异步队列
+
+    stage_timer 记录 vad（每个录音块的端点检测耗时）和 capture（语音段输出后在队列中等待的时间）。
+    """
+    def __init__(self, device=None, sample_rate=SAMPLE_RATE, block_ms=30,
+                 segmenter=None, max_queue=32, stage_timer=None):
+        self.device = device
+        self.sample_rate = sample_rate
+        self.block_size = int(sample_rate * block_ms / 1000)
+        self.segmenter = segmenter or UtteranceSegmenter(sample_rate=sample_rate)
+        self.max_queue = max_queue
+        self.queue = None  # AsyncChannel，元素为 (输出时间, 语音段)
+        self.stream = None
+        self.finished = False
+        self.last_block_time = 0.0  # 最近一个录音块到达的时间（time.monotonic）
+        self.stage_timer = stage_timer or StageTimer()
+
+    @property
+    def dropped(self):
+        """队列已满时丢弃的语音段数量"""
+        return self.queue.dropped if self.queue is not None else 0
+
+    def _ensure_queue(self):
+        if self.queue is None:
+            # 消费者跟不上时丢弃最旧的一句，保证实时性
+            self.queue = AsyncChannel(
+                capacity=self.max_queue,
+                on_drop=lambda _: print("警告: 语音队列已满，丢弃最早的一段语音"),
+            )
+
+    def _callback(self, indata, frames, time_info, status):
+        """PortAudio回调线程：只做端点检测，完整语音段交给事件循环"""
+        if status:
+            print(f"录音状态: {status}")
+        self.last_block_time = time.monotonic()
+        with self.stage_timer.stage("vad"):
+            utterances = self.segmenter.process(indata[:, 0])
+        for utterance in utterances:
+            self.queue.put_threadsafe((time.monotonic(), utterance))
+
+    async def start(self):
+        """打开录音设备，开始连续录音"""
+        import sounddevice as sd
+
+        self._ensure_queue()
+        self.stream = sd.InputStream(
+            samplerate=self.sample_rate,
+            blocksize=self.block_size,
+            channels=1,
+            dtype='float32',
+            device=self.device,
+            callback=self._callback,
+        )
+        self.stream.start()
+        print("开始连续录音...")
+
+    async def stop(self):
+        """停止录音并输出最后一段语音"""
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+        for utterance in self.segmenter.flush():
+            self.queue.put_threadsafe((time.monotonic(), utterance))
+        self.finished = True
+        self.queue.close_threadsafe()  # 排在最后一段语音之后
+
+    async def feed_file(self, path, realtime=False):
+        """把WAV/FLAC文件按录音块大小送入同一端点检测流程，用于离线测试"""
+        self._ensure_queue()
+        data = load_audio_file(path, self.sample_rate)
+
+        block_seconds = self.block_size / self.sample_rate
+        for start in range(0, len(data), self.block_size):
+            block = data[start:start + self.block_size]
+            self.last_block_time = time.monotonic()
+            with self.stage_timer.stage("vad"):
+                utterances = self.segmenter.process(block)
+            for utterance in utterances:
+                await self.queue.put((time.monotonic(), utterance))
+            if realtime:
+                await asyncio.sleep(block_seconds)
+            else:
+                await asyncio.sleep(0)
+        for utterance in self.segmenter.flush():
+            await self.queue.put((time.monotonic(), utterance))
+        self.finished = True
+        self.queue.close()
+
+    async def get_utterance(self):
+        """获取下一段完整语音，录音结束后返回None"""
+        self._ensure_queue()
+        try:
+            emitted_at, utterance = await self.queue.get()
+        except ChannelClosed:
+            return None
+        self.stage_timer.add("capture", time.monotonic() - emitted_at)
+        return utterance
@@ -0,0 +1,29 @@
+import importlib
+
+# 识别后端注册表：名称 -> (模块路径, 类名)，只有被选中时才导入对应模块
+RECOGNIZER_BACKENDS = {
+    "sensevoice": ("src.speech.speech_recognizer", "SenseVoiceRecognizer"),
+    "sensevoice-onnx": ("src.speech.onnx_recognizer", "SenseVoiceOnnxRecognizer"),
+    "azure": ("src.speech.speech_recognizer", "AzureSpeechRecognizer"),
+    "remote": ("src.speech.recognizer_server", "RemoteRecognizer"),
+}
+
+
+def register_backend(name, module_path, class_name):
+    """注册新的识别后端"""
+    RECOGNIZER_BACKENDS[name] = (module_path, class_name)
+
+
+def get_backend_class(name):
+    """按名称导入并返回识别器类"""
+    if name not in RECOGNIZER_BACKENDS:
+        available = ", ".join(sorted(RECOGNIZER_BACKENDS))
+        raise ValueError(f"未知的识别后端: {name}（可选: {available}）")
+    module_path, class_name = RECOGNIZER_BACKENDS[name]
+    module = importlib.import_module(module_path)
+    return getattr(module, class_name)
+
+
+def create_recognizer(name="sensevoice", **kwargs):
+    """创建指定后端的识别器"""
+    return get_backend_class(name)(**kwargs)
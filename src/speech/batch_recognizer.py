@@ -0,0 +1,71 @@
+import asyncio
+from src.speech.speech_recognizer import SpeechRecognizer
+
+STOP_COMMANDS = ("STOP_AND_PROCESS", "STOP")
+
+
+class BatchingRecognizer(SpeechRecognizer):
+    """把并发提交的语音段合并为一次模型调用，再按提交顺序分发识别结果"""
+    def __init__(self, recognizer, max_batch=8, max_wait=0.05):
+        self.recognizer = recognizer  # 被包装的SenseVoiceRecognizer
+        self.max_batch = max_batch  # 每批最多语音段数量
+        self.max_wait = max_wait  # 凑批最长等待时间（秒）
+        self.pending = []  # [(音频, future)]
+        self.batch_task = None
+        self.arrived = None  # 有新语音段加入时置位，凑批时等待它而不是轮询
+        self.stopped = False  # 已检测到停止指令，之后的语音段不再处理
+        self.batch_sizes = []  # 每次模型调用的批大小
+
+    def __getattr__(self, name):
+        # 其余接口（process_final_results等）直接转发给被包装的识别器
+        return getattr(self.recognizer, name)
+
+    async def recognize(self, audio_stream):
+        """提交一段语音，等待所在批次识别完成后返回文本或停止命令"""
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((audio_stream, future))
+        if self.batch_task is None or self.batch_task.done():
+            # 事件与批处理任务在同一个事件循环中创建
+            self.arrived = asyncio.Event()
+            self.batch_task = asyncio.create_task(self._run_batches())
+        self.arrived.set()
+        return await future
+
+    async def _run_batches(self):
+        loop = asyncio.get_running_loop()
+        while self.pending:
+            # 等待更多语音段加入，直到达到批大小或超过等待时间
+            deadline = loop.time() + self.max_wait
+            while len(self.pending) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                self.arrived.clear()
+                try:
+                    await asyncio.wait_for(self.arrived.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            batch = self.pending[:self.max_batch]
+            del self.pending[:self.max_batch]
+            audios = [audio for audio, _ in batch]
+            self.batch_sizes.append(len(batch))
+
+            try:
+                texts = await loop.run_in_executor(
+                    self.recognizer.executor, self.recognizer.transcribe_batch, audios
+                )
+            except Exception as e:
+                print(f"批量语音识别出错: {e}")
+                texts = [""] * len(batch)
+
+            # 按提交顺序处理结果，检测到停止指令后丢弃同批后续语音段
+            for text, (_, future) in zip(texts, batch):
+                if self.stopped:
+                    result = ""
+                else:
+                    result = self.recognizer.handle_text(text)
+                    if result in STOP_COMMANDS:
+                        self.stopped = True
+                if not future.done():
+                    future.set_result(result)
@@ -0,0 +1,110 @@
+from dataclasses import dataclass, field
+
+# 读音相近、容易被识别错的数字：一/七(yi/qi)、六/九(liu/jiu)、零/六(ling/liu)
+CONFUSABLE_DIGITS = [("1", "7"), ("6", "9"), ("0", "6")]
+
+# 替换代价：读音相近的数字代价低
+CONFUSION_COST = 1
+SUBSTITUTION_COST = 2
+DIGITS = "0123456789"
+
+
+def _substitution_costs(pairs):
+    costs = {}
+    for a, b in pairs:
+        costs[(a, b)] = costs[(b, a)] = CONFUSION_COST
+    return costs
+
+
+class NeighborhoodIndex:
+    """预先展开每个有效学号在给定替换代价内的所有变体：变体 -> [(有效学号, 代价)]
+
+    学号后四位长度固定，识别错误表现为个别数字被替换，
+    因此查询只需一次字典查找，不随花名册规模增长。
+    """
+    def __init__(self, values, substitution_costs, max_cost):
+        self.max_cost = max_cost
+        self.neighbors = {}
+        for value in values:
+            self._expand(value, list(value), 0, 0, substitution_costs)
+        for candidates in self.neighbors.values():
+            candidates.sort(key=lambda item: (item[1], item[0]))
+
+    def _expand(self, value, chars, start, cost, substitution_costs):
+        if cost:
+            variant = "".join(chars)
+            best = self.neighbors.setdefault(variant, [])
+            # 同一学号可能由不同替换路径得到，只保留最小代价
+            for i, (candidate, old_cost) in enumerate(best):
+                if candidate == value:
+                    if cost < old_cost:
+                        best[i] = (value, cost)
+                    break
+            else:
+                best.append((value, cost))
+        for pos in range(start, len(chars)):
+            original = chars[pos]
+            for digit in DIGITS:
+                if digit == original:
+                    continue
+                step = substitution_costs.get((original, digit), SUBSTITUTION_COST)
+                if cost + step <= self.max_cost:
+                    chars[pos] = digit
+                    self._expand(value, chars, pos + 1, cost + step, substitution_costs)
+            chars[pos] = original
+
+    def search(self, value):
+        """返回 [(代价, 有效学号)]，按代价升序"""
+        return [(cost, candidate) for candidate, cost in self.neighbors.get(value, [])]
+
+
+@dataclass
+class IdResolution:
+    """学号纠正结果"""
+    recognized: str  # 识别出的学号后四位
+    student_id: str = None  # 纠正后的学号后四位，无法确定时为None
+    confidence: float = 0.0
+    alternatives: list = field(default_factory=list)  # [(候选后四位, 距离)]
+
+    @property
+    def corrected(self):
+        return self.student_id is not None and self.student_id != self.recognized
+
+
+class RosterIdResolver:
+    """用花名册中的有效学号后四位纠正识别错误的学号
+
+    识别结果不在花名册中时，在预先展开的近邻索引中查找读音相近/替换代价最小的学号；
+    只有唯一的最近候选且代价不超过 auto_distance 时才自动纠正，否则只给出候选（不写入成绩）。
+    默认只自动纠正一个读音相近的数字（如1/7），其他数字被替换时可能是另一名不在花名册中的学生。
+    """
+    def __init__(self, valid_ids, confusable_digits=CONFUSABLE_DIGITS,
+                 max_distance=SUBSTITUTION_COST, auto_distance=CONFUSION_COST):
+        self.valid_ids = set(valid_ids)
+        self.max_distance = max_distance
+        self.auto_distance = auto_distance
+        self.index = NeighborhoodIndex(
+            self.valid_ids, _substitution_costs(confusable_digits), max_distance
+        )
+
+    @classmethod
+    def from_excel_processor(cls, excel_processor, **kwargs):
+        """从花名册索引加载有效学号后四位"""
+        index = excel_processor.load_index()
+        return cls(index.suffix_rows.keys(), **kwargs)
+
+    def resolve(self, recognized):
+        """纠正一个学号后四位"""
+        if recognized in self.valid_ids:
+            result = IdResolution(recognized, recognized, 1.0)
+        else:
+            candidates = self.index.search(recognized)
+            result = IdResolution(recognized, alternatives=[(v, d) for d, v in candidates])
+            if candidates:
+                best = candidates[0][0]
+                ties = sum(1 for d, _ in candidates if d == best)
+                # 距离越小、并列候选越少，置信度越高
+                result.confidence = (1 - best / (self.max_distance + 1)) / ties
+                if ties == 1 and best <= self.auto_distance:
+                    result.student_id = candidates[0][1]
+        return result
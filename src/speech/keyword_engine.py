@@ -0,0 +1,138 @@
+import json
+import os
+import re
+from collections import deque
+from dataclasses import dataclass
+
+# 关键词配置文件，可通过环境变量 KEYWORDS_CONFIG 指定其他文件
+DEFAULT_CONFIG = os.environ.get(
+    "KEYWORDS_CONFIG", os.path.join(os.path.dirname(os.path.abspath(__file__)), "keywords.json")
+)
+RUN_CACHE_SIZE = 4096
+
+
+def load_keyword_config(path=None):
+    """读取关键词配置，返回 {类别: [关键词]}，如 {"stop": [...], "cancel": [...], "cue": [...]}"""
+    with open(path or DEFAULT_CONFIG, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    return {kind: [str(w) for w in words if str(w)] for kind, words in config.items()}
+
+
+@dataclass
+class KeywordMatch:
+    """文本中的一个关键词位置"""
+    start: int
+    end: int
+    word: str
+    kind: str
+
+
+class KeywordEngine:
+    """Aho-Corasick 多模式匹配：一遍扫描找出所有类别的关键词及其位置
+
+    构建时把失败链接展开成完整的转移表，扫描时每个字符只做一次字典查找，
+    耗时只与文本长度有关，增加关键词不会让扫描变慢。
+    不属于任何关键词的字符由一个预编译的字符类正则整段跳过。
+    """
+    def __init__(self, keywords):
+        self.keywords = {kind: list(words) for kind, words in keywords.items()}
+        self.kinds = {}  # 关键词 -> 类别
+        for kind, words in self.keywords.items():
+            for word in words:
+                self.kinds[word] = kind
+
+        # 前缀树：goto[状态][字符] -> 状态
+        goto = [{}]
+        outputs = [[]]
+        for word in self.kinds:
+            state = 0
+            for char in word:
+                nxt = goto[state].get(char)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][char] = nxt
+                    goto.append({})
+                    outputs.append([])
+                state = nxt
+            outputs[state].append(word)
+
+        # 按层遍历计算失败链接，并把转移补全为完整的转移表
+        self.alphabet = set("".join(self.kinds))
+        fail = [0] * len(goto)
+        delta = [dict(g) for g in goto]
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            for char in self.alphabet:
+                nxt = goto[state].get(char)
+                if nxt is not None:
+                    fail[nxt] = delta[fail[state]].get(char, 0) if state else 0
+                    queue.append(nxt)
+                else:
+                    target = delta[fail[state]].get(char, 0)
+                    if target:
+                        delta[state][char] = target
+        # 只有关键词中出现过的字符才需要走自动机，其余字符由预编译正则跳过
+        self.run_class = "[" + "".join(re.escape(c) for c in sorted(self.alphabet)) + "]+"
+        self.run_re = re.compile(self.run_class)
+        # 每个状态输出 (关键词长度, 关键词, 类别)，长词在前
+        self.delta = delta
+        self.outputs = [
+            tuple(sorted(((len(w), w, self.kinds[w]) for w in out), reverse=True)) or None
+            for out in outputs
+        ]
+        # 识别文本中的关键词片段高度重复，缓存每个片段的匹配结果
+        self._run_cache = {}
+
+    @classmethod
+    def from_config(cls, path=None):
+        return cls(load_keyword_config(path))
+
+    def match_run(self, run):
+        """在只含关键词字符的片段中找出关键词，重叠时取最靠左、最长的一个
+
+        返回 ((片段内起始位置, 关键词, 类别), ...)
+        """
+        cached = self._run_cache.get(run)
+        if cached is not None:
+            return cached
+        delta = self.delta
+        outputs = self.outputs
+        hits = []
+        state = 0
+        for end, char in enumerate(run, 1):
+            state = delta[state].get(char, 0)
+            out = outputs[state]
+            if out is not None:
+                for length, word, kind in out:
+                    hits.append((end - length, -length, word, kind))
+        hits.sort()
+        matches = []
+        last_end = 0
+        for start, neg_length, word, kind in hits:
+            if start >= last_end:
+                matches.append((start, word, kind))
+                last_end = start - neg_length
+        matches = tuple(matches)
+        if len(self._run_cache) >= RUN_CACHE_SIZE:
+            self._run_cache.clear()
+        self._run_cache[run] = matches
+        return matches
+
+    def find_all(self, text):
+        """一遍扫描找出文本中的所有关键词，返回 [KeywordMatch]"""
+        matches = []
+        for run in self.run_re.finditer(text):
+            offset = run.start()
+            for start, word, kind in self.match_run(run.group()):
+                matches.append(KeywordMatch(offset + start, offset + start + len(word), word, kind))
+        return matches
+
+    def contains(self, text, kind):
+        """文本中是否出现某一类关键词"""
+        for run in self.run_re.findall(text):
+            for _, _, k in self.match_run(run):
+                if k == kind:
+                    return True
+        return False
@@ -0,0 +1,108 @@
+import re
+
+# 逐位读出的数字（学号）
+DIGIT_CHARS = {
+    "零": "0", "〇": "0", "一": "1", "幺": "1", "二": "2", "两": "2", "三": "3",
+    "四": "4", "五": "5", "六": "6", "七": "7", "八": "8", "九": "9",
+}
+_DIGIT_NAMES = "零一二三四五六七八九"
+RUN_CACHE_SIZE = 4096
+
+
+def _compound_forms(n):
+    """0~199 中带“十/百”的读法（超过100的用于识别超范围的成绩）"""
+    if n >= 100:
+        rest = n - 100
+        if rest == 0:
+            return ["一百", "百"]
+        if rest < 10:
+            return ["一百零" + _DIGIT_NAMES[rest]]
+        tens, ones = divmod(rest, 10)
+        return ["一百" + _DIGIT_NAMES[tens] + "十" + (_DIGIT_NAMES[ones] if ones else "")]
+    if n < 10:
+        return []
+    tens, ones = divmod(n, 10)
+    tail = _DIGIT_NAMES[ones] if ones else ""
+    if tens == 1:
+        return ["十" + tail, "一十" + tail]
+    return [_DIGIT_NAMES[tens] + "十" + tail]
+
+
+def _build_table():
+    """预先生成所有成绩读法 -> 数字字符串的查找表（含“点五/半/分半”的半分）"""
+    table = {}
+    for n in range(200):
+        forms = _compound_forms(n)
+        for form in forms:
+            table[form] = str(n)
+            # “分半”不会与后面的数字连读，超过100时也转换，交给解析器报告超出范围
+            table[form + "分半"] = f"{n}.5"
+            if n < 100:
+                table[form + "点五"] = f"{n}.5"
+                table[form + "半"] = f"{n}.5"
+        if n < 10:
+            table[_DIGIT_NAMES[n] + "点五"] = f"{n}.5"
+            table[_DIGIT_NAMES[n] + "分半"] = f"{n}.5"
+    return table
+
+
+class ChineseNumberNormalizer:
+    """把识别文本中的汉字数字转换为阿拉伯数字
+
+    带“十/百”的读法按成绩整体转换（九十五 -> 95，八十五点五/八十五分半 -> 85.5），
+    其余汉字数字逐位转换（一二三四 -> 1234，幺/两 分别视为 1/2）。
+    转换基于预先生成的查找表：预编译正则找出数字片段，片段内沿前缀树做最长匹配。
+    """
+    def __init__(self):
+        self.compound_table = _build_table()
+        # 由查找表构建前缀树，片段内逐字走树即可找到最长匹配
+        self.trie = {}
+        for form, value in self.compound_table.items():
+            node = self.trie
+            for char in form:
+                node = node.setdefault(char, {})
+            node[None] = value
+        # 只找出连续的数字字符片段（成绩后可带“分半”）
+        self.run_pattern = re.compile("[" + "".join(DIGIT_CHARS) + "十百点半]+(?:分半)?")
+        # “一下”“一个”等片段高度重复，缓存每个片段的转换结果
+        self._run_cache = {}
+
+    def _convert_run(self, match):
+        run = match.group()
+        cached = self._run_cache.get(run)
+        if cached is not None:
+            return cached
+        out = []
+        i = 0
+        n = len(run)
+        while i < n:
+            node = self.trie
+            value = None
+            end = i
+            j = i
+            while j < n:
+                node = node.get(run[j])
+                if node is None:
+                    break
+                j += 1
+                if None in node:
+                    value, end = node[None], j
+            if value is not None:
+                # 成绩前后加空格，避免与前面逐位读出的学号连成一个数
+                out.append(" " + value + " ")
+                i = end
+            else:
+                char = run[i]
+                out.append(DIGIT_CHARS.get(char, char))
+                i += 1
+        converted = "".join(out)
+        if len(self._run_cache) >= RUN_CACHE_SIZE:
+            self._run_cache.clear()
+        self._run_cache[run] = converted
+        return converted
+
+    def normalize(self, text):
+        """返回转换后的文本；不含汉字数字时原样返回"""
+        if self.run_pattern.search(text) is None:
+            return text
+        return self.run_pattern.sub(self._convert_run, text)
@@ -0,0 +1,98 @@
+import os
+import time
+import numpy as np
+from src.speech.speech_recognizer import SenseVoiceRecognizer, MIN_SAMPLES
+
+# 已导出的ONNX模型目录（含 model.onnx、tokens.json 等）；modelscope模型名会让funasr_onnx经torch导出，不能使用
+DEFAULT_ONNX_MODEL_DIR = os.environ.get("SENSEVOICE_ONNX_DIR", "models/SenseVoiceSmall-onnx")
+
+
+def quantize_model(model_dir):
+    """用ONNX Runtime对 model.onnx 做INT8动态量化，生成 model_quant.onnx（已存在时跳过）"""
+    source = os.path.join(model_dir, "model.onnx")
+    target = os.path.join(model_dir, "model_quant.onnx")
+    if os.path.exists(target):
+        print(f"使用已量化的模型: {target}")
+        return target
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"找不到ONNX模型: {source}")
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    print(f"正在量化模型: {source} -> {target}")
+    quantize_dynamic(source, target, weight_type=QuantType.QInt8)
+    return target
+
+
+class SenseVoiceOnnxRecognizer(SenseVoiceRecognizer):
+    """基于ONNX Runtime的SenseVoiceSmall，不依赖torch，适合只有CPU的电脑
+
+    model_dir 必须是已导出的ONNX模型目录，找不到时直接报错（不经torch导出）。
+    quantize=True 时使用INT8动态量化模型；intra_op_threads 控制单次推理使用的线程数。
+    端点检测已经把录音切成短句，这里不再加载VAD模型。
+    """
+    def __init__(self, model_dir=DEFAULT_ONNX_MODEL_DIR, device="cpu", lazy=False,
+                 quantize=True, intra_op_threads=4):
+        self.quantize = quantize
+        self.intra_op_threads = intra_op_threads
+        self._padded = {}  # slot -> 复用的补零缓冲区
+        super().__init__(model_dir=model_dir, device=device, lazy=lazy)
+
+    def load(self, warmup=False):
+        """导入funasr_onnx并创建推理会话，重复调用不会重复加载"""
+        with self._load_lock:
+            if self.model is not None:
+                return
+            if not os.path.isdir(self.model_dir):
+                raise FileNotFoundError(
+                    f"找不到ONNX模型目录: {self.model_dir}（需要已导出的SenseVoiceSmall ONNX模型目录，"
+                    f"可用 SENSEVOICE_ONNX_DIR 指定；传入modelscope模型名时funasr_onnx会依赖torch导出）"
+                )
+            started = time.perf_counter()
+            from funasr_onnx import SenseVoiceSmall
+            imported = time.perf_counter()
+
+            if self.quantize:
+                quantize_model(self.model_dir)
+            else:
+                print("未量化: 使用FP32模型 model.onnx")
+            self.model = SenseVoiceSmall(
+                self.model_dir,
+                batch_size=1,
+                quantize=self.quantize,
+                intra_op_num_threads=self.intra_op_threads,
+            )
+            self.load_timings["import"] = imported - started
+            self.load_timings["model_load"] = time.perf_counter() - imported
+        if warmup:
+            self.warmup()
+
+    def _postprocess(self, text):
+        from funasr_onnx.utils.postprocess_utils import rich_transcription_postprocess
+        return rich_transcription_postprocess(text)
+
+    def _prepare_audio(self, audio_stream, slot=0):
+        """转换为一维float32数组，不足1秒的在复用缓冲区中补零"""
+        if audio_stream is None or audio_stream.size == 0:
+            print("警告: 收到空音频流")
+            return None
+        if audio_stream.ndim > 1:
+            audio_stream = audio_stream.squeeze()
+            if audio_stream.ndim > 1:
+                audio_stream = audio_stream.mean(axis=0)
+        audio = np.ascontiguousarray(audio_stream, dtype=np.float32)
+        n = len(audio)
+        if n >= MIN_SAMPLES:
+            return audio
+        buffer = self._padded.get(slot)
+        if buffer is None:
+            buffer = self._padded[slot] = np.zeros(MIN_SAMPLES, dtype=np.float32)
+        buffer[:n] = audio
+        buffer[n:] = 0
+        return buffer
+
+    def _generate(self, audio):
+        return [{"text": text} for text in self.model(audio, language="zh", textnorm="withitn")]
+
+    def _generate_batch(self, audios):
+        # funasr_onnx 的批量接口只接受文件路径，内存中的音频逐段推理
+        return [self._generate(audio)[0] for audio in audios]
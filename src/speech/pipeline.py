@@ -0,0 +1,157 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from src.speech.audio_capture import SAMPLE_RATE
+from src.utils.data_queue import AsyncChannel, ChannelClosed
+
+
+@dataclass
+class PipelineMetrics:
+    """录音/识别流水线的背压指标"""
+    queue_depth: int = 0  # 当前等待识别的语音段数量
+    max_queue_depth: int = 0
+    dropped_chunks: int = 0  # 因识别跟不上被丢弃的语音段数量
+    processed: int = 0
+    audio_seconds: float = 0.0  # 已识别语音段的总时长（秒）
+    last_inference_lag: float = 0.0  # 语音段入队到识别完成的时间（秒）
+    max_inference_lag: float = 0.0
+    total_inference_time: float = 0.0  # 模型推理累计耗时（秒）
+    stop_latency: float = None  # 说完停止指令到识别出停止指令的时间（秒）
+
+    def report(self):
+        """打印指标"""
+        print("\n流水线统计信息:")
+        print("-" * 50)
+        print(f"已识别语音段: {self.processed}")
+        print(f"当前队列长度: {self.queue_depth} (最大 {self.max_queue_depth})")
+        print(f"丢弃语音段: {self.dropped_chunks}")
+        print(f"识别延迟: 最近 {self.last_inference_lag:.2f} 秒, 最大 {self.max_inference_lag:.2f} 秒")
+        if self.processed:
+            print(f"平均每段推理耗时: {self.total_inference_time / self.processed:.2f} 秒")
+        if self.audio_seconds:
+            print(f"实时率(RTF): {self.total_inference_time / self.audio_seconds:.3f}")
+        if self.stop_latency is not None:
+            print(f"停止指令延迟: {self.stop_latency:.2f} 秒")
+        print("-" * 50)
+
+
+class RecognitionPipeline:
+    """生产者/消费者流水线：录音任务持续采集，识别任务在推理线程中处理
+
+    队列中的元素为 (时间, 音频)；流式识别提前得到整句文本时放入 (说出时间, 文本)，直接交给识别器处理。
+    队列满时录音任务等待（背压），实时录音的丢弃发生在 AudioCapture 中；录音结束时关闭队列。
+    """
+    def __init__(self, audio_source, recognizer, capture=None, queue_size=8, streamer=None):
+        self.audio_source = audio_source  # 返回下一段语音的协程函数，结束时返回None
+        self.recognizer = recognizer
+        self.capture = capture
+        self.streamer = streamer  # StreamingDecoder，为None时只做整句识别
+        self.queue = AsyncChannel(capacity=queue_size)
+        self.metrics = PipelineMetrics()
+        self.busy = False
+
+    def is_idle(self):
+        """之前的语音段都已识别完"""
+        return not self.busy and self.queue.qsize() == 0
+
+    def _update_depth(self):
+        self.metrics.queue_depth = self.queue.qsize()
+        self.metrics.max_queue_depth = max(self.metrics.max_queue_depth, self.metrics.queue_depth)
+        self.metrics.dropped_chunks = self.queue.dropped
+        if self.capture is not None:
+            self.metrics.dropped_chunks += self.capture.dropped
+
+    async def _produce(self):
+        """录音任务：不等待识别，持续把语音段放入队列"""
+        while True:
+            audio = await self.audio_source()
+            if audio is None:
+                self.queue.close()
+                return
+            await self.queue.put((time.monotonic(), audio))
+            self._update_depth()
+
+    async def _next_batch(self):
+        """等待至少一段语音，再取出队列中已就绪的语音段（不超过识别器的批大小）
+
+        流式识别放入的文本作为一批的最后一条；录音结束且队列取完时返回None。
+        """
+        max_batch = getattr(self.recognizer, "max_batch", 1)
+        try:
+            return await self.queue.get_many(max_batch, last=lambda item: isinstance(item[1], str))
+        except ChannelClosed:
+            return None
+
+    async def _consume(self):
+        """识别任务：依次识别队列中的语音段，返回停止指令"""
+        while True:
+            batch = await self._next_batch()
+            self._update_depth()
+            if batch is None:
+                return None
+
+            self.busy = True
+            try:
+                texts = await self._recognize_batch(batch)
+            finally:
+                self.busy = False
+            for (queued_at, audio), text in zip(batch, texts):
+                if text in ("STOP_AND_PROCESS", "STOP"):
+                    self._record_stop_latency(queued_at, audio)
+                    return text
+
+    async def _recognize_batch(self, batch):
+        """识别一批语音段；流式识别提前得到的文本（只会在批末尾）直接处理"""
+        audio_items = [item for item in batch if not isinstance(item[1], str)]
+        texts = []
+        if audio_items:
+            started = time.monotonic()
+            # 同时提交整批语音段，批量识别器会合并为一次模型调用
+            texts = list(await asyncio.gather(
+                *(self.recognizer.recognize(audio) for _, audio in audio_items)
+            ))
+            finished = time.monotonic()
+
+            self.metrics.processed += len(audio_items)
+            sample_rate = self.capture.sample_rate if self.capture is not None else SAMPLE_RATE
+            self.metrics.audio_seconds += sum(audio.size for _, audio in audio_items) / sample_rate
+            self.metrics.total_inference_time += finished - started
+            self.metrics.last_inference_lag = finished - audio_items[0][0]
+            self.metrics.max_inference_lag = max(self.metrics.max_inference_lag, self.metrics.last_inference_lag)
+        for _, text in batch[len(audio_items):]:
+            texts.append(self.recognizer.handle_text(text))
+        return texts
+
+    def _record_stop_latency(self, queued_at, audio):
+        detected_at = getattr(self.recognizer, "stop_detected_at", None)
+        if detected_at is None:
+            return
+        if isinstance(audio, str):
+            spoken_at = queued_at  # 流式识别：首次出现停止指令的窗口中说话结束的时间
+        else:
+            # 整句识别：语音段在句尾静音持续 hangover 之后才入队
+            spoken_at = queued_at
+            if self.capture is not None:
+                spoken_at -= self.capture.segmenter.hangover_seconds
+        self.metrics.stop_latency = detected_at - spoken_at
+        if self.streamer is not None:
+            self.streamer.metrics.record_latency("stop", self.metrics.stop_latency)
+
+    async def run(self):
+        """运行流水线直到检测到停止指令或音频输入结束"""
+        tasks = [asyncio.create_task(self._produce())]
+        if self.streamer is not None:
+            tasks.append(asyncio.create_task(self.streamer.run(self)))
+        try:
+            return await self._consume()
+        finally:
+            for task in tasks:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+            self._update_depth()
+            self.metrics.report()
+            if self.streamer is not None:
+                self.streamer.metrics.report()
@@ -0,0 +1,182 @@
+"""常驻本地识别服务：模型只加载一次，多个录入会话共享
+
+启动: python -m src.speech.recognizer_server [--port 8765]
+客户端: python -m src.main --backend remote
+
+接口:
+  GET  /health           服务状态
+  POST /recognize        请求体为16kHz单声道float32小端PCM，返回 {"text": ...}
+  POST /recognize_batch  多段PCM依次拼接，X-Segment-Lengths头给出每段采样数，返回 {"texts": [...]}
+"""
+import argparse
+import json
+import os
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.speech.speech_recognizer import SenseVoiceRecognizer
+
+DEFAULT_URL = os.environ.get("RECOGNIZER_SERVER_URL", "http://127.0.0.1:8765")
+
+
+class RecognizerRequestHandler(BaseHTTPRequestHandler):
+    recognizer = None  # 由serve()设置，所有请求共享同一个已加载的模型
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_pcm(self):
+        import numpy as np
+
+        length = int(self.headers.get("Content-Length", 0))
+        return np.frombuffer(self.rfile.read(length), dtype="<f4")
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "device": self.recognizer.device})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        try:
+            if self.path == "/recognize":
+                audio = self._read_pcm()
+                started = time.perf_counter()
+                # 推理统一提交到识别器的推理线程，多个会话的请求依次执行
+                text = self.recognizer.executor.submit(self.recognizer.transcribe, audio).result()
+                self._send_json(200, {"text": text, "inference_ms": (time.perf_counter() - started) * 1000})
+            elif self.path == "/recognize_batch":
+                audio = self._read_pcm()
+                lengths = [int(n) for n in self.headers.get("X-Segment-Lengths", "").split(",") if n]
+                if sum(lengths) != len(audio):
+                    self._send_json(400, {"error": "X-Segment-Lengths与请求体长度不一致"})
+                    return
+                segments = []
+                offset = 0
+                for n in lengths:
+                    segments.append(audio[offset:offset + n])
+                    offset += n
+                started = time.perf_counter()
+                texts = self.recognizer.executor.submit(self.recognizer.transcribe_batch, segments).result()
+                self._send_json(200, {"texts": texts, "inference_ms": (time.perf_counter() - started) * 1000})
+            else:
+                self._send_json(404, {"error": "not found"})
+        except Exception as e:
+            print(f"处理识别请求出错: {e}")
+            self._send_json(500, {"error": str(e)})
+
+    def log_message(self, format, *args):
+        pass  # 不逐条打印访问日志
+
+
+def serve(host="127.0.0.1", port=8765, model_dir="iic/SenseVoiceSmall", device=None):
+    """加载并预热模型后开始提供识别服务"""
+    recognizer = SenseVoiceRecognizer(model_dir=model_dir, device=device, lazy=True)
+    recognizer.load(warmup=True)
+    print(f"模型加载完成: 导入 {recognizer.load_timings['import']:.1f} 秒, "
+          f"加载 {recognizer.load_timings['model_load']:.1f} 秒, 预热 {recognizer.load_timings['warmup']:.1f} 秒")
+
+    RecognizerRequestHandler.recognizer = recognizer
+    server = ThreadingHTTPServer((host, port), RecognizerRequestHandler)
+    print(f"识别服务已启动: http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n识别服务已停止")
+    finally:
+        server.server_close()
+
+
+class RemoteRecognizer(SenseVoiceRecognizer):
+    """通过本地识别服务识别，不在本进程加载模型"""
+    def __init__(self, url=DEFAULT_URL, timeout=60, lazy=False, **kwargs):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.session = None
+        super().__init__(lazy=True, **kwargs)
+        if not lazy:
+            self.load()
+
+    def load(self, warmup=False):
+        """连接识别服务并检查其状态"""
+        with self._load_lock:
+            if self.session is not None:
+                return
+            import requests
+
+            started = time.perf_counter()
+            session = requests.Session()
+            response = session.get(self.url + "/health", timeout=self.timeout)
+            response.raise_for_status()
+            self.device = response.json().get("device")
+            self.load_timings["connect"] = time.perf_counter() - started
+            self.session = session
+            print(f"已连接识别服务: {self.url} ({self.device})")
+
+    def is_loaded(self):
+        return self.session is not None
+
+    def warmup(self):
+        pass  # 服务端启动时已经预热
+
+    def _to_pcm(self, audio_stream):
+        import numpy as np
+
+        audio = np.asarray(audio_stream, dtype=np.float32)
+        if audio.ndim > 1:
+            audio = audio.squeeze()
+            if audio.ndim > 1:
+                audio = audio.mean(axis=0)
+        return audio.astype("<f4", copy=False)
+
+    def transcribe(self, audio_stream, stage_prefix=""):
+        """把音频发送到识别服务并返回文本"""
+        self.load()
+        if audio_stream is None or audio_stream.size == 0:
+            print("警告: 收到空音频流")
+            return ""
+        with self.stage_timer.stage(stage_prefix + "generate"):
+            response = self.session.post(
+                self.url + "/recognize",
+                data=self._to_pcm(audio_stream).tobytes(),
+                headers={"Content-Type": "application/octet-stream"},
+                timeout=self.timeout,
+            )
+        response.raise_for_status()
+        return response.json()["text"]
+
+    def transcribe_batch(self, audio_streams):
+        """一次请求发送多段音频，由服务端合并为一次模型调用"""
+        import numpy as np
+
+        self.load()
+        segments = [self._to_pcm(audio) for audio in audio_streams]
+        response = self.session.post(
+            self.url + "/recognize_batch",
+            data=np.concatenate(segments).tobytes() if segments else b"",
+            headers={
+                "Content-Type": "application/octet-stream",
+                "X-Segment-Lengths": ",".join(str(len(seg)) for seg in segments),
+            },
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()["texts"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="常驻本地语音识别服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--model-dir", default="iic/SenseVoiceSmall")
+    parser.add_argument("--device", help="默认有GPU时使用cuda:0")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    serve(host=args.host, port=args.port, model_dir=args.model_dir, device=args.device)
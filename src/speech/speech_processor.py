@@ -1,26 +1,19 @@
-import re
 from dataclasses import dataclass
+from src.speech.transcript_parser import TranscriptParser
 
 @dataclass
 class GradeEntry:
     student_id: str
-    grade: int
+    grade: float  # 可能带半分，如85.5
 
 class SpeechProcessor:
     def __init__(self):
-        # 匹配四位数字和成绩的正则表达式
-        self.pattern = r'(\d{4})[^\d]*(\d{1,3})'
+        # 学号后直接跟成绩即可，不要求“得分”等提示词
+        self.parser = TranscriptParser(require_cue=False)
     
     def process_text(self, text: str) -> list[GradeEntry]:
         """处理语音识别文本，提取学号和成绩"""
-        entries = []
-        matches = re.finditer(self.pattern, text)
-        
-        for match in matches:
-            student_id = match.group(1)
-            grade = int(match.group(2))
-            
-            if 0 <= grade <= 100:  # 验证成绩是否在有效范围内
-                entries.append(GradeEntry(student_id, grade))
-                
-        return entries 
\ No newline at end of file
+        return [
+            GradeEntry(student_id, float(grade))
+            for student_id, grade in self.parser.parse_line(text).entries
+        ]
@@ -1,11 +1,64 @@
 from abc import ABC, abstractmethod
-import azure.cognitiveservices.speech as speechsdk
-from funasr import AutoModel
-from funasr.utils.postprocess_utils import rich_transcription_postprocess
-import numpy as np
-import torch
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import logging
+import os
+import threading
+import time
 import json
-import requests
+from src.utils.stage_timer import StageTimer
+from src.speech.transcript_parser import TranscriptParser, CANCELLED_REASON
+
+logger = logging.getLogger(__name__)
+
+MIN_SAMPLES = 16000  # 模型输入至少1秒
+
+# 录音会话使用的解析器：学号和分数之间需要有“得分/分数/成绩”
+_parser = TranscriptParser(require_cue=True)
+
+def parse_recognition_line(text, parser=None):
+    """解析一条识别结果，返回 (有效的(学号后四位, 分数)列表, 无效原因列表, 需要撤销的之前成绩条数)"""
+    parsed = (parser or _parser).parse_line(text)
+    for resolution in parsed.corrections:
+        print(f"学号纠正: {resolution.recognized} -> {resolution.student_id} (置信度 {resolution.confidence:.2f})")
+    return parsed.entries, parsed.reasons, parsed.cancel_previous
+
+def parse_recognition_results(recognition_results, parser=None):
+    """手动解析识别结果列表，返回 {学号后四位: 分数}，无有效结果时返回None"""
+    try:
+        corrections = []
+        result_dict, invalid_lines = (parser or _parser).parse_lines(recognition_results, corrections)
+        for resolution in corrections:
+            print(f"学号纠正: {resolution.recognized} -> {resolution.student_id} (置信度 {resolution.confidence:.2f})")
+        
+        # 打印处理结果
+        print("\n解析结果:")
+        print("-" * 50)
+        if result_dict:
+            print("有效数据:")
+            for student_id, score in result_dict.items():
+                print(f"学号: {student_id}, 分数: {score}")
+        
+        if invalid_lines:
+            print("\n以下行被忽略:")
+            for idx, text, reason in invalid_lines:
+                print(f"第 {idx} 行: {text}")
+                print(f"原因: {reason}")
+                if reason.startswith(CANCELLED_REASON):
+                    print("(用户主动作废)")
+        print("-" * 50)
+        
+        if result_dict:
+            return result_dict
+        else:
+            print("没有找到任何有效的学号和分数对")
+            return None
+        
+    except Exception as e:
+        print(f"手动解析失败: {e}")
+        import traceback
+        print("错误堆栈:", traceback.format_exc())
+        return None
 
 class SpeechRecognizer(ABC):
     @abstractmethod
@@ -13,21 +66,80 @@ class SpeechRecognizer(ABC):
         pass
 
 class SenseVoiceRecognizer(SpeechRecognizer):
-    def __init__(self, model_dir="iic/SenseVoiceSmall"):
-        self.model = AutoModel(
-            model=model_dir,
-            trust_remote_code=True,
-            vad_model="fsmn-vad",
-            vad_kwargs={"max_single_segment_time": 30000},
-            device="cuda:0" if torch.cuda.is_available() else "cpu"
-        )
+    def __init__(self, model_dir="iic/SenseVoiceSmall", device=None, lazy=False):
+        self.model_dir = model_dir
+        self.device = device
+        self.model = None
         self.recognition_results = []  # 存储所有识别结果
+        self.text_callbacks = []  # 每句识别结果的回调，如实时提交成绩
+        self.parser = _parser  # 可替换为带花名册纠错的解析器
+        self.stop_detected_at = None  # 识别出停止指令的时间，用于统计延迟
+        self.input_buffers = None  # 模型加载后按设备创建的复用输入缓冲区
+        self.stage_timer = StageTimer()  # 每段音频各阶段耗时
+        # 推理放在专用线程中执行，避免阻塞事件循环和录音
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sensevoice")
+        self._load_lock = threading.Lock()
+        self._load_future = None
+        self.load_timings = {}  # 各启动阶段耗时（秒）
         self.ollama_url = "http://192.168.31.70:11434/"  # Ollama API地址
+        if not lazy:
+            self.load()
+        
+    def load(self, warmup=False):
+        """导入funasr/torch并构建模型，重复调用不会重复加载"""
+        with self._load_lock:
+            if self.model is not None:
+                return
+            started = time.perf_counter()
+            import torch
+            from funasr import AutoModel
+            imported = time.perf_counter()
+            
+            self.device = self.device or ("cuda:0" if torch.cuda.is_available() else "cpu")
+            self.input_buffers = InputBuffers(self.device)
+            self.model = AutoModel(
+                model=self.model_dir,
+                trust_remote_code=True,
+                vad_model="fsmn-vad",
+                vad_kwargs={"max_single_segment_time": 30000},
+                device=self.device
+            )
+            self.load_timings["import"] = imported - started
+            self.load_timings["model_load"] = time.perf_counter() - imported
+        if warmup:
+            self.warmup()
+    
+    def is_loaded(self):
+        """模型是否已加载"""
+        return self.model is not None
+    
+    def load_async(self, warmup=True):
+        """在推理线程中后台加载模型，之后的识别请求会排在加载之后"""
+        if self._load_future is None:
+            self._load_future = self.executor.submit(self.load, warmup)
+        return self._load_future
+    
+    def wait_until_loaded(self):
+        """等待后台加载完成，加载失败时抛出原异常"""
+        if self._load_future is not None:
+            self._load_future.result()
+        else:
+            self.load()
+    
+    def warmup(self):
+        """用一段低噪声跑一次推理，让首次真实识别不再承担初始化开销"""
+        import numpy as np
+        
+        started = time.perf_counter()
+        noise = np.random.default_rng(0).normal(0, 0.01, 16000).astype(np.float32)
+        # 预热（含首次JIT）不计入会话的阶段耗时分布
+        with self.stage_timer.suspended():
+            self.transcribe(noise)
+        self.load_timings["warmup"] = time.perf_counter() - started
         
     def should_stop(self, text):
         """检查是否包含停止指令"""
-        stop_words = ["结束", "完毕", "停止"]
-        return any(word in text for word in stop_words)
+        return self.parser.keywords.contains(text, "stop")
     
     async def process_final_results(self):
         """处理最终的识别结果"""
@@ -65,75 +177,8 @@ class SenseVoiceRecognizer(SpeechRecognizer):
 
     def _manual_parse_results(self):
         """手动解析识别结果"""
-        try:
-            result_dict = {}
-            invalid_lines = []  # 记录无效的行
-            
-            # 定义作废关键词
-            cancel_words = ["不对", "删除", "错", "作废", "取消", "重说"]
-            
-            for idx, text in enumerate(self.recognition_results, 1):
-                # 首先检查是否包含作废关键词
-                if any(word in text for word in cancel_words):
-                    invalid_lines.append((idx, text, "用户表示需要作废此条记录"))
-                    continue
-                
-                # 使用正则表达式提取学号和分数
-                import re
-                # 匹配四位数字（学号）和分数
-                matches = re.findall(r'(\d{4}).*?(?:得分|分数|成绩)[：:]*(\d+)', text)
-                
-                if not matches:
-                    invalid_lines.append((idx, text, "未找到有效的学号和分数"))
-                    continue
-                
-                valid_pair_found = False
-                for student_id, score in matches:
-                    # 验证学号和分数的有效性
-                    if len(student_id) == 4 and student_id.isdigit():
-                        try:
-                            score_int = int(score)
-                            if 0 <= score_int <= 100:  # 确保分数在有效范围内
-                                result_dict[str(student_id)] = str(score_int)
-                                valid_pair_found = True
-                            else:
-                                invalid_lines.append((idx, text, f"分数 {score_int} 超出有效范围(0-100)"))
-                        except ValueError:
-                            invalid_lines.append((idx, text, f"分数 {score} 不是有效数字"))
-                    else:
-                        invalid_lines.append((idx, text, f"学号 {student_id} 不是有效的四位数字"))
-                
-                if not valid_pair_found and (idx, text) not in [x[:2] for x in invalid_lines]:
-                    invalid_lines.append((idx, text, "未找到有效的学号和分数对"))
-            
-            # 打印处理结果
-            print("\n解析结果:")
-            print("-" * 50)
-            if result_dict:
-                print("有效数据:")
-                for student_id, score in result_dict.items():
-                    print(f"学号: {student_id}, 分数: {score}")
-            
-            if invalid_lines:
-                print("\n以下行被忽略:")
-                for idx, text, reason in invalid_lines:
-                    print(f"第 {idx} 行: {text}")
-                    print(f"原因: {reason}")
-                    if any(word in text for word in cancel_words):
-                        print("(用户主动作废)")
-            print("-" * 50)
-            
-            if result_dict:
-                return result_dict
-            else:
-                print("没有找到任何有效的学号和分数对")
-                return None
-            
-        except Exception as e:
-            print(f"手动解析失败: {e}")
-            import traceback
-            print("错误堆栈:", traceback.format_exc())
-            return None
+        with self.stage_timer.stage("parse"):
+            return parse_recognition_results(self.recognition_results, self.parser)
     
     async def recognize(self, audio_stream):
         """使用SenseVoice进行语音识别，增加错误处理"""
@@ -142,76 +187,10 @@ class SenseVoiceRecognizer(SpeechRecognizer):
                 print("警告: 收到空音频流")
                 return ""
             
-            # 确保音频数据是一维的
-            if len(audio_stream.shape) > 1:
-                audio_stream = audio_stream.squeeze()  # 移除所有维度为1的维度
-                if len(audio_stream.shape) > 1:  # 如果还是多维，则取平均
-                    audio_stream = audio_stream.mean(axis=0)
-            
-            # 打印调试信息
-            print(f"音频数据形状(numpy): {audio_stream.shape}")
-            
-            # 转换为PyTorch张量
-            audio_tensor = torch.from_numpy(audio_stream).float()
-            
-            # 确保音频长度足够
-            min_length = 16000  # 至少1秒
-            if len(audio_tensor) < min_length:
-                audio_tensor = torch.nn.functional.pad(
-                    audio_tensor, 
-                    (0, min_length - len(audio_tensor))
-                )
-            
-            # 移动到正确的设备
-            if torch.cuda.is_available():
-                audio_tensor = audio_tensor.cuda()
-            
-            # 打印调试信息
-            print(f"音频张量形状(torch): {audio_tensor.shape}")
-            print(f"音频范围: [{audio_tensor.min():.3f}, {audio_tensor.max():.3f}]")
-            print(f"音频设备: {audio_tensor.device}")
-            print(f"音频维度: {audio_tensor.dim()}")
-            
-            # 调用模型
-            res = self.model.generate(
-                input=audio_tensor,  # 一维音频数据
-                input_len=torch.tensor([len(audio_tensor)], device=audio_tensor.device),
-                cache={},
-                language="zh",
-                use_itn=True,
-                batch_size_s=60,
-                merge_vad=True,
-                merge_length_s=15,
-            )
-            
-            if not res or len(res) == 0:
-                print("警告: 识别结果为空")
-                return ""
-            
-            text = rich_transcription_postprocess(res[0]["text"])
-            print(f"识别结果: {text}")
-            
-            # 将结果添加到列表中
-            if text.strip():  # 如果不是空字符串
-                self.recognition_results.append(text)
-            
-            # 检查是否需要停止
-            if self.should_stop(text):
-                print("\n检测到停止指令")
-                # 首先打印当前所有识别结果
-                print("\n当前所有识别结果:")
-                print("-" * 50)
-                for idx, result in enumerate(self.recognition_results, 1):
-                    print(f"{idx}. {result}")
-                print("-" * 50)
-                
-                user_input = input("\n是否将语音结果整理为表格？(y/n): ")
-                if user_input.lower().startswith('y'):
-                    return "STOP_AND_PROCESS"
-                else:
-                    return "STOP"
-            
-            return text
+            # 在推理线程中预处理并调用模型
+            loop = asyncio.get_running_loop()
+            text = await loop.run_in_executor(self.executor, self.transcribe, audio_stream)
+            return self.handle_text(text)
             
         except Exception as e:
             print(f"语音识别出错: {e}")
@@ -220,20 +199,244 @@ class SenseVoiceRecognizer(SpeechRecognizer):
             print(f"错误堆栈: {traceback.format_exc()}")
             return ""
 
-class AzureSpeechRecognizer(SpeechRecognizer):
-    def __init__(self, subscription_key, region):
-        self.speech_config = speechsdk.SpeechConfig(
-            subscription=subscription_key, 
-            region=region
-        )
+    def transcribe(self, audio_stream, stage_prefix=""):
+        """同步识别一段音频并返回文本，不记录结果也不检查停止指令
+
+        stage_prefix 加在阶段名前（如流式部分解码用 "partial_"），与整句识别的耗时分开统计。
+        """
+        self.load()
+        timer = self.stage_timer
+        with timer.stage(stage_prefix + "prepare"):
+            audio_tensor = self._prepare_audio(audio_stream)
+        if audio_tensor is None:
+            return ""
+        with timer.stage(stage_prefix + "generate"):
+            res = self._generate(audio_tensor)
+        if not res:
+            print("警告: 识别结果为空")
+            return ""
+        with timer.stage(stage_prefix + "postprocess"):
+            return self._postprocess(res[0]["text"])
+
+    def transcribe_batch(self, audio_streams):
+        """一次模型调用识别多段音频，按输入顺序返回文本"""
+        self.load()
+        timer = self.stage_timer
+        with timer.stage("prepare"):
+            tensors = [self._prepare_audio(audio, slot) for slot, audio in enumerate(audio_streams)]
+        valid = [i for i, tensor in enumerate(tensors) if tensor is not None]
+        texts = [""] * len(tensors)
+        if not valid:
+            return texts
+        with timer.stage("generate"):
+            res = self._generate_batch([tensors[i] for i in valid])
+        with timer.stage("postprocess"):
+            for i, item in zip(valid, res):
+                texts[i] = self._postprocess(item["text"])
+        return texts
+
+    def handle_text(self, text):
+        """记录识别结果并检查停止指令，返回文本或停止命令"""
+        print(f"识别结果: {text}")
         
-    async def recognize(self, audio_stream):
-        try:
-            speech_recognizer = speechsdk.SpeechRecognizer(
-                speech_config=self.speech_config
+        # 将结果添加到列表中
+        if text.strip():  # 如果不是空字符串
+            self.recognition_results.append(text)
+            for callback in self.text_callbacks:
+                try:
+                    callback(text)
+                except Exception as e:
+                    print(f"处理识别结果回调出错: {e}")
+        
+        # 检查是否需要停止
+        if self.should_stop(text):
+            self.stop_detected_at = time.monotonic()
+            print("\n检测到停止指令")
+            # 首先打印当前所有识别结果
+            print("\n当前所有识别结果:")
+            print("-" * 50)
+            for idx, result in enumerate(self.recognition_results, 1):
+                print(f"{idx}. {result}")
+            print("-" * 50)
+            
+            user_input = input("\n是否将语音结果整理为表格？(y/n): ")
+            if user_input.lower().startswith('y'):
+                return "STOP_AND_PROCESS"
+            else:
+                return "STOP"
+        
+        return text
+
+    def _postprocess(self, text):
+        """去除SenseVoice输出中的语言/情感等标记"""
+        from funasr.utils.postprocess_utils import rich_transcription_postprocess
+        return rich_transcription_postprocess(text)
+
+    def _prepare_audio(self, audio_stream, slot=0):
+        """把录音数据转换为模型输入的一维float32张量，空音频返回None
+
+        足够长的CPU音频直接共享内存，不复制；短音频补零和CUDA传输使用复用的缓冲区。
+        同一批中的每段音频使用不同的 slot。
+        """
+        if audio_stream is None or audio_stream.size == 0:
+            print("警告: 收到空音频流")
+            return None
+        
+        # 确保音频数据是一维的
+        if audio_stream.ndim > 1:
+            audio_stream = audio_stream.squeeze()  # 移除所有维度为1的维度
+            if audio_stream.ndim > 1:  # 如果还是多维，则取平均
+                audio_stream = audio_stream.mean(axis=0)
+        
+        audio_tensor = self.input_buffers.tensor(audio_stream, slot)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "音频张量: 形状 %s, 范围 [%.3f, %.3f], 设备 %s",
+                tuple(audio_tensor.shape), audio_tensor.min(), audio_tensor.max(), audio_tensor.device,
             )
-            result = await speech_recognizer.recognize_once_async()
-            return result.text if result.text else ""
-        except Exception as e:
-            print(f"Azure语音识别出错: {e}")
-            return ""
\ No newline at end of file
+        return audio_tensor
+
+    def _generate(self, audio_tensor):
+        """调用模型（在推理线程中执行）"""
+        import torch
+        return self.model.generate(
+            input=audio_tensor,  # 一维音频数据
+            input_len=torch.tensor([len(audio_tensor)], device=audio_tensor.device),
+            cache={},
+            language="zh",
+            use_itn=True,
+            batch_size_s=60,
+            merge_vad=True,
+            merge_length_s=15,
+        )
+
+    def _generate_batch(self, audio_tensors):
+        """一次调用模型识别多段音频，结果顺序与输入一致"""
+        return self.model.generate(
+            input=list(audio_tensors),
+            cache={},
+            language="zh",
+            use_itn=True,
+            batch_size_s=60,
+            merge_vad=True,
+            merge_length_s=15,
+        )
+
+class InputBuffers:
+    """推理线程复用的float32输入缓冲区，按需扩容，避免每段音频都分配新张量
+
+    CPU上只有不足 min_samples 的音频需要复制到缓冲区补零；
+    CUDA上音频先写入锁页内存，再异步复制到预先分配的显存缓冲区。
+    """
+    def __init__(self, device="cpu", min_samples=MIN_SAMPLES):
+        self.device = device
+        self.cuda = str(device).startswith("cuda")
+        self.min_samples = min_samples
+        self.host = {}  # slot -> (torch张量, 共享内存的numpy数组)
+        self.device_buffers = {}  # slot -> 显存张量
+
+    @staticmethod
+    def _capacity(size):
+        # 按2的幂扩容，长度变化时不会频繁重新分配
+        return 1 << max(size - 1, 1).bit_length()
+
+    def _host_buffer(self, slot, size):
+        import torch
+
+        buffer = self.host.get(slot)
+        if buffer is None or len(buffer[1]) < size:
+            tensor = torch.empty(self._capacity(size), dtype=torch.float32, pin_memory=self.cuda)
+            buffer = self.host[slot] = (tensor, tensor.numpy())
+        return buffer
+
+    def _device_buffer(self, slot, size):
+        import torch
+
+        buffer = self.device_buffers.get(slot)
+        if buffer is None or len(buffer) < size:
+            buffer = self.device_buffers[slot] = torch.empty(
+                self._capacity(size), dtype=torch.float32, device=self.device
+            )
+        return buffer
+
+    def tensor(self, audio, slot=0):
+        """返回音频对应的模型输入张量（张量在下一次使用同一slot前有效）"""
+        import numpy as np
+        import torch
+
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        n = len(audio)
+        if n >= self.min_samples and not self.cuda:
+            return torch.from_numpy(audio)
+
+        size = max(n, self.min_samples)
+        host_tensor, host = self._host_buffer(slot, size)
+        host[:n] = audio
+        host[n:size] = 0
+        if not self.cuda:
+            return host_tensor[:size]
+        device_tensor = self._device_buffer(slot, size)[:size]
+        device_tensor.copy_(host_tensor[:size], non_blocking=True)
+        return device_tensor
+
+class AzureSpeechRecognizer(SenseVoiceRecognizer):
+    """Azure语音服务识别，不在本进程加载模型；密钥和区域默认读取环境变量
+    AZURE_SPEECH_KEY / AZURE_SPEECH_REGION"""
+    def __init__(self, subscription_key=None, region=None, language="zh-CN", lazy=False, **kwargs):
+        self.subscription_key = subscription_key or os.environ.get("AZURE_SPEECH_KEY")
+        self.region = region or os.environ.get("AZURE_SPEECH_REGION")
+        self.language = language
+        self.speechsdk = None
+        self.speech_config = None
+        super().__init__(lazy=True, **kwargs)
+        if not lazy:
+            self.load()
+
+    def load(self, warmup=False):
+        """导入Azure SDK并创建识别配置"""
+        with self._load_lock:
+            if self.speech_config is not None:
+                return
+            if not self.subscription_key or not self.region:
+                raise ValueError("使用Azure后端需要设置 AZURE_SPEECH_KEY 和 AZURE_SPEECH_REGION")
+            started = time.perf_counter()
+            import azure.cognitiveservices.speech as speechsdk
+
+            self.speechsdk = speechsdk
+            speech_config = speechsdk.SpeechConfig(subscription=self.subscription_key, region=self.region)
+            speech_config.speech_recognition_language = self.language
+            self.speech_config = speech_config
+            self.load_timings["import"] = time.perf_counter() - started
+
+    def is_loaded(self):
+        return self.speech_config is not None
+
+    def warmup(self):
+        pass  # 云端识别没有本地模型需要预热
+
+    def transcribe(self, audio_stream, stage_prefix=""):
+        """把录音写入推送流交给Azure识别（阻塞调用，在推理线程中执行）"""
+        import numpy as np
+
+        self.load()
+        if audio_stream is None or audio_stream.size == 0:
+            print("警告: 收到空音频流")
+            return ""
+        with self.stage_timer.stage(stage_prefix + "generate"):
+            audio = np.asarray(audio_stream, dtype=np.float32).reshape(-1)
+            pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2")
+            stream = self.speechsdk.audio.PushAudioInputStream(
+                self.speechsdk.audio.AudioStreamFormat(samples_per_second=16000, bits_per_sample=16, channels=1)
+            )
+            stream.write(pcm.tobytes())
+            stream.close()
+            speech_recognizer = self.speechsdk.SpeechRecognizer(
+                speech_config=self.speech_config,
+                audio_config=self.speechsdk.audio.AudioConfig(stream=stream),
+            )
+            result = speech_recognizer.recognize_once()
+        return result.text if result.text else ""
+
+    def transcribe_batch(self, audio_streams):
+        """Azure每次请求识别一段，按顺序逐段识别"""
+        return [self.transcribe(audio) for audio in audio_streams]
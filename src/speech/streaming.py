@@ -0,0 +1,176 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from src.speech.audio_capture import normalize_peak
+from src.utils.data_queue import ChannelClosed
+
+
+@dataclass
+class StreamingMetrics:
+    """流式识别统计：部分结果数量、解码耗时和关键词从说出到执行的延迟"""
+    partials: int = 0
+    total_decode_time: float = 0.0
+    keyword_latencies: dict = field(default_factory=dict)  # 类别 -> [秒]
+
+    def record_latency(self, kind, seconds):
+        self.keyword_latencies.setdefault(kind, []).append(seconds)
+
+    def report(self):
+        """打印指标"""
+        print("\n流式识别统计信息:")
+        print("-" * 50)
+        print(f"部分识别结果: {self.partials} 次")
+        if self.partials:
+            print(f"平均每次解码耗时: {self.total_decode_time / self.partials:.3f} 秒")
+        for kind, latencies in self.keyword_latencies.items():
+            print(f"{kind} 指令延迟: 平均 {sum(latencies) / len(latencies):.2f} 秒, 最大 {max(latencies):.2f} 秒")
+        print("-" * 50)
+
+
+class KeywordStabilizer:
+    """连续 stable_count 次部分结果都包含同一类关键词时才认为该关键词已稳定
+
+    说话人已经停顿（settled=True）时窗口覆盖了整句话，后续结果不会再变，出现一次即稳定。
+    每句话中每类关键词只触发一次；返回首次出现该关键词时的说话结束时间，用于计算延迟。
+    """
+    def __init__(self, keywords, kinds=("stop", "cancel"), stable_count=2):
+        self.keywords = keywords  # KeywordEngine
+        self.kinds = kinds
+        self.stable_count = stable_count
+        self.reset()
+
+    def reset(self):
+        self.counts = {}
+        self.first_seen = {}
+        self.fired = set()
+
+    def update(self, text, stamp, settled=False):
+        """输入一次部分结果，返回本次新稳定的 [(类别, 首次出现时间)]"""
+        present = {kind for kind in self.kinds if kind not in self.fired and self.keywords.contains(text, kind)}
+        stable = []
+        for kind in self.kinds:
+            if kind not in present:
+                self.counts.pop(kind, None)
+                self.first_seen.pop(kind, None)
+                continue
+            self.counts[kind] = self.counts.get(kind, 0) + 1
+            self.first_seen.setdefault(kind, stamp)
+            if settled or self.counts[kind] >= self.stable_count:
+                self.fired.add(kind)
+                stable.append((kind, self.first_seen[kind]))
+        return stable
+
+
+class StreamingDecoder:
+    """在说话过程中按固定步长解码正在进行的语音段，输出部分结果并提前检测停止/作废指令
+
+    每隔 hop_s 秒取当前语音段最近 window_s 秒（相邻窗口互相重叠）交给识别器的推理线程解码。
+    句尾静音达到 settle_s 后在整句上再解码一次（期间暂缓端点检测输出这句话），
+    此时的结果即整句文本，不必等 hangover 结束再做整句识别。
+    停止指令稳定后直接把这句话的文本交给识别流水线，端点检测不再输出这句话；
+    作废指令稳定且之前的语音都已识别完时，立即通知 keyword_callbacks。
+    """
+    def __init__(self, recognizer, capture, window_s=4.0, hop_s=0.5, settle_s=0.15, stable_count=2):
+        self.recognizer = recognizer
+        self.capture = capture
+        self.segmenter = capture.segmenter
+        self.sample_rate = capture.sample_rate
+        self.window = int(window_s * capture.sample_rate)
+        self.hop = int(hop_s * capture.sample_rate)
+        self.settle = int(settle_s * capture.sample_rate)
+        self.hop_s = hop_s
+        self.poll_s = min(hop_s, settle_s) / 2
+        self.stabilizer = KeywordStabilizer(recognizer.parser.keywords, stable_count=stable_count)
+        self.keyword_callbacks = []  # callback(类别, 部分结果文本)
+        self.metrics = StreamingMetrics()
+        self._utterance = None  # 当前语音段的起始序号
+        self._decoded_end = 0
+        self._decoded_voiced_end = 0
+        self._settled_decoded = False
+        self._last_partial = ""
+
+    async def _decode(self, audio, stage_prefix=""):
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        text = await loop.run_in_executor(self.recognizer.executor, self.recognizer.transcribe, audio, stage_prefix)
+        self.metrics.total_decode_time += time.monotonic() - started
+        return text
+
+    async def run(self, pipeline):
+        """持续解码直到检测到停止指令；停止时把 (说话结束时间, 文本) 放入流水线队列"""
+        while True:
+            await asyncio.sleep(self.poll_s)
+            # 先只读取位置，确定需要解码时再复制音频
+            bounds = self.segmenter.current_speech()
+            if bounds is None:
+                self._utterance = None
+                continue
+            start, end, voiced_end = bounds
+            if start != self._utterance:
+                self._utterance = start
+                self._decoded_end = 0
+                self._decoded_voiced_end = 0
+                self._settled_decoded = False
+                self._last_partial = ""
+                self.stabilizer.reset()
+
+            settled = end - voiced_end >= self.settle
+            if settled:
+                # 停顿后只需在整句上解码一次
+                if self._settled_decoded or not self.segmenter.hold(start):
+                    continue
+                self._settled_decoded = True
+            elif end - self._decoded_end < self.hop:
+                continue
+            else:
+                self._settled_decoded = False
+
+            try:
+                if await self._process(pipeline, start, end, voiced_end, settled):
+                    return
+            finally:
+                if settled:
+                    self.segmenter.release()
+
+    def _read(self, start, end, max_samples=None):
+        """复制要解码的音频并原地归一化"""
+        return normalize_peak(self.segmenter.read_speech(start, end, max_samples))
+
+    async def _process(self, pipeline, start, end, voiced_end, settled):
+        """解码一次并检查关键词，检测到停止指令时返回True"""
+        # 窗口内最后一个有声采样的到达时间，即说话结束的时间
+        spoken_at = self.capture.last_block_time - (end - voiced_end) / self.sample_rate
+        whole = end - (start - self.segmenter.preroll) <= self.window
+        if settled and whole and self._decoded_voiced_end == voiced_end and self._decoded_end > voiced_end:
+            # 上一次解码时已经说完，结果就是整句文本
+            text = self._last_partial
+        else:
+            # 整句不超过一个窗口时窗口就是整句；部分解码的各阶段耗时单独统计
+            text = await self._decode(self._read(start, end, self.window), "partial_")
+            self._decoded_end = end
+            self._decoded_voiced_end = voiced_end
+            self.metrics.partials += 1
+            if text != self._last_partial:
+                print(f"[实时] {text}")
+                self._last_partial = text
+
+        for kind, first_spoken_at in self.stabilizer.update(text, spoken_at, settled):
+            if kind == "stop":
+                # 整句超过一个窗口时补一次整句识别
+                if not whole:
+                    text = await self._decode(self._read(start, end))
+                self.segmenter.discard_current()
+                try:
+                    await pipeline.queue.put((first_spoken_at, text))
+                except ChannelClosed:
+                    pass  # 录音已经结束，流水线不再接收
+                return True
+            if pipeline.is_idle():
+                # 之前的语音都已识别完，作废的对象是确定的
+                self.metrics.record_latency(kind, time.monotonic() - first_spoken_at)
+                for callback in self.keyword_callbacks:
+                    try:
+                        callback(kind, text)
+                    except Exception as e:
+                        print(f"处理实时关键词回调出错: {e}")
+        return False
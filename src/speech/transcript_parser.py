@@ -0,0 +1,157 @@
+import re
+from dataclasses import dataclass, field
+from src.speech.keyword_engine import KeywordEngine
+from src.speech.number_normalizer import ChineseNumberNormalizer
+
+CANCELLED_REASON = "用户表示需要作废此条记录"
+_WORD_OR_DIGIT = re.compile(r"[^\W_]")  # 汉字、字母和数字；空白和标点视为词边界
+
+
+@dataclass
+class ParsedLine:
+    """一条识别结果的解析结果"""
+    entries: list = field(default_factory=list)  # [(学号后四位, 分数字符串)]
+    reasons: list = field(default_factory=list)  # 无效原因
+    cancelled: bool = False  # 包含作废关键词
+    cancel_previous: int = 0  # 本句开头的作废词个数，需要撤销之前句子中的成绩
+    stop: bool = False  # 包含停止关键词
+    corrections: list = field(default_factory=list)  # 按花名册纠正的学号 [IdResolution]
+
+
+class TranscriptParser:
+    """单遍扫描的识别文本解析器
+
+    解析前先把汉字数字转换为阿拉伯数字，再用 Aho-Corasick 关键词引擎一遍找出
+    提示词、作废词和停止词的位置，与数字按位置合并后顺序处理。
+    4位及以上的整数视为学号（取后四位），1~3位的数（可带小数，如85.5）视为分数。
+    require_cue=True 时学号和分数之间必须有“得分/分数/成绩”。
+    作废词只作废它前面最近的一条记录（如“1234 95 不对 1234 96”只保留96）；
+    单独出现在句首（前后紧挨的只有数字、标点或其他关键词）时作废上一句的最后一条记录，
+    由调用方根据 cancel_previous 处理。
+    提供 resolver（RosterIdResolver）时，不在花名册中的学号会被纠正为最接近的有效学号。
+    关键词默认从 keywords.json 读取，也可直接传入 KeywordEngine。
+    """
+    def __init__(self, require_cue=True, keywords=None, normalizer=None, resolver=None):
+        self.require_cue = require_cue
+        self.resolver = resolver
+        self.normalizer = normalizer or ChineseNumberNormalizer()
+        self.keywords = keywords or KeywordEngine.from_config()
+        # 一个正则按顺序切出数字和只含关键词字符的片段，片段再交给关键词引擎
+        # “85分半”按85.5处理（汉字读法的“分半”由 normalizer 转换）
+        self.token_re = re.compile(r"\d+(?:\.\d+|分半)?|" + self.keywords.run_class)
+
+    def tokens(self, text):
+        """返回按出现顺序排列的记号 [(记号, 类别)]，数字的类别为None"""
+        tokens = []
+        match_run = self.keywords.match_run
+        for piece in self.token_re.findall(self.normalizer.normalize(text)):
+            if piece[0].isdigit():
+                tokens.append((piece, None))
+            else:
+                for _, word, kind in match_run(piece):
+                    tokens.append((word, kind))
+        return tokens
+
+    def parse_line(self, text):
+        """解析一条识别结果"""
+        result = ParsedLine()
+        pending_id = None
+        cue_seen = False
+        match_run = self.keywords.match_run
+        text = self.normalizer.normalize(text)
+
+        # 直接遍历切出的片段，不为每行构建记号列表
+        for piece in self.token_re.findall(text):
+            if piece[0].isdigit():
+                if len(piece) >= 4 and piece.isdigit():
+                    pending_id = piece[-4:]
+                    cue_seen = False
+                elif pending_id is not None and (cue_seen or not self.require_cue):
+                    score = float(piece[:-2]) + 0.5 if piece[-1] == "半" else float(piece)
+                    if 0 <= score <= 100:  # 确保分数在有效范围内
+                        student_id = self._resolve_id(pending_id, result)
+                        if student_id is not None:
+                            result.entries.append((student_id, f"{score:g}"))
+                    else:
+                        result.reasons.append(f"分数 {score:g} 超出有效范围(0-100)")
+                    pending_id = None
+                    cue_seen = False
+                continue
+            for _, word, kind in match_run(piece):
+                if kind == "cue":
+                    cue_seen = pending_id is not None
+                elif kind == "cancel":
+                    result.cancelled = True
+                    if pending_id is not None:
+                        # 学号还没说完分数就作废
+                        pending_id = None
+                        cue_seen = False
+                    elif result.entries:
+                        student_id, score = result.entries.pop()
+                        result.reasons.append(f"{CANCELLED_REASON}: 学号 {student_id} 分数 {score}")
+                else:
+                    result.stop = True
+        if result.cancelled:
+            result.cancel_previous = self._leading_undos(text)
+
+        if not result.entries and not result.reasons and not result.cancelled:
+            result.reasons.append("未找到有效的学号和分数")
+        return result
+
+    def _leading_undos(self, text):
+        """句首单独说出的作废词个数，这些作废词撤销上一句的成绩
+
+        作废词前面不能有其他文字或数字，与后面的数字或关键词之间也不能有其他文字，
+        避免“不对劲”“删除线”等话语误删成绩。
+        """
+        undos = 0
+        end = 0
+        pending = False  # 上一个作废词还要看后面紧跟的内容
+        for match in self.keywords.find_all(text):
+            gap = _WORD_OR_DIGIT.search(text, end, match.start)
+            if pending and (gap is None or gap.group().isdigit()):
+                undos += 1
+            if gap is not None or match.kind != "cancel":
+                return undos
+            pending = True
+            end = match.end
+        if pending:
+            gap = _WORD_OR_DIGIT.search(text, end)
+            if gap is None or gap.group().isdigit():
+                undos += 1
+        return undos
+
+    def _resolve_id(self, student_id, result):
+        """按花名册纠正学号，无法确定时记录原因并返回None"""
+        if self.resolver is None:
+            return student_id
+        resolution = self.resolver.resolve(student_id)
+        if resolution.student_id is None:
+            reason = f"学号 {student_id} 不在花名册中"
+            if resolution.alternatives:
+                reason += "（可能是: " + ", ".join(v for v, _ in resolution.alternatives[:3]) + "）"
+            result.reasons.append(reason)
+            return None
+        if resolution.corrected:
+            result.corrections.append(resolution)
+        return resolution.student_id
+
+    def parse_lines(self, lines, corrections=None):
+        """解析多条识别结果，返回 ({学号后四位: 分数}, [(行号, 文本, 原因)])
+
+        传入列表 corrections 时追加按花名册纠正的学号 [IdResolution]。
+        """
+        accepted = []  # 按顺序保存的 (学号后四位, 分数)，句首作废词从末尾撤销
+        invalid_lines = []
+        for idx, text in enumerate(lines, 1):
+            parsed = self.parse_line(text)
+            if corrections is not None:
+                corrections.extend(parsed.corrections)
+            for _ in range(parsed.cancel_previous):
+                if accepted:
+                    student_id, score = accepted.pop()
+                    invalid_lines.append((idx, text, f"{CANCELLED_REASON}: 学号 {student_id} 分数 {score}"))
+            accepted.extend(parsed.entries)
+            for reason in parsed.reasons:
+                invalid_lines.append((idx, text, reason))
+        return dict(accepted), invalid_lines
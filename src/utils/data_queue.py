@@ -1,23 +1,149 @@
 import asyncio
 from collections import deque
 
-class DataQueue:
-    def __init__(self):
-        self.queue = deque()
-        self.lock = asyncio.Lock()
-        self.event = asyncio.Event()
-    
+
+class ChannelClosed(Exception):
+    """通道已关闭：put 时立即抛出，get 时在剩余数据取完后抛出"""
+
+
+class AsyncChannel:
+    """有界异步通道，用于录音线程 -> 事件循环 -> 识别任务之间传递数据
+
+    - put 在通道满时等待（背压），put_nowait 满时抛出 asyncio.QueueFull
+    - put_threadsafe 供录音回调等其他线程调用，不能等待，满时丢弃最旧的数据并计数
+    - get_many 等到至少一条数据后取出已就绪的数据，用于合并批量识别
+    - close 后不再接受数据，消费者取完剩余数据后得到 ChannelClosed
+
+    所有状态只在事件循环线程中修改，不需要锁；每次放入/取出只唤醒一个等待者。
+    """
+    def __init__(self, capacity=0, on_drop=None):
+        self.capacity = capacity  # 0表示不限长度
+        self.on_drop = on_drop  # put_threadsafe 丢弃数据时的回调 callback(被丢弃的数据)
+        self.dropped = 0  # 因通道已满被丢弃的数据数量
+        self.closed = False
+        self._items = deque()
+        self._getters = deque()  # 等待数据的消费者 Future
+        self._putters = deque()  # 等待空位的生产者 Future
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None  # 在事件循环外创建时，第一次异步调用时绑定
+
+    def qsize(self):
+        """当前通道中的数据数量"""
+        return len(self._items)
+
+    def empty(self):
+        return not self._items
+
+    def full(self):
+        return bool(self.capacity) and len(self._items) >= self.capacity
+
+    def _bind_loop(self):
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        return self._loop
+
+    @staticmethod
+    def _wake_one(waiters):
+        while waiters:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    @staticmethod
+    def _wake_all(waiters):
+        while waiters:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+
+    async def _wait(self, waiters):
+        waiter = self._bind_loop().create_future()
+        waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # 被取消的等待者可能已经被唤醒，把唤醒让给下一个
+            if waiter.done() and not waiter.cancelled():
+                self._wake_one(waiters)
+            raise
+
+    def _append(self, item):
+        self._items.append(item)
+        self._wake_one(self._getters)
+
+    def _popleft(self):
+        item = self._items.popleft()
+        self._wake_one(self._putters)
+        return item
+
     async def put(self, item):
-        """添加数据到队列"""
-        async with self.lock:
-            self.queue.append(item)
-            self.event.set()
-    
+        """放入数据，通道满时等待消费者取走"""
+        while self.full() and not self.closed:
+            await self._wait(self._putters)
+        self.put_nowait(item)
+
+    def put_nowait(self, item):
+        if self.closed:
+            raise ChannelClosed()
+        if self.full():
+            raise asyncio.QueueFull()
+        self._append(item)
+
+    def put_threadsafe(self, item):
+        """从其他线程放入数据（如PortAudio回调），通道满时丢弃最旧的数据"""
+        if self._loop is None:
+            raise RuntimeError("通道尚未绑定事件循环")
+        self._loop.call_soon_threadsafe(self._put_dropping, item)
+
+    def _put_dropping(self, item):
+        if self.closed:
+            return
+        if self.full():
+            dropped = self._items.popleft()
+            self.dropped += 1
+            if self.on_drop is not None:
+                self.on_drop(dropped)
+        self._append(item)
+
     async def get(self):
-        """从队列获取数据"""
-        await self.event.wait()
-        async with self.lock:
-            if not self.queue:
-                self.event.clear()
-                return None
-            return self.queue.popleft() 
\ No newline at end of file
+        """取出一条数据，通道为空时等待；已关闭且取完时抛出 ChannelClosed"""
+        while not self._items:
+            if self.closed:
+                raise ChannelClosed()
+            await self._wait(self._getters)
+        item = self._popleft()
+        if self._items:
+            self._wake_one(self._getters)  # 还有数据时继续唤醒下一个消费者
+        return item
+
+    def get_nowait(self):
+        if not self._items:
+            if self.closed:
+                raise ChannelClosed()
+            raise asyncio.QueueEmpty()
+        return self._popleft()
+
+    async def get_many(self, max_items, last=None):
+        """等到至少一条数据，再取出已就绪的数据，最多 max_items 条
+
+        last(item) 为真时该数据作为本批的最后一条（之后的留在通道中）。
+        """
+        batch = [await self.get()]
+        while len(batch) < max_items and self._items and not (last is not None and last(batch[-1])):
+            batch.append(self._popleft())
+        return batch
+
+    def close(self):
+        """关闭通道：唤醒所有等待者，已放入的数据仍可取出"""
+        self.closed = True
+        self._wake_all(self._getters)
+        self._wake_all(self._putters)
+
+    def close_threadsafe(self):
+        if self._loop is None:
+            self.closed = True
+            return
+        self._loop.call_soon_threadsafe(self.close)
@@ -1,156 +1,226 @@
-import pandas as pd
 import json
 import os
-from openpyxl import load_workbook
 import time
+import pandas as pd
+from src.utils.grade_matcher import match_grades
+from src.utils.roster_index import RosterIndex
+from src.utils.stage_timer import StageTimer
+from src.utils.workbook_writer import IncrementalWorkbookWriter
+
+_NOT_PENDING = object()
+MAX_RETRIES = 3  # 读写Excel出错时的最大尝试次数
 
 class ExcelProcessor:
-    def __init__(self, excel_path="test_table.xlsx"):
+    def __init__(self, excel_path="test_table.xlsx", sheet_name=None,
+                 id_header='学号', grade_header='期末(必填)', header_row=1):
         self.excel_path = excel_path
         self.output_path = "updated_" + os.path.basename(self.excel_path)
+        self.sheet_name = sheet_name  # 默认使用活动工作表
+        self.id_header = id_header
+        self.grade_header = grade_header
+        self.header_row = header_row
+        self.last_report = None  # 最近一次匹配结果
+        self.index = None  # 花名册索引，会话中只建立一次
+        self.pending = {}  # 行号 -> 待写入的成绩
+        self.undo_log = []  # 每次stage_grade一条：(行号, 原成绩, 原暂存值) 或 None（未改动）
+        self.stage_timer = StageTimer()  # 记录 excel_write 耗时，录入会话中与识别共用
         
-    def process_grades(self, json_path="recognition_results.json"):
-        """根据JSON文件更新Excel中的成绩"""
-        MAX_RETRIES = 3
-        retry_count = 0
+    def load_index(self):
+        """确定读取的文件并加载花名册索引（已存在更新文件时基于更新文件继续修改）"""
+        if self.index is None:
+            if os.path.exists(self.output_path):
+                print(f"\n读取现有的更新文件: {self.output_path}")
+                source_path = self.output_path
+            else:
+                print(f"\n读取原始Excel文件: {self.excel_path}")
+                source_path = self.excel_path
+            self.index = RosterIndex.load_or_build(
+                source_path,
+                sheet_name=self.sheet_name,
+                id_header=self.id_header,
+                grade_header=self.grade_header,
+                header_row=self.header_row,
+            )
+            print(f"花名册共 {len(self.index.student_ids)} 名学生")
+        return self.index
+    
+    def stage_grade(self, student_id, score):
+        """暂存一条成绩（按后四位O(1)查找，不打开Excel），返回 (状态, 行号列表)
         
-        while retry_count < MAX_RETRIES:
+        状态为 new / updated / unchanged / ambiguous / unmatched，只有前两种会在flush时写入。
+        """
+        index = self.load_index()
+        rows = index.lookup(student_id[-4:])
+        if not rows:
+            self.undo_log.append(None)
+            return "unmatched", rows
+        if len(rows) > 1:
+            self.undo_log.append(None)
+            return "ambiguous", rows
+        
+        row = rows[0]
+        new_grade = float(score)
+        current_grade = index.grades.get(row)
+        if current_grade is None or str(current_grade).strip() == "":
+            status = "new"
+        else:
+            try:
+                if float(current_grade) == new_grade:
+                    self.undo_log.append(None)
+                    return "unchanged", rows
+            except (TypeError, ValueError):
+                pass
+            status = "updated"
+        self.undo_log.append((row, current_grade, self.pending.get(row, _NOT_PENDING)))
+        index.grades[row] = new_grade
+        self.pending[row] = new_grade
+        return status, rows
+
+    def undo_grade(self):
+        """撤销最近一次stage_grade（保存之后的不能撤销），返回恢复的行号，没有改动时返回None"""
+        if not self.undo_log:
+            return None
+        entry = self.undo_log.pop()
+        if entry is None:
+            return None
+        row, grade, pending = entry
+        self.index.grades[row] = grade
+        if pending is _NOT_PENDING:
+            self.pending.pop(row, None)
+        else:
+            self.pending[row] = pending
+        return row
+
+    def discard_pending(self):
+        """丢弃所有暂存的成绩"""
+        for _ in range(len(self.undo_log)):
+            self.undo_grade()
+        self.pending.clear()
+    
+    def stage_grades(self, grades_dict):
+        """向量化匹配一批成绩并暂存，返回匹配结果"""
+        index = self.load_index()
+        report = match_grades(
+            pd.Series(index.student_ids, dtype=str),
+            pd.Series(index.grades, dtype=object),
+            grades_dict,
+        )
+        for row, grade in report.changes:
+            index.grades[row] = grade
+            self.pending[row] = grade
+        self.last_report = report
+        return report
+    
+    def flush(self):
+        """把暂存的成绩写入输出文件，返回改动的单元格数量（为0时不写文件）"""
+        index = self.load_index()
+        if not self.pending:
+            return 0
+        with self.stage_timer.stage("excel_write"):
+            writer = IncrementalWorkbookWriter(
+                index.workbook_path,
+                sheet_name=index.sheet_name,
+                id_header=self.id_header,
+                grade_header=self.grade_header,
+                header_row=index.header_row,
+            )
             try:
-                # 首先检查是否存在更新后的文件
-                if os.path.exists(self.output_path):
-                    print(f"\n读取现有的更新文件: {self.output_path}")
-                    df = pd.read_excel(
-                        self.output_path,
-                        dtype={'学号': str}
-                    )
-                    print("成功读取现有更新文件")
-                else:
-                    # 如果不存在，则读取原始文件
-                    print(f"\n读取原始Excel文件: {self.excel_path}")
-                    df = pd.read_excel(
-                        self.excel_path,
-                        dtype={'学号': str}
-                    )
-                    print("成功读取原始文件")
-                
-                # 读取JSON文件
-                print(f"读取JSON文件: {json_path}")
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    grades_dict = json.load(f)
-                
-                print(f"\n开始处理成绩数据...")
-                print(f"JSON文件中包含 {len(grades_dict)} 条成绩记录")
-                
-                # 记录匹配情况
-                matched_count = 0
-                updated_count = 0
-                unmatched = []
-                
-                # 遍历DataFrame的每一行
-                for index, row in df.iterrows():
-                    student_id = str(row['学号'])  # 确保学号为字符串类型
-                    last_four = student_id[-4:]  # 获取学号后四位
-                    
-                    # 检查是否在成绩字典中
-                    if last_four in grades_dict:
-                        current_grade = row.get('期末(必填)', None)
-                        new_grade = float(grades_dict[last_four])
-                        
-                        if pd.isna(current_grade):
-                            # 如果当前没有成绩，直接添加
-                            df.at[index, '期末(必填)'] = new_grade
-                            matched_count += 1
-                            print(f"新增成绩: 学号 {student_id} (后四位: {last_four}) -> 成绩 {new_grade}")
-                        else:
-                            # 如果已有成绩，显示更新信息
-                            df.at[index, '期末(必填)'] = new_grade
-                            updated_count += 1
-                            print(f"更新成绩: 学号 {student_id} (后四位: {last_four}) {current_grade} -> {new_grade}")
-                    else:
-                        unmatched.append(last_four)
-                
-                # 打印统计信息
-                print("\n处理完成!")
-                print(f"总记录数: {len(df)}")
-                print(f"新增成绩: {matched_count}")
-                print(f"更新成绩: {updated_count}")
-                # print(f"未匹配: {len(unmatched)}")
-                
-                # if unmatched:
-                #     print("\n未匹配的学号后四位:")
-                #     for sid in unmatched:
-                #         print(f"- {sid}")
-                
-                # 保存更新后的Excel文件
-                try:
-                    with pd.ExcelWriter(
-                        self.output_path,
-                        engine='openpyxl',
-                        mode='w'
-                    ) as writer:
-                        df.to_excel(writer, index=False, sheet_name='Sheet1')
-                        
-                        # 获取工作表
-                        worksheet = writer.sheets['Sheet1']
-                        
-                        # 找到学号列的索引
-                        student_id_col = None
-                        for idx, col in enumerate(df.columns):
-                            if col == '学号':
-                                student_id_col = idx + 1
-                                break
-                        
-                        # 设置学号列的格式为文本
-                        if student_id_col:
-                            for row in range(2, len(df) + 2):
-                                cell = worksheet.cell(row=row, column=student_id_col)
-                                cell.number_format = '@'
-                    
-                    print(f"\n更新后的文件已保存为: {self.output_path}")
-                    print("学号列已设置为文本格式")
-                    return True
-                    
-                except PermissionError:
-                    retry_count += 1
-                    if retry_count < MAX_RETRIES:
-                        print(f"\n警告: 无法保存文件，可能是文件正在被其他程序使用")
-                        print(f"这是第 {retry_count} 次尝试，共 {MAX_RETRIES} 次")
-                        print("请关闭已打开的Excel文件，然后按回车键继续...")
-                        input()
-                        continue
-                    else:
-                        print("\n错误: 已达到最大重试次数")
-                        print("请确保Excel文件未被其他程序打开，并重新运行程序")
-                        return False
-                        
-            except PermissionError as e:
-                retry_count += 1
-                if retry_count < MAX_RETRIES:
-                    print(f"\n警告: 无法访问文件，可能是权限问题或文件被占用")
-                    print(f"这是第 {retry_count} 次尝试，共 {MAX_RETRIES} 次")
-                    print("请检查文件权限或关闭已打开的Excel文件，然后按回车键继续...")
-                    input()
-                    continue
-                else:
-                    print("\n错误: 已达到最大重试次数")
-                    print("请检查以下问题后重新运行程序：")
-                    print("1. Excel文件是否已关闭")
-                    print("2. 是否有文件的写入权限")
-                    print("3. 磁盘空间是否充足")
-                    return False
-                    
-            except Exception as e:
-                print(f"\n处理Excel文件时出错: {e}")
-                import traceback
-                print("错误堆栈:", traceback.format_exc())
-                retry_count += 1
-                if retry_count < MAX_RETRIES:
-                    print(f"\n这是第 {retry_count} 次尝试，共 {MAX_RETRIES} 次")
-                    print("按回车键重试...")
-                    input()
-                    continue
-                else:
-                    print("\n错误: 已达到最大重试次数，程序退出")
-                    return False
+                writer.open()
+                for row, grade in self.pending.items():
+                    writer.set_grade(row, grade)
+                if writer.changed_cells:
+                    writer.save(self.output_path)
+            finally:
+                writer.close()
+        self.pending.clear()
+        self.undo_log.clear()
+        if writer.changed_cells:
+            # 之后的修改都基于输出文件，索引随之更新
+            index.refresh_stamp(self.output_path)
+        return writer.changed_cells
         
-        return False
\ No newline at end of file
+    def process_grades(self, json_path="recognition_results.json", interactive=True):
+        """根据JSON文件更新Excel中的成绩，interactive=False时出错不等待用户输入"""
+        loaded = retry_excel_operation(lambda: (self.load_index(), load_grades_json(json_path)), interactive)
+        if loaded is None:
+            return False
+        index, grades_dict = loaded
+
+        print(f"\n开始处理成绩数据...")
+        print(f"JSON文件中包含 {len(grades_dict)} 条成绩记录")
+
+        report = self.stage_grades(grades_dict)
+        for row, student_id, new_grade in report.new:
+            print(f"新增成绩: 学号 {student_id} (后四位: {student_id[-4:]}) -> 成绩 {new_grade}")
+        for row, student_id, current_grade, new_grade in report.updated:
+            print(f"更新成绩: 学号 {student_id} (后四位: {student_id[-4:]}) {current_grade} -> {new_grade}")
+
+        # 打印统计信息
+        print("\n处理完成!")
+        print(f"总记录数: {len(index.student_ids)}")
+        print(f"新增成绩: {len(report.new)}")
+        print(f"更新成绩: {len(report.updated)}")
+        if report.unchanged:
+            print(f"成绩未变化: {len(report.unchanged)}")
+        print(f"未匹配: {len(report.unmatched)}")
+
+        if report.unmatched:
+            print("\n未匹配的学号后四位:")
+            for sid in report.unmatched:
+                print(f"- {sid}")
+
+        if report.ambiguous:
+            print("\n以下学号后四位对应多名学生，未写入成绩，请手动确认:")
+            for suffix, student_ids in report.ambiguous.items():
+                print(f"- {suffix} (成绩 {grades_dict[suffix]}): {', '.join(student_ids)}")
+
+        # 只保存改动过的单元格，其他工作表和格式保持不变；成绩只暂存一次，出错时只重试保存
+        changed = retry_excel_operation(self.flush, interactive)
+        if changed is None:
+            return False
+        if changed:
+            print(f"\n更新后的文件已保存为: {self.output_path}")
+            print(f"共改动 {changed} 个单元格")
+        else:
+            print("\n成绩没有变化，未写入文件")
+        return True
+
+
+def load_grades_json(json_path):
+    """读取 {学号后四位: 成绩} JSON文件"""
+    print(f"读取JSON文件: {json_path}")
+    with open(json_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def retry_excel_operation(operation, interactive=True, max_retries=MAX_RETRIES):
+    """执行读取或保存Excel的操作，文件被占用或出错时提示并重试，返回操作结果，全部失败时返回None
+
+    interactive=False 时不等待用户按回车，等待片刻后自动重试。
+    """
+    for attempt in range(1, max_retries + 1):
+        try:
+            return operation()
+        except PermissionError as e:
+            print(f"\n警告: 无法访问文件，可能是权限问题或文件正在被其他程序使用: {e}")
+            hint = "请检查文件权限或关闭已打开的Excel文件，然后按回车键继续..."
+        except Exception as e:
+            print(f"\n处理Excel文件时出错: {e}")
+            import traceback
+            print("错误堆栈:", traceback.format_exc())
+            hint = "按回车键重试..."
+        if attempt == max_retries:
+            break
+        print(f"这是第 {attempt} 次尝试，共 {max_retries} 次")
+        print(hint)
+        if interactive:
+            input()
+        else:
+            time.sleep(2)
+
+    print("\n错误: 已达到最大重试次数")
+    print("请检查以下问题后重新运行程序：")
+    print("1. Excel文件是否已关闭")
+    print("2. 是否有文件的写入权限")
+    print("3. 磁盘空间是否充足")
+    return None
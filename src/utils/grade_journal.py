@@ -0,0 +1,75 @@
+import json
+import os
+import time
+
+
+class GradeJournal:
+    """只追加的成绩日志（JSONL）：每条记录立即写入操作系统，fsync按条数/时间批量进行"""
+    def __init__(self, path="grade_journal.jsonl", fsync_every=8, fsync_interval=1.0):
+        self.path = path
+        self.fsync_every = fsync_every  # 累计多少条记录后fsync
+        self.fsync_interval = fsync_interval  # 距上次fsync超过多少秒后fsync
+        self.file = None
+        self.seq = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def open(self):
+        """打开日志文件，序号接着已有记录继续"""
+        records = self.replay(self.path, since_checkpoint=False)
+        self.seq = records[-1]["seq"] if records else 0
+        self.file = open(self.path, "a", encoding="utf-8")
+        return self
+
+    def append(self, record):
+        """追加一条记录，返回写入的记录"""
+        self.seq += 1
+        record = {"seq": self.seq, "ts": time.time(), **record}
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        # 写入操作系统缓冲，进程崩溃也不会丢失
+        self.file.flush()
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+        return record
+
+    def checkpoint(self, kind):
+        """写入检查点（flush: 之前的记录已保存到Excel；discard: 之前的记录被放弃）并立即落盘"""
+        self.append({"type": kind})
+        self.sync()
+
+    def sync(self):
+        """把已写入的记录落盘"""
+        if self.file is not None and self._unsynced:
+            os.fsync(self.file.fileno())
+            self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if self.file is not None:
+            self.sync()
+            self.file.close()
+            self.file = None
+
+    @staticmethod
+    def replay(path, since_checkpoint=True):
+        """读取日志记录；since_checkpoint=True时只返回最后一个检查点之后的记录"""
+        records = []
+        if not os.path.exists(path):
+            return records
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 崩溃时可能留下写了一半的最后一行
+                    print(f"跳过损坏的日志记录: {line[:50]}")
+                    continue
+                if since_checkpoint and record.get("type") in ("flush", "discard"):
+                    records = []
+                else:
+                    records.append(record)
+        return records
@@ -0,0 +1,63 @@
+from dataclasses import dataclass, field
+import pandas as pd
+
+
+@dataclass
+class MatchReport:
+    """成绩匹配结果"""
+    new: list = field(default_factory=list)  # [(行号, 学号, 新成绩)] 原来没有成绩
+    updated: list = field(default_factory=list)  # [(行号, 学号, 原成绩, 新成绩)]
+    unchanged: list = field(default_factory=list)  # [(行号, 学号, 成绩)] 成绩相同无需写入
+    ambiguous: dict = field(default_factory=dict)  # 后四位 -> [学号]，多个学生后四位相同，不写入
+    unmatched: list = field(default_factory=list)  # 花名册中找不到的后四位
+
+    @property
+    def changes(self):
+        """需要写入的 (行号, 新成绩)"""
+        return [(row, grade) for row, _, grade in self.new] + \
+               [(row, grade) for row, _, _, grade in self.updated]
+
+
+def _is_blank(values):
+    return values.isna() | (values.astype(str).str.strip() == "")
+
+
+def match_grades(student_ids, current_grades, grades_dict, suffix_length=4):
+    """按学号后四位把成绩匹配到花名册行
+
+    student_ids / current_grades 为以行号为索引的Series，grades_dict 为 {后四位: 分数}。
+    后四位在花名册中重复的学号不会被写入，而是列在 ambiguous 中。
+    """
+    report = MatchReport()
+    if not grades_dict:
+        return report
+
+    ids = student_ids.astype(str)
+    suffixes = ids.str[-suffix_length:]
+    grades = pd.Series(grades_dict, dtype=object).astype(float)
+    new_grades = suffixes.map(grades)
+    matched = new_grades.notna()
+
+    # 后四位重复的学生无法区分
+    counts = suffixes.map(suffixes.value_counts())
+    ambiguous = matched & (counts > 1)
+    for suffix, group in ids[ambiguous].groupby(suffixes[ambiguous]):
+        report.ambiguous[suffix] = group.tolist()
+
+    resolved = matched & ~ambiguous
+    current = current_grades.reindex(ids.index)[resolved]
+    blank = _is_blank(current)
+    target = new_grades[resolved]
+    rows_ids = ids[resolved]
+
+    same = ~blank & (pd.to_numeric(current, errors="coerce") == target)
+    for row in current.index[blank]:
+        report.new.append((row, rows_ids[row], target[row]))
+    for row in current.index[~blank & ~same]:
+        report.updated.append((row, rows_ids[row], current[row], target[row]))
+    for row in current.index[same]:
+        report.unchanged.append((row, rows_ids[row], target[row]))
+
+    found = set(suffixes[matched].unique())
+    report.unmatched = [suffix for suffix in grades_dict if suffix not in found]
+    return report
@@ -0,0 +1,109 @@
+from src.speech.speech_recognizer import parse_recognition_line
+from src.utils.stage_timer import StageTimer
+
+
+class LiveGradeCommitter:
+    """边录入边提交：每句识别结果立即解析、写入日志并暂存到内存中的花名册"""
+    def __init__(self, excel_processor, journal, parser=None, stage_timer=None):
+        self.excel_processor = excel_processor
+        self.journal = journal
+        self.parser = parser  # 为None时使用默认解析器
+        self.committed = 0
+        self.history = []  # 本次会话已提交的 (学号后四位, 分数)，用于撤销
+        self.early_undos = 0  # 流式识别在句子说完前已执行的撤销次数
+        self.stage_timer = stage_timer or StageTimer()  # 记录每句的 parse 耗时
+
+    def recover(self):
+        """重放上次未保存的日志记录，返回恢复的成绩数量"""
+        records = [r for r in self.journal.replay(self.journal.path) if r.get("type") in ("grade", "undo")]
+        for record in records:
+            if record["type"] == "grade":
+                # 多班级花名册（RosterSet）的记录带有班级和成绩类别
+                routing = {key: record[key] for key in ("section", "kind") if record.get(key)}
+                self.excel_processor.stage_grade(record["student_id"], record["score"], **routing)
+                self.history.append((record["student_id"], record["score"]))
+            elif self.history:
+                self.excel_processor.undo_grade()
+                self.history.pop()
+        if self.history:
+            print(f"从日志恢复了 {len(self.history)} 条未保存的成绩")
+        return len(self.history)
+
+    def on_text(self, text):
+        """处理一句识别结果"""
+        if not text.strip():
+            return
+        route_text = getattr(self.excel_processor, "route_text", None)
+        if route_text is not None:
+            # 多班级花名册：句中说出班级名称或成绩类别时先切换
+            route_text(text)
+        with self.stage_timer.stage("parse"):
+            pairs, reasons, cancel_previous = parse_recognition_line(text, self.parser)
+        # 流式识别已经提前撤销过的不再重复撤销
+        cancel_previous, self.early_undos = max(0, cancel_previous - self.early_undos), 0
+        for _ in range(cancel_previous):
+            self.undo_last(text)
+
+        for student_id, score in pairs:
+            record = {"type": "grade", "student_id": student_id, "score": score, "text": text}
+            if route_text is not None:
+                # 记录写入时的班级和成绩类别，恢复时不受之后切换的影响
+                matches = self.excel_processor.lookup(student_id[-4:])
+                if len(matches) == 1:
+                    record["section"] = matches[0][0]
+                record["kind"] = self.excel_processor.active_kind
+            self.journal.append(record)
+            status, rows = self.excel_processor.stage_grade(student_id, score)
+            self.history.append((student_id, score))
+            self.committed += 1
+            if status == "ambiguous":
+                print(f"警告: 学号后四位 {student_id} 对应多名学生，未写入，请手动确认")
+            elif status == "unmatched":
+                print(f"警告: 花名册中找不到学号后四位 {student_id}")
+            elif status == "no_column":
+                print(f"警告: {rows[0][0]} 没有 {self.excel_processor.active_kind} 成绩列，未写入")
+            else:
+                print(f"已记录: 学号后四位 {student_id} -> 成绩 {score}")
+        if not pairs and reasons:
+            print(f"未解析出成绩: {'; '.join(reasons)}")
+
+    def on_keyword(self, kind, text):
+        """流式识别的部分结果中出现稳定的作废词：句首作废上一条成绩时立即撤销"""
+        if kind != "cancel":
+            return
+        _, _, cancel_previous = parse_recognition_line(text, self.parser)
+        for _ in range(cancel_previous - self.early_undos):
+            if self.undo_last(text) is not None:
+                self.early_undos += 1
+
+    def undo_last(self, text=""):
+        """撤销上一条已提交的成绩（用户在句首说了作废词）"""
+        if not self.history:
+            print("没有可以作废的记录")
+            return None
+        student_id, score = self.history.pop()
+        self.journal.append({"type": "undo", "student_id": student_id, "score": score, "text": text})
+        self.excel_processor.undo_grade()
+        self.committed -= 1
+        print(f"已作废: 学号后四位 {student_id} -> 成绩 {score}")
+        return student_id, score
+
+    def finish(self):
+        """保存暂存的成绩到Excel并写入检查点"""
+        changed = self.excel_processor.flush()
+        self.journal.checkpoint("flush")
+        self.history.clear()
+        if changed:
+            print(f"\n已保存 {changed} 个成绩单元格到: {self.excel_processor.output_path}")
+        else:
+            print("\n成绩没有变化，未写入文件")
+        return changed
+
+    def discard(self):
+        """放弃本次会话的记录"""
+        self.excel_processor.discard_pending()
+        self.journal.checkpoint("discard")
+        self.history.clear()
+
+    def close(self):
+        self.journal.close()
@@ -0,0 +1,203 @@
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from openpyxl import load_workbook
+from src.utils.workbook_writer import normalize_student_id
+
+INDEX_VERSION = 2
+INDEX_SUFFIX = ".rosterindex.json"
+
+
+def file_digest(path):
+    """计算文件内容的SHA-1"""
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def file_stamp(path):
+    """文件的 (修改时间, 大小)，用于快速判断缓存是否有效"""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+@dataclass
+class RosterIndex:
+    """花名册索引：学号后四位 -> 行号、列位置和当前成绩，以JSON保存在工作簿旁边
+
+    缓存文件只包含数据（不使用pickle），读取别人共享的文件夹不会执行其中的代码。
+    """
+    workbook_path: str
+    sheet_name: str
+    header_row: int
+    id_header: str
+    grade_header: str
+    columns: dict = field(default_factory=dict)  # 表头 -> 列号
+    student_ids: dict = field(default_factory=dict)  # 行号 -> 学号
+    grades: dict = field(default_factory=dict)  # 行号 -> 当前成绩
+    suffix_rows: dict = field(default_factory=dict)  # 后四位 -> [行号]
+    stamp: tuple = (0, 0)
+    digest: str = ""
+    sheet_selected: bool = False  # 是否按名称指定了工作表，决定缓存文件名（见 cache_path）
+    version: int = INDEX_VERSION
+
+    @classmethod
+    def build(cls, path, sheet_name=None, id_header='学号', grade_header='期末(必填)', header_row=1):
+        """以只读模式扫描一次工作簿建立索引"""
+        return cls.build_many(path, sheet_name, id_header, [grade_header], header_row)[grade_header]
+
+    @classmethod
+    def build_many(cls, path, sheet_name=None, id_header='学号', grade_headers=('期末(必填)',), header_row=1):
+        """扫描一次工作簿，为同一工作表的多个成绩列各建立一个索引，返回 {成绩表头: 索引}"""
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            worksheet = workbook[sheet_name] if sheet_name else workbook.active
+            rows = worksheet.iter_rows(min_row=header_row, values_only=True)
+            header = next(rows)
+            columns = {str(name).strip(): idx for idx, name in enumerate(header, 1) if name is not None}
+            for name in (id_header, *grade_headers):
+                if name not in columns:
+                    raise KeyError(f"工作表中找不到列: {name}")
+
+            indexes = {}
+            for grade_header in grade_headers:
+                index = indexes[grade_header] = cls(path, worksheet.title, header_row, id_header, grade_header,
+                                                    dict(columns))
+                index.sheet_selected = bool(sheet_name)
+            id_pos = columns[id_header] - 1
+            grade_positions = [(indexes[name], columns[name] - 1) for name in grade_headers]
+            for row, values in enumerate(rows, header_row + 1):
+                if id_pos >= len(values):
+                    continue
+                student_id = normalize_student_id(values[id_pos])
+                if not student_id:
+                    continue
+                for index, grade_pos in grade_positions:
+                    index.student_ids[row] = student_id
+                    index.grades[row] = values[grade_pos] if grade_pos < len(values) else None
+                    index.suffix_rows.setdefault(student_id[-4:], []).append(row)
+        finally:
+            workbook.close()
+
+        stamp, digest = file_stamp(path), file_digest(path)
+        for index in indexes.values():
+            index.stamp, index.digest = stamp, digest
+        return indexes
+
+    @staticmethod
+    def cache_path(path, sheet_name=None, grade_header=None):
+        """索引缓存文件：未指定工作表时为 工作簿.rosterindex.json；指定工作表时（多班级花名册）
+        文件名中加入工作表和成绩列的哈希，同一工作簿的每个工作表、每个成绩列各有一个缓存文件"""
+        if not sheet_name:
+            return path + INDEX_SUFFIX
+        key = hashlib.sha1(f"{sheet_name}\0{grade_header}".encode("utf-8")).hexdigest()[:8]
+        return f"{path}.{key}{INDEX_SUFFIX}"
+
+    @classmethod
+    def load_cached(cls, path, sheet_name=None, id_header='学号', grade_header='期末(必填)', header_row=1):
+        """读取缓存的索引；文件修改时间/大小变化时再比对内容哈希，缓存无效时返回None"""
+        cache_path = cls.cache_path(path, sheet_name, grade_header)
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            index = cls.from_json(cache_path, path)
+        except Exception as e:
+            print(f"读取花名册索引失败，将重新建立: {e}")
+            return None
+
+        if index is None or (
+            index.version != INDEX_VERSION
+            or (sheet_name and index.sheet_name != sheet_name)
+            or index.id_header != id_header
+            or index.grade_header != grade_header
+            or index.header_row != header_row
+        ):
+            return None
+
+        stamp = file_stamp(path)
+        if stamp == index.stamp:
+            index.workbook_path = path
+            return index
+        if file_digest(path) == index.digest:
+            # 只是修改时间变了（如复制文件），内容未变
+            index.stamp = stamp
+            index.workbook_path = path
+            index.save()
+            return index
+        return None
+
+    @classmethod
+    def load_or_build(cls, path, sheet_name=None, id_header='学号', grade_header='期末(必填)', header_row=1):
+        """优先使用缓存的索引，内容变化才重新扫描"""
+        index = cls.load_cached(path, sheet_name, id_header, grade_header, header_row)
+        if index is None:
+            print(f"建立花名册索引: {path}")
+            index = cls.build(path, sheet_name, id_header, grade_header, header_row)
+            index.save()
+        return index
+
+    @classmethod
+    def from_json(cls, cache_path, workbook_path=None):
+        """读取JSON索引文件，格式不对时抛出异常"""
+        with open(cache_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != INDEX_VERSION:
+            return None
+        index = cls(
+            workbook_path=workbook_path or cache_path[:-len(INDEX_SUFFIX)],
+            sheet_name=str(data["sheet_name"]),
+            header_row=int(data["header_row"]),
+            id_header=str(data["id_header"]),
+            grade_header=str(data["grade_header"]),
+            columns={str(name): int(col) for name, col in data["columns"].items()},
+            stamp=tuple(int(v) for v in data["stamp"]),
+            digest=str(data["digest"]),
+            sheet_selected=bool(data.get("sheet_selected", False)),
+        )
+        for row, student_id, grade in data["rows"]:
+            row, student_id = int(row), str(student_id)
+            index.student_ids[row] = student_id
+            index.grades[row] = grade
+            index.suffix_rows.setdefault(student_id[-4:], []).append(row)
+        return index
+
+    def to_json(self):
+        return {
+            "version": self.version,
+            "sheet_name": self.sheet_name,
+            "header_row": self.header_row,
+            "id_header": self.id_header,
+            "grade_header": self.grade_header,
+            "columns": self.columns,
+            "rows": [[row, student_id, self.grades.get(row)] for row, student_id in self.student_ids.items()],
+            "stamp": list(self.stamp),
+            "digest": self.digest,
+            "sheet_selected": self.sheet_selected,
+        }
+
+    def save(self, path=None):
+        """把索引保存到工作簿旁边（先写临时文件再替换）"""
+        cache_path = self.cache_path(path or self.workbook_path,
+                                     self.sheet_name if self.sheet_selected else None, self.grade_header)
+        tmp_path = cache_path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                # 成绩单元格可能是日期等类型，按字符串保存，只用于判断成绩是否变化
+                json.dump(self.to_json(), f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"保存花名册索引失败: {e}")
+
+    def refresh_stamp(self, path=None):
+        """工作簿保存后更新文件标识并重新保存索引"""
+        self.workbook_path = path or self.workbook_path
+        self.stamp = file_stamp(self.workbook_path)
+        self.digest = file_digest(self.workbook_path)
+        self.save()
+
+    def lookup(self, suffix):
+        """按学号后四位查找行号列表"""
+        return self.suffix_rows.get(suffix, [])
@@ -0,0 +1,392 @@
+"""多个班级（多个工作簿/工作表）的花名册，一次会话录入多个班级的成绩
+
+每个含学号列的工作表是一个班级（section）。所有班级的学号后四位合并为一个索引，
+后四位在多个班级中重复时按当前班级（说出班级名称时切换）区分。
+每条成绩按当前成绩类别（期中/期末/平时，说出类别名称时切换）写入对应的列。
+加载和保存都按工作簿并行执行：默认使用线程池；openpyxl解析XML时持有GIL，
+多核机器上处理大量或很大的工作簿时可用 processes=True 改用进程池。
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from itertools import repeat
+from openpyxl import load_workbook
+from src.utils.excel_processor import ExcelProcessor, load_grades_json, retry_excel_operation
+from src.utils.roster_index import RosterIndex, file_stamp
+from src.utils.stage_timer import StageTimer
+
+GRADE_KINDS = ("期中", "期末", "平时")
+SHEET_SEPARATOR = "#"  # 命令行中指定工作表: 文件.xlsx#工作表
+
+
+def parse_roster_spec(spec):
+    """把 "文件.xlsx" 或 "文件.xlsx#工作表1,工作表2" 解析为 (路径, 工作表列表或None)"""
+    path, _, sheets = spec.partition(SHEET_SEPARATOR)
+    return path, [name.strip() for name in sheets.split(",") if name.strip()] or None
+
+
+def uses_roster_set(specs, grade_kind=None):
+    """单个文件且未指定工作表和成绩类别时使用 ExcelProcessor，否则使用 RosterSet"""
+    return len(specs) > 1 or parse_roster_spec(specs[0])[1] is not None or grade_kind is not None
+
+
+def open_rosters(specs, grade_kind=None):
+    """按命令行参数打开花名册（ExcelProcessor 或 RosterSet，见 uses_roster_set）"""
+    if not uses_roster_set(specs, grade_kind):
+        return ExcelProcessor(parse_roster_spec(specs[0])[0])
+    return RosterSet([parse_roster_spec(spec) for spec in specs], default_kind=grade_kind or '期末')
+
+
+def find_grade_headers(columns, grade_kinds=GRADE_KINDS):
+    """成绩类别 -> 表头：包含类别名称的第一列（如“期末(必填)”、“平时成绩”）"""
+    found = {}
+    for kind in grade_kinds:
+        for name in columns:
+            if kind in name:
+                found[kind] = name
+                break
+    return found
+
+
+def read_roster_headers(path, sheet_names=None, id_header='学号', grade_kinds=GRADE_KINDS, header_row=1):
+    """只读取表头，返回 [(工作表名, {成绩类别: 表头})]，跳过没有学号列的工作表"""
+    workbook = load_workbook(path, read_only=True)
+    try:
+        worksheets = [workbook[name] for name in sheet_names] if sheet_names else workbook.worksheets
+        found = []
+        for worksheet in worksheets:
+            header = next(worksheet.iter_rows(min_row=header_row, max_row=header_row, values_only=True), None)
+            columns = [str(name).strip() for name in header or () if name is not None]
+            if id_header not in columns:
+                if sheet_names:
+                    raise KeyError(f"工作表 {worksheet.title} 中找不到列: {id_header}")
+                continue  # 跳过说明页等不是花名册的工作表
+            found.append((worksheet.title, find_grade_headers(columns, grade_kinds)))
+    finally:
+        workbook.close()
+    return found
+
+
+def load_workbook_indexes(source_path, sheet_names=None, id_header='学号', grade_kinds=GRADE_KINDS,
+                          header_row=1):
+    """加载一个工作簿中每个班级每个成绩列的 RosterIndex，在工作线程/进程中执行
+
+    优先使用缓存，同一工作表中缓存失效的成绩列扫描一次工作簿一起重建。
+    返回 [(工作表名, {成绩类别: RosterIndex})]。
+    """
+    sections = []
+    for sheet_name, headers in read_roster_headers(source_path, sheet_names, id_header, grade_kinds, header_row):
+        indexes = {kind: RosterIndex.load_cached(source_path, sheet_name, id_header, header, header_row)
+                   for kind, header in headers.items()}
+        missing = [headers[kind] for kind, index in indexes.items() if index is None]
+        if missing:
+            print(f"建立花名册索引: {source_path} ({sheet_name})")
+            built = RosterIndex.build_many(source_path, sheet_name, id_header, missing, header_row)
+            for kind, header in headers.items():
+                if indexes[kind] is None:
+                    indexes[kind] = built[header]
+                    indexes[kind].save()
+        sections.append((sheet_name, indexes))
+    return sections
+
+
+def flush_workbook(jobs, output_path):
+    """依次用 ExcelProcessor.flush 保存同一工作簿中各班级/成绩列暂存的成绩，在工作线程/进程中执行
+
+    jobs 为 [(RosterIndex, {行号: 成绩})]，第一次保存之后都基于输出文件修改。
+    返回 (改动的单元格数量, 保存后的索引列表)。
+    """
+    changed = 0
+    indexes = []
+    for index, pending in jobs:
+        if changed:
+            # 前面的班级/成绩列已保存到输出文件
+            index.refresh_stamp(output_path)
+        processor = ExcelProcessor(index.workbook_path, sheet_name=index.sheet_name, id_header=index.id_header,
+                                   grade_header=index.grade_header, header_row=index.header_row)
+        processor.output_path = output_path
+        processor.index = index
+        processor.pending = dict(pending)
+        changed += processor.flush()
+        indexes.append(processor.index)
+    return changed, indexes
+
+
+@dataclass
+class SectionRoster:
+    """一个班级（一个工作表）的花名册：每个成绩类别一个 ExcelProcessor，学号相同"""
+    section: str  # 班级名称
+    workbook_path: str  # 原始工作簿
+    sheet_name: str
+    processors: dict = field(default_factory=dict)  # 成绩类别 -> ExcelProcessor
+
+    @property
+    def student_ids(self):
+        """行号 -> 学号"""
+        return next(iter(self.processors.values())).index.student_ids
+
+
+class RosterSet:
+    """多个班级的花名册，接口与 ExcelProcessor 相同（load_index / stage_grade / undo_grade / flush），
+    可直接交给 LiveGradeCommitter 和 RosterIdResolver 使用
+
+    每个班级的每个成绩列由一个 ExcelProcessor 暂存、撤销和保存，索引使用 RosterIndex 的缓存。
+    sources 为路径或 (路径, [工作表名]) 的列表。输出文件为 output_dir（默认当前目录）下的
+    "updated_" + 原文件名，与 ExcelProcessor 相同，已存在时基于输出文件继续修改。
+    """
+    def __init__(self, sources, output_dir=None, id_header='学号', grade_kinds=GRADE_KINDS,
+                 default_kind='期末', header_row=1, max_workers=None, processes=False):
+        self.sources = [(source, None) if isinstance(source, str) else tuple(source) for source in sources]
+        self.output_dir = output_dir
+        self.id_header = id_header
+        self.grade_kinds = tuple(grade_kinds)
+        self.header_row = header_row
+        self.max_workers = max_workers
+        self.processes = processes  # True 时用进程池加载和保存
+        self.active_kind = default_kind  # 当前成绩类别
+        self.active_section = None  # 当前班级，后四位在多个班级中重复时优先匹配
+        self.sections = None  # 班级名称 -> SectionRoster，load_index 时加载
+        self.suffix_rows = {}  # 后四位 -> [(班级名称, 行号)]
+        self.undo_log = []  # 每次stage_grade一条：(班级名称, 成绩类别) 或 None（未暂存）
+        self.last_outputs = {}  # 最近一次flush: 输出文件 -> 改动的单元格数量
+        self.stage_timer = StageTimer()  # 记录 excel_load / excel_write 耗时
+
+    def output_path_for(self, workbook_path):
+        # 与 ExcelProcessor 相同，默认保存在当前目录
+        return os.path.join(self.output_dir or "", "updated_" + os.path.basename(workbook_path))
+
+    @property
+    def output_path(self):
+        """所有输出文件（与 ExcelProcessor.output_path 对应，用于提示信息）"""
+        return ", ".join(dict.fromkeys(self.output_path_for(path) for path, _ in self.sources))
+
+    @property
+    def pending(self):
+        """待写入的成绩: (班级名称, 行号, 成绩类别) -> 成绩"""
+        return {(name, row, kind): grade
+                for name, kind, processor in self._processors()
+                for row, grade in processor.pending.items()}
+
+    def _processors(self):
+        for name, roster in (self.sections or {}).items():
+            for kind, processor in roster.processors.items():
+                yield name, kind, processor
+
+    def _executor(self):
+        return (ProcessPoolExecutor if self.processes else ThreadPoolExecutor)(max_workers=self.max_workers)
+
+    def load_index(self):
+        """并行加载所有工作簿的索引并建立合并的后四位索引（会话中只加载一次），返回自身"""
+        if self.sections is not None:
+            return self
+        paths = [path for path, _ in self.sources]
+        outputs = [self.output_path_for(path) for path in paths]
+        with self.stage_timer.stage("excel_load"):
+            with self._executor() as executor:
+                results = list(executor.map(
+                    load_workbook_indexes,
+                    [output if os.path.exists(output) else path for path, output in zip(paths, outputs)],
+                    [sheet_names for _, sheet_names in self.sources],
+                    repeat(self.id_header), repeat(self.grade_kinds), repeat(self.header_row),
+                ))
+        self.sections = {}
+        self.suffix_rows = {}
+        for path, output, sheets in zip(paths, outputs, results):
+            # 只有一个花名册工作表时用文件名作为班级名称，否则用 文件名/工作表名
+            stem = os.path.splitext(os.path.basename(path))[0]
+            for sheet_name, indexes in sheets:
+                if not indexes:
+                    print(f"{path} 的工作表 {sheet_name} 中没有成绩列，已跳过")
+                    continue
+                name = stem if len(sheets) == 1 else f"{stem}/{sheet_name}"
+                if name in self.sections:
+                    name = f"{name}({len(self.sections) + 1})"
+                roster = SectionRoster(name, path, sheet_name)
+                for kind, index in indexes.items():
+                    processor = ExcelProcessor(path, sheet_name=sheet_name, id_header=self.id_header,
+                                               grade_header=index.grade_header, header_row=self.header_row)
+                    processor.output_path = output
+                    processor.index = index
+                    roster.processors[kind] = processor
+                self.sections[name] = roster
+                for row, student_id in roster.student_ids.items():
+                    self.suffix_rows.setdefault(student_id[-4:], []).append((name, row))
+        students = sum(len(roster.student_ids) for roster in self.sections.values())
+        print(f"已加载 {len(self.sections)} 个班级, 共 {students} 名学生: {', '.join(self.sections)}")
+        duplicated = sum(1 for matches in self.suffix_rows.values()
+                         if len({name for name, _ in matches}) > 1)
+        if duplicated:
+            print(f"有 {duplicated} 个学号后四位在多个班级中重复，录入前请说出班级名称")
+        return self
+
+    def find_section(self, name):
+        """按名称查找班级：完全相同或唯一包含该名称的班级，找不到时返回None"""
+        self.load_index()
+        if name in self.sections:
+            return name
+        matches = [section for section, roster in self.sections.items()
+                   if name in section or roster.sheet_name == name]
+        return matches[0] if len(matches) == 1 else None
+
+    def select(self, section=None, kind=None):
+        """切换当前班级和/或成绩类别"""
+        if section is not None:
+            resolved = self.find_section(section)
+            if resolved is None:
+                raise KeyError(f"找不到班级: {section}")
+            self.active_section = resolved
+        if kind is not None:
+            if kind not in self.grade_kinds:
+                raise KeyError(f"未知的成绩类别: {kind}")
+            self.active_kind = kind
+
+    def route_text(self, text):
+        """识别文本中出现班级名称或成绩类别（如“二班 期中”）时切换，返回是否切换"""
+        self.load_index()
+        changed = False
+        for kind in self.grade_kinds:
+            if kind in text and kind != self.active_kind:
+                self.active_kind = kind
+                print(f"切换成绩类别: {kind}")
+                changed = True
+                break
+        # 优先匹配较长的名称（“一班/期中”先于“一班”）
+        for section in sorted(self.sections, key=len, reverse=True):
+            names = (section, self.sections[section].sheet_name)
+            if any(len(name) >= 2 and name in text for name in names):
+                if section != self.active_section:
+                    self.active_section = section
+                    print(f"切换班级: {section}")
+                    changed = True
+                break
+        return changed
+
+    def lookup(self, suffix, section=None):
+        """按学号后四位查找 [(班级名称, 行号)]：指定班级时只在该班级中查找，
+        多个班级都有该后四位时优先当前班级"""
+        matches = self.load_index().suffix_rows.get(suffix, [])
+        if section is not None:
+            return [match for match in matches if match[0] == section]
+        if len(matches) > 1 and self.active_section is not None:
+            return [match for match in matches if match[0] == self.active_section] or matches
+        return matches
+
+    def stage_grade(self, student_id, score, kind=None, section=None):
+        """暂存一条成绩到当前（或指定）成绩类别的列，返回 (状态, [(班级名称, 行号)])
+
+        状态为 new / updated / unchanged / ambiguous / unmatched / no_column，只有前两种会在flush时写入。
+        """
+        kind = kind or self.active_kind
+        matches = self.lookup(student_id[-4:], section)
+        if not matches:
+            self.undo_log.append(None)
+            return "unmatched", matches
+        if len(matches) > 1:
+            self.undo_log.append(None)
+            return "ambiguous", matches
+
+        name = matches[0][0]
+        processor = self.sections[name].processors.get(kind)
+        if processor is None:
+            self.undo_log.append(None)
+            return "no_column", matches
+        status, _ = processor.stage_grade(student_id, score)
+        self.undo_log.append((name, kind))
+        return status, matches
+
+    def undo_grade(self):
+        """撤销最近一次stage_grade（保存之后的不能撤销），返回恢复的 (班级名称, 行号, 成绩类别)"""
+        if not self.undo_log:
+            return None
+        entry = self.undo_log.pop()
+        if entry is None:
+            return None
+        name, kind = entry
+        row = self.sections[name].processors[kind].undo_grade()
+        return None if row is None else (name, row, kind)
+
+    def discard_pending(self):
+        """丢弃所有暂存的成绩"""
+        for _, _, processor in self._processors():
+            processor.discard_pending()
+        self.undo_log.clear()
+
+    def flush(self):
+        """把暂存的成绩写入各自的输出文件（每个工作簿一个线程并行保存），返回改动的单元格数量"""
+        self.load_index()
+        # 同一工作簿的多个工作表/成绩列在同一个任务中依次保存
+        jobs = {}
+        for roster in self.sections.values():
+            for processor in roster.processors.values():
+                if processor.pending:
+                    jobs.setdefault(roster.workbook_path, []).append(processor)
+        if not jobs:
+            return 0
+
+        with self.stage_timer.stage("excel_write"):
+            with self._executor() as executor:
+                results = list(executor.map(
+                    flush_workbook,
+                    [[(processor.index, processor.pending) for processor in processors]
+                     for processors in jobs.values()],
+                    [self.output_path_for(path) for path in jobs],
+                ))
+        self.last_outputs = {}
+        for (path, processors), (changed, indexes) in zip(jobs.items(), results):
+            # 进程池返回的是索引的副本
+            for processor, index in zip(processors, indexes):
+                processor.index = index
+            if changed:
+                output_path = self.output_path_for(path)
+                self.last_outputs[output_path] = changed
+                # 同一工作簿的其他工作表/成绩列之后也基于输出文件修改，索引缓存随之更新
+                stamp = file_stamp(output_path)
+                for roster in self.sections.values():
+                    for processor in roster.processors.values():
+                        index = processor.index
+                        if roster.workbook_path == path and (index.workbook_path != output_path
+                                                             or index.stamp != stamp):
+                            index.refresh_stamp(output_path)
+        for _, _, processor in self._processors():
+            processor.pending.clear()
+            processor.undo_log.clear()
+        self.undo_log.clear()
+        return sum(self.last_outputs.values())
+
+    def process_grades(self, json_path="recognition_results.json", interactive=True, kind=None):
+        """把JSON文件中的 {学号后四位: 成绩} 写入当前成绩类别的列，interactive=False时出错不等待用户输入
+
+        后四位在多个班级中重复且没有选定班级的不写入，需要手动确认。
+        """
+        loaded = retry_excel_operation(lambda: (self.load_index(), load_grades_json(json_path)), interactive)
+        if loaded is None:
+            return False
+        grades_dict = loaded[1]
+
+        print(f"\n开始处理成绩数据（{kind or self.active_kind}）...")
+        print(f"JSON文件中包含 {len(grades_dict)} 条成绩记录")
+        results = {}
+        for suffix, score in grades_dict.items():
+            status, matches = self.stage_grade(suffix, score, kind=kind)
+            results.setdefault(status, []).append((suffix, matches))
+        for status, label in (("new", "新增成绩"), ("updated", "更新成绩"), ("unchanged", "成绩未变化"),
+                              ("unmatched", "未匹配"), ("no_column", "班级没有该成绩列")):
+            if results.get(status):
+                print(f"{label}: {len(results[status])}")
+        if results.get("ambiguous"):
+            print("\n以下学号后四位对应多名学生，未写入成绩，请手动确认:")
+            for suffix, matches in results["ambiguous"]:
+                students = ", ".join(f"{name} {self.sections[name].student_ids[row]}" for name, row in matches)
+                print(f"- {suffix} (成绩 {grades_dict[suffix]}): {students}")
+
+        # 成绩只暂存一次，出错时只重试保存
+        changed = retry_excel_operation(self.flush, interactive)
+        if changed is None:
+            return False
+        if changed:
+            for path, count in self.last_outputs.items():
+                print(f"\n更新后的文件已保存为: {path}（改动 {count} 个单元格）")
+            print(f"共改动 {changed} 个单元格")
+        else:
+            print("\n成绩没有变化，未写入文件")
+        return True
@@ -0,0 +1,132 @@
+"""录入会话的汇总指标：各阶段耗时分布 + 流水线计数
+
+会话结束时写入JSON文件；指定端口时同时在本地提供Prometheus文本格式的 /metrics 接口，
+会话进行中即可查看。
+"""
+import json
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.utils.stage_timer import BUCKET_BOUNDS, StageTimer
+
+METRIC_PREFIX = "speech_grading"
+
+
+class SessionMetrics:
+    """汇总一次录入会话的指标，pipeline 为 RecognitionPipeline.metrics（开始识别后设置）"""
+    def __init__(self, stage_timer=None):
+        self.stage_timer = stage_timer or StageTimer()
+        self.pipeline = None
+        self.started_at = datetime.now()
+        self._started = time.monotonic()
+
+    def summary(self):
+        """会话汇总：耗时分位数（毫秒）、每分钟语音段数、实时率"""
+        elapsed = time.monotonic() - self._started
+        summary = {
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "duration_seconds": elapsed,
+            "utterances": 0,
+            "utterances_per_minute": 0.0,
+            "audio_seconds": 0.0,
+            "real_time_factor": None,
+        }
+        pipeline = self.pipeline
+        if pipeline is not None:
+            summary.update(
+                utterances=pipeline.processed,
+                utterances_per_minute=pipeline.processed / elapsed * 60 if elapsed > 0 else 0.0,
+                audio_seconds=pipeline.audio_seconds,
+                # 识别耗时 / 语音时长，小于1说明识别比说话快
+                real_time_factor=(pipeline.total_inference_time / pipeline.audio_seconds
+                                  if pipeline.audio_seconds else None),
+                dropped_chunks=pipeline.dropped_chunks,
+                max_queue_depth=pipeline.max_queue_depth,
+                stop_latency_seconds=pipeline.stop_latency,
+            )
+        summary["stages"] = self.stage_timer.snapshot()
+        return summary
+
+    def write_json(self, path):
+        """把会话汇总写入JSON文件"""
+        summary = self.summary()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"\n会话指标已保存到: {path}")
+        return summary
+
+    def prometheus_text(self):
+        """Prometheus文本格式（各阶段直方图 + 流水线计数）"""
+        name = f"{METRIC_PREFIX}_stage_seconds"
+        lines = [f"# HELP {name} 各阶段耗时", f"# TYPE {name} histogram"]
+        for stage, (buckets, count, total) in self.stage_timer.raw_buckets().items():
+            cumulative = 0
+            # 每隔一个桶输出一次（桶宽翻倍），累计计数不受影响
+            for i, bound in enumerate(BUCKET_BOUNDS):
+                cumulative += buckets[i]
+                if i % 2 == 1:
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{bound:.6g}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {count}')
+
+        summary = self.summary()
+        for key, kind, help_text in (
+            ("utterances", "counter", "已识别语音段数"),
+            ("audio_seconds", "counter", "已识别语音时长（秒）"),
+            ("utterances_per_minute", "gauge", "每分钟识别语音段数"),
+            ("real_time_factor", "gauge", "识别耗时与语音时长之比"),
+            ("dropped_chunks", "counter", "丢弃的语音段数"),
+            ("max_queue_depth", "gauge", "识别队列最大长度"),
+        ):
+            value = summary.get(key)
+            if value is None:
+                continue
+            metric = f"{METRIC_PREFIX}_{key}" + ("_total" if kind == "counter" else "")
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}", f"{metric} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    session = None  # 由MetricsServer设置
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            body = self.session.prometheus_text().encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+            status = 200
+        elif self.path == "/summary":
+            body = json.dumps(self.session.summary(), ensure_ascii=False).encode("utf-8")
+            content_type = "application/json; charset=utf-8"
+            status = 200
+        else:
+            body = b"not found"
+            content_type = "text/plain"
+            status = 404
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # 不逐条打印访问日志
+
+
+class MetricsServer:
+    """在后台线程中提供 /metrics（Prometheus）和 /summary（JSON），只监听本机"""
+    def __init__(self, session, host="127.0.0.1", port=9464):
+        handler = type("BoundMetricsHandler", (MetricsRequestHandler,), {"session": session})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, name="metrics-server", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        host, port = self.server.server_address[:2]
+        print(f"指标接口已启动: http://{host}:{port}/metrics")
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,113 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# 直方图桶上界（秒）：10微秒起每桶乘以√2，最后一个桶约119秒，超出的计入溢出桶
+BUCKET_BOUNDS = tuple(1e-5 * 2 ** (i / 2) for i in range(48))
+
+
+class StageHistogram:
+    """单个阶段的耗时直方图：固定对数桶，内存占用与样本数量无关"""
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q):
+        """估算分位数（q取0~1），在所在桶内线性插值，误差不超过桶宽"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            if n and seen + n >= rank:
+                lower = BUCKET_BOUNDS[i - 1] if i else 0.0
+                upper = BUCKET_BOUNDS[i] if i < len(BUCKET_BOUNDS) else self.max
+                value = lower + (upper - lower) * (rank - seen) / n
+                return min(max(value, self.min), self.max)
+            seen += n
+        return self.max
+
+
+class StageTimer:
+    """按阶段记录耗时分布，用于定位录入会话中时间花在哪里
+
+    录音回调线程、推理线程和事件循环都会写入，add 加锁保证计数一致。
+    """
+    def __init__(self):
+        self.histograms = {}  # 阶段 -> StageHistogram
+        self._lock = threading.Lock()
+        self._local = threading.local()  # suspended() 只影响调用它的线程
+
+    @contextmanager
+    def suspended(self):
+        """在当前线程中暂停记录（如模型预热），其他线程照常记录"""
+        previous = getattr(self._local, "suspended", False)
+        self._local.suspended = True
+        try:
+            yield
+        finally:
+            self._local.suspended = previous
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name, seconds):
+        if getattr(self._local, "suspended", False):
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = StageHistogram()
+            histogram.add(seconds)
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+
+    def snapshot(self):
+        """各阶段的统计值（毫秒），可直接写入JSON"""
+        with self._lock:
+            return {
+                name: {
+                    "count": h.count,
+                    "total_ms": h.total * 1000,
+                    "mean_ms": h.total / h.count * 1000,
+                    "p50_ms": h.percentile(0.5) * 1000,
+                    "p95_ms": h.percentile(0.95) * 1000,
+                    "max_ms": h.max * 1000,
+                }
+                for name, h in self.histograms.items() if h.count
+            }
+
+    def raw_buckets(self):
+        """各阶段的 (桶计数副本, 次数, 累计秒数)，用于导出直方图"""
+        with self._lock:
+            return {name: (list(h.buckets), h.count, h.total) for name, h in self.histograms.items()}
+
+    def report(self, title="各阶段耗时"):
+        """打印每个阶段的平均耗时和分位数"""
+        stats = self.snapshot()
+        if not stats:
+            return
+        print(f"\n{title}:")
+        print("-" * 80)
+        for name, s in stats.items():
+            print(f"{name:<20} {s['count']:6d} 次  平均 {s['mean_ms']:8.2f} ms  "
+                  f"P50 {s['p50_ms']:8.2f} ms  P95 {s['p95_ms']:8.2f} ms  累计 {s['total_ms'] / 1000:8.2f} 秒")
+        print("-" * 80)
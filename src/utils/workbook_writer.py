@@ -0,0 +1,65 @@
+from openpyxl import load_workbook
+
+
+def normalize_student_id(value):
+    """把单元格中的学号统一转换为字符串（数字格式的学号去掉小数部分）"""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+class IncrementalWorkbookWriter:
+    """用openpyxl原地更新成绩单元格，保留其他工作表、格式和未改动的单元格"""
+    def __init__(self, path, sheet_name=None, id_header='学号', grade_header='期末(必填)', header_row=1):
+        self.path = path
+        self.sheet_name = sheet_name
+        self.id_header = id_header
+        self.grade_header = grade_header
+        self.header_row = header_row
+        self.workbook = None
+        self.worksheet = None
+        self.columns = {}  # 表头 -> 列号（从1开始）
+        self.changed_cells = 0
+
+    def open(self):
+        """加载工作簿并定位学号列和成绩列（行号由 RosterIndex 提供，不再扫描学号列）"""
+        self.workbook = load_workbook(self.path)
+        self.worksheet = self.workbook[self.sheet_name] if self.sheet_name else self.workbook.active
+
+        # 只读取一次表头
+        header = next(self.worksheet.iter_rows(
+            min_row=self.header_row, max_row=self.header_row, values_only=True
+        ))
+        self.columns = {
+            str(name).strip(): idx
+            for idx, name in enumerate(header, 1)
+            if name is not None
+        }
+        for name in (self.id_header, self.grade_header):
+            if name not in self.columns:
+                raise KeyError(f"工作表中找不到列: {name}")
+        return self
+
+    def get_grade(self, row):
+        """读取指定行的成绩"""
+        return self.worksheet.cell(row=row, column=self.columns[self.grade_header]).value
+
+    def set_grade(self, row, grade):
+        """写入成绩，值未变化时不改动单元格，返回是否写入"""
+        cell = self.worksheet.cell(row=row, column=self.columns[self.grade_header])
+        if cell.value == grade:
+            return False
+        cell.value = grade
+        self.changed_cells += 1
+        return True
+
+    def save(self, output_path=None):
+        """保存工作簿（默认覆盖原文件）"""
+        self.workbook.save(output_path or self.path)
+
+    def close(self):
+        if self.workbook is not None:
+            self.workbook.close()
+            self.workbook = None
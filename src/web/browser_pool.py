@@ -0,0 +1,189 @@
+"""可复用的无头浏览器会话池
+
+每个浏览器使用独立的配置目录（Chrome不允许多个进程共用一个配置目录），
+登录后的Cookie保存到 cookies.json，新启动的浏览器先恢复Cookie，已登录时不再重复登录。
+会话出错或使用次数达到上限时退出并在下次取用时重新启动。
+
+用法:
+    pool = BrowserPool(size=4, login=my_login)
+    await pool.start()
+    async with pool.session() as driver:
+        ...
+    await pool.close()
+"""
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+
+def chrome_driver_factory(user_data_dir=None, headless=True):
+    """默认的浏览器工厂：启动Chrome（用到时才导入selenium）"""
+    from src.web.table_filler import create_chrome_driver
+    return create_chrome_driver(user_data_dir=user_data_dir, headless=headless)
+
+
+class BrowserSession:
+    """池中的一个浏览器"""
+    def __init__(self, driver, slot):
+        self.driver = driver
+        self.slot = slot  # 配置目录编号
+        self.uses = 0
+        self.created_at = time.monotonic()
+
+
+class BrowserPool:
+    """最多 size 个浏览器，供并发的填写任务取用
+
+    login(driver) 在新浏览器恢复Cookie后调用（在线程池中执行），应先检查是否已登录，
+    需要时完成登录并返回True；返回True后保存Cookie供其他浏览器使用。
+    """
+    def __init__(self, size=4, profile_dir="browser_profiles", login=None, max_uses=50,
+                 headless=True, driver_factory=chrome_driver_factory):
+        self.size = size
+        self.profile_dir = profile_dir
+        self.cookie_path = os.path.join(profile_dir, "cookies.json")
+        self.login = login
+        self.max_uses = max_uses
+        self.headless = headless
+        self.driver_factory = driver_factory  # driver_factory(user_data_dir=..., headless=...)
+        self.launched = 0  # 累计启动的浏览器数量
+        self.recycled = 0  # 因出错或达到使用次数上限而退出的浏览器数量
+        self._idle = deque()
+        self._free_slots = deque(range(size))
+        self._semaphore = None
+        self._login_lock = None
+        self._closed = False
+
+    def _ensure_primitives(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.size)
+            self._login_lock = asyncio.Lock()
+
+    async def _run(self, func, *args):
+        # WebDriver调用会阻塞，放到线程池中执行
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def _load_cookies(self, driver):
+        if not os.path.exists(self.cookie_path):
+            return
+        with open(self.cookie_path, "r", encoding="utf-8") as f:
+            cookies = json.load(f)
+        if cookies:
+            # 通过DevTools协议一次设置所有域名的Cookie，不需要先打开对应页面
+            driver.execute_cdp_cmd("Storage.setCookies", {"cookies": cookies})
+
+    def _save_cookies(self, driver):
+        cookies = driver.execute_cdp_cmd("Storage.getCookies", {})["cookies"]
+        os.makedirs(self.profile_dir, exist_ok=True)
+        tmp_path = self.cookie_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cookies, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cookie_path)
+
+    async def _launch(self):
+        slot = self._free_slots.popleft()
+        try:
+            driver = await self._run(lambda: self.driver_factory(
+                user_data_dir=os.path.join(self.profile_dir, f"slot-{slot}"), headless=self.headless
+            ))
+        except Exception:
+            self._free_slots.append(slot)
+            raise
+        self.launched += 1
+        session = BrowserSession(driver, slot)
+        try:
+            # 依次登录：后启动的浏览器恢复前一个保存的Cookie后通常已是登录状态
+            async with self._login_lock:
+                await self._run(self._load_cookies, driver)
+                if self.login is not None and await self._run(self.login, driver):
+                    await self._run(self._save_cookies, driver)
+        except Exception:
+            await self._discard(session)
+            raise
+        return session
+
+    async def _healthy(self, session):
+        if session.uses >= self.max_uses:
+            return False
+        try:
+            await self._run(lambda: session.driver.current_url)
+            return True
+        except Exception:
+            return False
+
+    async def _discard(self, session, recycle=True):
+        self.recycled += recycle
+        try:
+            await self._run(session.driver.quit)
+        except Exception as e:
+            print(f"关闭浏览器出错: {e}")
+        self._free_slots.append(session.slot)
+
+    async def start(self, count=None):
+        """预先启动 count 个浏览器（默认 size 个）：先启动并登录一个，其余并行启动"""
+        self._ensure_primitives()
+        count = min(count or self.size, len(self._free_slots))
+        if count <= 0:
+            return
+        sessions = [await self._launch()]
+        results = await asyncio.gather(*(self._launch() for _ in range(count - 1)), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"启动浏览器失败: {result}")
+            else:
+                sessions.append(result)
+        self._idle.extend(sessions)
+        print(f"浏览器池已就绪: {len(sessions)} 个")
+
+    async def acquire(self):
+        """取出一个可用的浏览器会话，全部在用时等待"""
+        if self._closed:
+            raise RuntimeError("浏览器池已关闭")
+        self._ensure_primitives()
+        await self._semaphore.acquire()
+        try:
+            while self._idle:
+                session = self._idle.popleft()
+                if await self._healthy(session):
+                    return session
+                await self._discard(session)
+            return await self._launch()
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+    async def release(self, session, failed=False):
+        """归还会话；failed=True 时退出该浏览器，下次取用时重新启动"""
+        session.uses += 1
+        try:
+            if failed or self._closed:
+                await self._discard(session, recycle=failed)
+            else:
+                self._idle.append(session)
+        finally:
+            self._semaphore.release()
+
+    @asynccontextmanager
+    async def session(self):
+        """async with pool.session() as driver: 出现异常时回收该浏览器"""
+        session = await self.acquire()
+        failed = True
+        try:
+            yield session.driver
+            failed = False
+        finally:
+            await self.release(session, failed=failed)
+
+    async def close(self):
+        """保存Cookie并退出所有空闲的浏览器（使用中的在归还时退出）"""
+        self._closed = True
+        if self._idle:
+            try:
+                await self._run(self._save_cookies, self._idle[0].driver)
+            except Exception as e:
+                print(f"保存Cookie失败: {e}")
+        while self._idle:
+            await self._discard(self._idle.popleft(), recycle=False)
@@ -0,0 +1,224 @@
+"""在浏览器中执行的脚本：每个脚本只需一次WebDriver往返
+
+异步脚本（execute_async_script）的最后一个参数是Selenium注入的回调。
+表格在可滚动容器中（虚拟列表 / 滚动加载）时，脚本在浏览器内按容器高度分批滚动，
+每批等待渲染后处理当前可见的行，整个过程仍然只有一次往返。
+"""
+
+# 公共函数：定位成绩表、读取表头和数据行、填写输入框、分批滚动
+_HELPERS = r"""
+function headerRow(table) {
+    return table.tHead && table.tHead.rows.length ? table.tHead.rows[table.tHead.rows.length - 1] : table.rows[0];
+}
+function headerTexts(table) {
+    const row = headerRow(table);
+    return row ? Array.from(row.cells, cell => cell.textContent.trim()) : [];
+}
+function bodyRows(table) {
+    const header = headerRow(table);
+    return Array.from(table.rows).filter(row => row !== header && row.parentNode !== table.tHead
+                                                && row.parentNode !== table.tFoot);
+}
+function findTable(selector, idHeader) {
+    if (selector) return document.querySelector(selector);
+    // 表头包含学号列的表格中行数最多的一个（跳过页面布局用的表格）
+    let best = null;
+    for (const table of document.querySelectorAll('table')) {
+        if (headerTexts(table).some(text => text.includes(idHeader))
+                && (!best || table.rows.length > best.rows.length)) {
+            best = table;
+        }
+    }
+    return best;
+}
+function scrollContainer(table) {
+    for (let el = table.parentElement; el && el !== document.body; el = el.parentElement) {
+        if (/(auto|scroll)/.test(getComputedStyle(el).overflowY) && el.scrollHeight > el.clientHeight + 1) {
+            return el;
+        }
+    }
+    return null;
+}
+function inputLocator(input) {
+    if (!input) return null;
+    if (input.id) return '#' + CSS.escape(input.id);
+    if (input.name) return input.tagName.toLowerCase() + '[name="' + CSS.escape(input.name) + '"]';
+    return null;
+}
+function gradeInput(target, gradeCol) {
+    if (target.matches('input, textarea')) return target;
+    // 找不到成绩列时不猜测：行内第一个输入框可能是其他成绩列
+    if (gradeCol < 0) return null;
+    const cell = target.cells ? target.cells[gradeCol] : target;
+    return cell ? cell.querySelector('input:not([type=hidden]), textarea') : null;
+}
+const _inputSetter = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+const _areaSetter = Object.getOwnPropertyDescriptor(HTMLTextAreaElement.prototype, 'value').set;
+function fillInput(input, value) {
+    // 用原生setter赋值（兼容React/Vue受控输入框），并触发input/change事件
+    if (!input) return 'no_input';
+    if (input.disabled || input.readOnly) return 'readonly';
+    input.focus();
+    (input instanceof HTMLTextAreaElement ? _areaSetter : _inputSetter).call(input, value);
+    input.dispatchEvent(new Event('input', {bubbles: true}));
+    input.dispatchEvent(new Event('change', {bubbles: true}));
+    input.blur();
+    return input.value === value ? 'ok' : 'rejected';
+}
+function settle(ms) {
+    // 等下一帧（虚拟列表在滚动后的下一帧重新渲染）再等待 ms 毫秒
+    return new Promise(resolve => requestAnimationFrame(() => setTimeout(resolve, ms)));
+}
+async function walk(container, visit, settleMs, isDone) {
+    // 从顶部开始每次滚动约一屏（保留10%重叠），到底后连续两批没有新行时结束
+    container.scrollTop = 0;
+    await settle(settleMs);
+    let idle = 0;
+    for (;;) {
+        const added = visit();
+        if (isDone && isDone()) return;
+        if (container.scrollTop + container.clientHeight >= container.scrollHeight - 1) {
+            idle = added ? 0 : idle + 1;
+            if (idle >= 2) return;
+        }
+        container.scrollTop += Math.max(1, Math.floor(container.clientHeight * 0.9));
+        await settle(settleMs);
+    }
+}
+"""
+
+# 读取成绩表结构。参数: 表格选择器(可为null), 学号表头, 成绩表头, 每批等待毫秒数
+# 返回 {headers, idCol, gradeCol, scrollable, virtualized, table, rows: [[学号, 输入框选择器]], elements: [行元素]}
+# 虚拟列表的行元素会被复用，此时 elements 为空，只能按学号或选择器定位
+EXTRACT_TABLE_JS = _HELPERS + r"""
+const [selector, idHeader, gradeHeader, settleMs, done] = arguments;
+(async () => {
+    const table = findTable(selector, idHeader);
+    if (!table) return done({error: '找不到包含学号列的表格'});
+    const headers = headerTexts(table);
+    const idCol = headers.findIndex(text => text.includes(idHeader));
+    const gradeCol = headers.findIndex(text => text.includes(gradeHeader));
+    if (idCol < 0) return done({error: '表头中找不到学号列', headers});
+
+    const seen = new Map();  // 学号 -> [学号, 输入框选择器, 行元素]
+    let virtualized = false;
+    const collect = () => {
+        let added = 0;
+        for (const row of bodyRows(table)) {
+            const cell = row.cells[idCol];
+            if (!cell) continue;
+            const id = cell.textContent.trim();
+            if (!/^\d+$/.test(id)) continue;
+            const previous = seen.get(id);
+            if (previous) {
+                if (previous[2] !== row) virtualized = true;
+                continue;
+            }
+            seen.set(id, [id, inputLocator(gradeInput(row, gradeCol)), row]);
+            added++;
+        }
+        return added;
+    };
+    const detached = () => {
+        for (const row of seen.values()) if (!row[2].isConnected) return true;
+        return false;
+    };
+    collect();
+    const container = scrollContainer(table);
+    if (container) {
+        // 滚动加载的行会保留在DOM中：直接跳到底部，直到连续两批没有新行
+        for (let idle = 0; idle < 2 && !virtualized;) {
+            container.scrollTop = container.scrollHeight;
+            await settle(settleMs);
+            idle = collect() ? 0 : idle + 1;
+            virtualized = virtualized || detached();
+        }
+        // 虚拟列表只渲染可见的行，需要逐屏滚动读取
+        if (virtualized) await walk(container, collect, settleMs);
+        container.scrollTop = 0;
+    }
+    const rows = Array.from(seen.values());
+    virtualized = virtualized || detached();
+    done({
+        headers, idCol, gradeCol, virtualized, table,
+        scrollable: container !== null,
+        rows: rows.map(row => [row[0], row[1]]),
+        elements: virtualized ? [] : rows.map(row => row[2]),
+    });
+})().catch(error => done({error: String(error)}));
+"""
+
+# 一次调用写入整页成绩。参数: [[行元素或CSS选择器, 成绩文本], ...], 成绩列索引
+# 返回每个目标的状态: ok / missing / no_input / readonly / rejected；成绩列索引为-1时全部为 no_column
+BULK_FILL_JS = _HELPERS + r"""
+const [targets, gradeCol] = arguments;
+if (gradeCol < 0) return targets.map(() => 'no_column');
+return targets.map(([ref, value]) => {
+    const target = typeof ref === 'string' ? document.querySelector(ref) : ref;
+    if (!target || !target.isConnected) return 'missing';
+    return fillInput(gradeInput(target, gradeCol), value);
+});
+"""
+
+# 虚拟列表中按学号填写：分批滚动，填写当前渲染出的目标行
+# 参数: 表格元素, 学号列, 成绩列, {学号: 成绩文本}, 每批等待毫秒数；返回 {学号: 状态}
+VIRTUAL_FILL_JS = _HELPERS + r"""
+const [table, idCol, gradeCol, values, settleMs, done] = arguments;
+(async () => {
+    const statuses = {};
+    if (gradeCol < 0) {
+        for (const id of Object.keys(values)) statuses[id] = 'no_column';
+        return done(statuses);
+    }
+    let remaining = Object.keys(values).length;
+    const visit = () => {
+        let filled = 0;
+        for (const row of bodyRows(table)) {
+            const cell = row.cells[idCol];
+            const id = cell ? cell.textContent.trim() : '';
+            if (!(id in values) || id in statuses) continue;
+            statuses[id] = fillInput(gradeInput(row, gradeCol), values[id]);
+            remaining--;
+            filled++;
+        }
+        return filled;
+    };
+    const container = scrollContainer(table);
+    if (container) {
+        await walk(container, visit, settleMs, () => remaining === 0);
+    } else {
+        visit();
+    }
+    for (const id of Object.keys(values)) {
+        if (!(id in statuses)) statuses[id] = 'missing';
+    }
+    done(statuses);
+})().catch(error => done({error: String(error)}));
+"""
+
+# 页面布局指纹：只由元素结构（标签、class、type）和视口大小决定，不含文本和输入值，
+# 连续重复的同结构兄弟元素（如表格的数据行）只计一次，同一页面换课程或学生人数时指纹不变
+LAYOUT_FINGERPRINT_JS = r"""
+function fnv(text) {
+    let h = 0x811c9dc5;
+    for (let i = 0; i < text.length; i++) {
+        h ^= text.charCodeAt(i);
+        h = Math.imul(h, 16777619) >>> 0;
+    }
+    return h.toString(16).padStart(8, '0');
+}
+function signature(el) {
+    const parts = [];
+    let previous = null;
+    for (const child of el.children) {
+        if (child.tagName === 'SCRIPT' || child.tagName === 'STYLE') continue;
+        const sig = signature(child);
+        if (sig !== previous) parts.push(sig);
+        previous = sig;
+    }
+    const type = el.getAttribute('type');
+    return fnv(el.tagName + '.' + (el.getAttribute('class') || '') + (type ? ':' + type : '')
+               + '[' + parts.join(',') + ']');
+}
+return [signature(document.documentElement), window.innerWidth, window.innerHeight, window.devicePixelRatio];
+"""
@@ -1,49 +1,58 @@
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import cv2
-import numpy as np
-from PIL import Image
+import asyncio
 import io
+import json
 import os
-import requests
+import threading
+import time
 from pathlib import Path
-from tqdm import tqdm
+from src.web.dom_scripts import EXTRACT_TABLE_JS, LAYOUT_FINGERPRINT_JS
+from src.web.table_filler import build_suffix_index
+
+DEFAULT_WEIGHTS_PATH = os.environ.get("ICON_DETECT_WEIGHTS", "weights/icon_detect_v1_5/model_v1_5.pt")
+WEIGHTS_URL = "https://huggingface.co/microsoft/OmniParser/resolve/main/icon_detect_v1_5/model_v1_5.pt"
+
 
 class WebPageAnalyzer:
-    def __init__(self):
-        # 创建权重目录
-        self.weights_dir = Path('weights/icon_detect_v1_5')
-        self.weights_dir.mkdir(parents=True, exist_ok=True)
-        
-        # 模型文件路径
-        self.model_path = self.weights_dir / 'model_v1_5.pt'
-        
-        # 如果模型文件不存在，则下载
-        if not self.model_path.exists():
-            self._download_model()
-            
-        # 现在可以安全地加载模型
-        from transformers import AutoProcessor, AutoModelForVision2Seq
-        from ultralytics import YOLO
-        
-        self.icon_detect_model = YOLO(str(self.model_path))
-        print("成功加载目标检测模型")
-        
+    """网页表格分析：先读取DOM，DOM中找不到表格时才使用目标检测模型
+
+    检测模型（OmniParser icon_detect，YOLO）在第一次需要时才加载，只从本地权重文件加载；
+    allow_download=True 时权重不存在才会联网下载。检测结果按页面布局指纹（DOM结构哈希 + 视口大小）
+    缓存，并保存到 cache_path，再次打开同一布局的页面时不再推理。
+    """
+    def __init__(self, weights_path=DEFAULT_WEIGHTS_PATH, allow_download=False,
+                 cache_path="weights/detection_cache.json", box_threshold=0.05):
+        self.model_path = Path(weights_path)
+        self.allow_download = allow_download
+        self.cache_path = cache_path
+        self.box_threshold = box_threshold
+        self.icon_detect_model = None  # 第一次检测时加载
+        self.last_detections = None  # 最近一次DOM分析失败时的检测结果
+        self._model_lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+        self._detections = self._load_cache()
+
         # 暂时不使用caption模型，简化实现
         # self.caption_model_name = "microsoft/OmniParser"
         # self.processor = AutoProcessor.from_pretrained(self.caption_model_name)
         # self.model = AutoModelForVision2Seq.from_pretrained(self.caption_model_name)
-        
+
     def _download_model(self):
         """下载模型文件"""
+        import requests
+        from tqdm import tqdm
+
         print("正在下载模型文件...")
-        url = "https://huggingface.co/microsoft/OmniParser/resolve/main/icon_detect_v1_5/model_v1_5.pt"
-        
-        response = requests.get(url, stream=True)
+        self.model_path.parent.mkdir(parents=True, exist_ok=True)
+        response = requests.get(WEIGHTS_URL, stream=True)
+        response.raise_for_status()
         total_size = int(response.headers.get('content-length', 0))
-        
-        with open(self.model_path, 'wb') as file, tqdm(
+
+        tmp_path = self.model_path.with_name(self.model_path.name + '.part')
+        with open(tmp_path, 'wb') as file, tqdm(
             desc=self.model_path.name,
             total=total_size,
             unit='iB',
@@ -53,49 +62,150 @@ class WebPageAnalyzer:
             for data in response.iter_content(chunk_size=1024):
                 size = file.write(data)
                 pbar.update(size)
+        # 下载完成后再改名，中断的下载不会被当作可用的权重
+        os.replace(tmp_path, self.model_path)
         print("模型下载完成")
-        
-    async def analyze_table(self, driver):
-        """分析网页表格结构"""
-        # 等待表格加载完成
-        table = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.TAG_NAME, "table"))
-        )
-        
-        # 直接使用Selenium的方式查找表格元素
-        headers = driver.find_elements(By.TAG_NAME, "th")
-        student_id_col = -1
-        grade_col = -1
-        
-        # 查找列索引
-        for idx, header in enumerate(headers):
-            header_text = header.text.lower()
-            if "学号" in header_text:
-                student_id_col = idx
-            elif "期末" in header_text:
-                grade_col = idx
-                
-        # 获取所有行
-        rows = []
-        table_rows = driver.find_elements(By.TAG_NAME, "tr")[1:]  # 跳过表头行
-        
-        for row in table_rows:
-            cells = row.find_elements(By.TAG_NAME, "td")
-            if len(cells) > student_id_col:
-                student_id = cells[student_id_col].text
-                if student_id.isdigit():
-                    rows.append({
-                        'student_id': student_id,
-                        'row_element': row
-                    })
-        
-        print(f"找到 {len(rows)} 行数据")
-        print(f"学号列索引: {student_id_col}, 成绩列索引: {grade_col}")
-        
+
+    def _load_model(self):
+        """加载目标检测模型（只加载一次，多个浏览器会话并发调用时加锁）"""
+        with self._model_lock:
+            if self.icon_detect_model is not None:
+                return self.icon_detect_model
+            if not self.model_path.exists():
+                if not self.allow_download:
+                    raise FileNotFoundError(
+                        f"找不到目标检测模型: {self.model_path}（可设置 ICON_DETECT_WEIGHTS 指定本地权重，"
+                        f"或使用 allow_download=True 下载）"
+                    )
+                self._download_model()
+            # 禁止ultralytics联网检查更新和下载字体
+            os.environ.setdefault("YOLO_OFFLINE", "true")
+            from ultralytics import YOLO
+
+            started = time.perf_counter()
+            self.icon_detect_model = YOLO(str(self.model_path))
+            print(f"成功加载目标检测模型 ({time.perf_counter() - started:.1f} 秒)")
+            return self.icon_detect_model
+
+    def _load_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"读取检测缓存失败: {e}")
+            return {}
+
+    def _save_cache(self):
+        if not self.cache_path:
+            return
+        with self._cache_lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+            tmp_path = self.cache_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._detections, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+
+    def layout_fingerprint(self, driver):
+        """页面布局指纹: "结构哈希-宽x高@缩放"，不含文本和输入值"""
+        structure, width, height, ratio = driver.execute_script(LAYOUT_FINGERPRINT_JS)
+        return f"{structure}-{width}x{height}@{ratio}"
+
+    def _detect(self, png, ratio):
+        """对截图做目标检测，坐标换算为CSS像素"""
+        from PIL import Image
+
+        model = self._load_model()
+        image = Image.open(io.BytesIO(png)).convert("RGB")
+        boxes = model.predict(image, conf=self.box_threshold, verbose=False)[0].boxes
+        return [
+            {'bbox': [round(v / ratio, 1) for v in box], 'confidence': round(conf, 3)}
+            for box, conf in zip(boxes.xyxy.tolist(), boxes.conf.tolist())
+        ]
+
+    async def detect_elements(self, driver):
+        """检测当前页面可见区域的界面元素，返回 [{'bbox': [x1, y1, x2, y2], 'confidence'}]
+
+        同一布局指纹的页面直接返回缓存的结果。
+        """
+        loop = asyncio.get_running_loop()
+        fingerprint = await loop.run_in_executor(None, self.layout_fingerprint, driver)
+        if fingerprint in self._detections:
+            print(f"使用缓存的检测结果: {fingerprint}")
+            return self._detections[fingerprint]
+
+        ratio = float(fingerprint.rsplit('@', 1)[1])
+        png = await loop.run_in_executor(None, driver.get_screenshot_as_png)
+        started = time.perf_counter()
+        detections = await loop.run_in_executor(None, self._detect, png, ratio)
+        print(f"检测到 {len(detections)} 个界面元素 ({(time.perf_counter() - started) * 1000:.0f} ms)")
+        self._detections[fingerprint] = detections
+        await loop.run_in_executor(None, self._save_cache)
+        return detections
+
+    async def _fallback(self, driver, reason):
+        """DOM分析失败时用检测模型定位页面元素，结果保存在 last_detections 供排查"""
+        print(f"分析表格失败: {reason}")
+        try:
+            self.last_detections = await self.detect_elements(driver)
+        except Exception as e:
+            print(f"目标检测失败: {e}")
+            self.last_detections = None
+        return None
+
+    async def analyze_table(self, driver, table_selector=None, id_header="学号", grade_header="期末",
+                            settle_ms=30, script_timeout=120):
+        """分析网页表格结构：一次脚本调用读取表头、学号和成绩输入框
+
+        只读取包含学号列的表格（或 table_selector 指定的表格）。表格在可滚动容器中时，
+        脚本在浏览器内分批滚动读取滚动加载/虚拟列表的全部行。
+        返回的 rows 为 [{'student_id', 'row_element', 'locator'}]，虚拟列表的 row_element 为None；
+        suffix_index 为学号后四位到 rows 位置的索引。
+        DOM中找不到表格、学号列或成绩列时返回None，并用目标检测模型检测页面元素（见 last_detections）。
+        """
+        loop = asyncio.get_running_loop()
+        # WebDriver调用会阻塞，放到线程池中执行
+        try:
+            await loop.run_in_executor(None, lambda: WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located((By.TAG_NAME, "table"))
+            ))
+        except TimeoutException:
+            return await self._fallback(driver, "页面中没有表格")
+        def extract():
+            # 虚拟列表需要逐屏滚动，5000行约需十几秒，超过Selenium默认的脚本超时
+            driver.set_script_timeout(script_timeout)
+            return driver.execute_async_script(EXTRACT_TABLE_JS, table_selector, id_header, grade_header, settle_ms)
+
+        started = time.perf_counter()
+        result = await loop.run_in_executor(None, extract)
+        if result.get('error'):
+            return await self._fallback(driver, result['error'])
+        if result['gradeCol'] < 0:
+            # 找不到成绩列时不返回布局，避免把成绩填进其他列
+            return await self._fallback(driver, f"表头中找不到成绩列 '{grade_header}': {result['headers']}")
+
+        elements = result['elements']
+        rows = [
+            {
+                'student_id': student_id,
+                'row_element': elements[i] if elements else None,
+                'locator': locator,
+            }
+            for i, (student_id, locator) in enumerate(result['rows'])
+        ]
+        print(f"找到 {len(rows)} 行数据 ({(time.perf_counter() - started) * 1000:.0f} ms"
+              f"{', 虚拟列表' if result['virtualized'] else ''})")
+        print(f"学号列索引: {result['idCol']}, 成绩列索引: {result['gradeCol']}")
+
         return {
-            'student_id_col': student_id_col,
-            'grade_col': grade_col,
-            'rows': rows
+            'student_id_col': result['idCol'],
+            'grade_col': result['gradeCol'],
+            'headers': result['headers'],
+            'rows': rows,
+            'suffix_index': build_suffix_index(rows),
+            'table': result['table'],
+            'virtualized': result['virtualized'],
         }
     
     def _find_column_index(self, elements, column_name):
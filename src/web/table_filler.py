@@ -6,43 +6,97 @@ from selenium.webdriver.chrome.service import Service
 import asyncio
 import os
 from pathlib import Path
+from src.web.dom_scripts import BULK_FILL_JS, VIRTUAL_FILL_JS
+
+
+def format_grade(grade):
+    """整数成绩不带小数点（90.0 -> "90"）"""
+    grade = float(grade)
+    return str(int(grade)) if grade.is_integer() else str(grade)
+
+
+def build_suffix_index(rows, suffix_length=4):
+    """学号后四位 -> 行在 rows 中的位置列表"""
+    index = {}
+    for position, row in enumerate(rows):
+        index.setdefault(str(row['student_id'])[-suffix_length:], []).append(position)
+    return index
+
+
+def match_rows(layout, grades, suffix_length=4):
+    """把 {学号或后四位: 成绩} 匹配到 analyze_table 返回的行
+
+    返回 (匹配结果 [(键, 行, 成绩)], 状态 {键: ambiguous / unmatched})；
+    完整学号精确匹配，后四位对应多行时不填写。
+    """
+    rows = layout['rows']
+    index = layout.get('suffix_index') or build_suffix_index(rows, suffix_length)
+    matched = []
+    statuses = {}
+    for key, grade in grades.items():
+        key = str(key)
+        candidates = [rows[i] for i in index.get(key[-suffix_length:], [])]
+        if len(key) > suffix_length:
+            candidates = [row for row in candidates if str(row['student_id']) == key]
+        if len(candidates) > 1:
+            statuses[key] = 'ambiguous'
+        elif not candidates:
+            statuses[key] = 'unmatched'
+        else:
+            matched.append((key, candidates[0], grade))
+    return matched, statuses
+
+
+def create_chrome_driver(user_data_dir=None, headless=True):
+    """启动Chrome，依次尝试PATH中的chromedriver、当前目录的chromedriver和selenium-manager
+
+    user_data_dir 为浏览器配置目录，指定时登录状态等会保存在其中，下次启动时复用。
+    """
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument('--headless')  # 无头模式
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--ignore-certificate-errors')  # 忽略证书错误
+    options.add_argument('--ignore-ssl-errors')  # 忽略SSL错误
+    if user_data_dir:
+        options.add_argument(f'--user-data-dir={os.path.abspath(user_data_dir)}')
+
+    # 尝试多种方式初始化driver
+    try:
+        # 方式1: 使用环境变量中的chromedriver
+        return webdriver.Chrome(options=options)
+    except Exception as e1:
+        print(f"方式1失败: {e1}")
+        try:
+            # 方式2: 在当前目录查找chromedriver
+            driver_path = Path('./chromedriver.exe')  # Windows
+            if not driver_path.exists():
+                driver_path = Path('./chromedriver')  # Linux/Mac
+
+            if driver_path.exists():
+                service = Service(str(driver_path))
+                return webdriver.Chrome(service=service, options=options)
+            raise Exception("找不到chromedriver")
+        except Exception as e2:
+            print(f"方式2失败: {e2}")
+            # 方式3: 使用selenium-manager自动管理
+            return webdriver.Chrome(options=options)
+
 
 class TableFiller:
-    def __init__(self):
-        self.driver = None
+    def __init__(self, driver=None):
+        self.driver = driver  # 传入时使用已有的浏览器（如 BrowserPool 中的会话），close 时不退出
+        self._owns_driver = driver is None
         
     async def init(self):
-        """初始化浏览器"""
+        """初始化浏览器（已传入浏览器时直接使用）"""
+        if self.driver is not None:
+            return
         try:
-            options = webdriver.ChromeOptions()
-            options.add_argument('--headless')  # 无头模式
-            options.add_argument('--no-sandbox')
-            options.add_argument('--disable-dev-shm-usage')
-            options.add_argument('--ignore-certificate-errors')  # 忽略证书错误
-            options.add_argument('--ignore-ssl-errors')  # 忽略SSL错误
-            
-            # 尝试多种方式初始化driver
-            try:
-                # 方式1: 使用环境变量中的chromedriver
-                self.driver = webdriver.Chrome(options=options)
-            except Exception as e1:
-                print(f"方式1失败: {e1}")
-                try:
-                    # 方式2: 在当前目录查找chromedriver
-                    driver_path = Path('./chromedriver.exe')  # Windows
-                    if not driver_path.exists():
-                        driver_path = Path('./chromedriver')  # Linux/Mac
-                    
-                    if driver_path.exists():
-                        service = Service(str(driver_path))
-                        self.driver = webdriver.Chrome(service=service, options=options)
-                    else:
-                        raise Exception("找不到chromedriver")
-                except Exception as e2:
-                    print(f"方式2失败: {e2}")
-                    # 方式3: 使用selenium-manager自动管理
-                    self.driver = webdriver.Chrome(options=options)
-            
+            # 启动Chrome需要数秒，放到线程池中执行
+            loop = asyncio.get_running_loop()
+            self.driver = await loop.run_in_executor(None, create_chrome_driver)
             print("成功初始化浏览器")
             
         except Exception as e:
@@ -65,8 +119,73 @@ class TableFiller:
             await asyncio.sleep(0.1)
         except Exception as e:
             print(f"填写成绩失败: {e}")
+
+    async def fill_grades(self, layout, grades, settle_ms=30):
+        """把 {学号或后四位: 成绩} 一次性写入当前页面，返回 {键: 状态}
+
+        layout 为 WebPageAnalyzer.analyze_table 的结果。整页只有一次脚本往返（虚拟列表在浏览器内
+        每滚动一屏等待 settle_ms 毫秒），并且在线程池中执行，不阻塞事件循环。状态为 ok 表示写入成功；
+        找不到成绩列（grade_col 为-1）时不填写，匹配到的学生状态均为 no_column。
+        """
+        matched, statuses = match_rows(layout, grades)
+        loop = asyncio.get_running_loop()
+        if layout['grade_col'] < 0:
+            # 找不到成绩列时不填写，避免把成绩写进其他列
+            print("页面中找不到成绩列，未填写任何成绩")
+            for key, _, _ in matched:
+                statuses[key] = 'no_column'
+        elif matched and layout.get('virtualized'):
+            # 虚拟列表的行元素会被复用，在浏览器中滚动并按学号定位
+            values = {row['student_id']: format_grade(grade) for _, row, grade in matched}
+            results = await loop.run_in_executor(
+                None, self.driver.execute_async_script, VIRTUAL_FILL_JS, layout['table'],
+                layout['student_id_col'], layout['grade_col'], values, settle_ms,
+            )
+            for key, row, _ in matched:
+                statuses[key] = results.get(row['student_id'], 'missing')
+        elif matched:
+            targets = [[row.get('row_element') or row.get('locator'), format_grade(grade)]
+                       for _, row, grade in matched]
+            results = await loop.run_in_executor(
+                None, self.driver.execute_script, BULK_FILL_JS, targets, layout['grade_col']
+            )
+            for (key, _, _), status in zip(matched, results):
+                statuses[key] = status
+
+        filled = sum(1 for status in statuses.values() if status == 'ok')
+        print(f"已填写 {filled}/{len(grades)} 个成绩")
+        for key, status in statuses.items():
+            if status != 'ok':
+                print(f"未填写: {key} ({status})")
+        return statuses
             
     async def close(self):
-        """关闭浏览器"""
-        if self.driver:
-            self.driver.quit()
\ No newline at end of file
+        """关闭浏览器（由本对象启动的才退出）"""
+        if self.driver and self._owns_driver:
+            self.driver.quit()
+            self.driver = None
+
+
+async def fill_sections(pool, analyzer, sections, retries=1):
+    """用浏览器池并行填写多个课程页面
+
+    sections 为 {页面URL: {学号或后四位: 成绩}}，返回 {页面URL: {键: 状态} 或 异常}。
+    某个页面出错时该浏览器被回收，换一个浏览器重试 retries 次。
+    """
+    async def fill(url, grades):
+        for attempt in range(retries + 1):
+            try:
+                async with pool.session() as driver:
+                    await asyncio.get_running_loop().run_in_executor(None, driver.get, url)
+                    layout = await analyzer.analyze_table(driver)
+                    if layout is None:
+                        raise RuntimeError(f"无法分析页面表格: {url}")
+                    return await TableFiller(driver).fill_grades(layout, grades)
+            except Exception as e:
+                print(f"填写页面失败 ({attempt + 1}/{retries + 1}): {url}: {e}")
+                if attempt == retries:
+                    raise
+
+    results = await asyncio.gather(*(fill(url, grades) for url, grades in sections.items()),
+                                   return_exceptions=True)
+    return dict(zip(sections, results))
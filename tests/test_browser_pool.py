@@ -0,0 +1,154 @@
+import asyncio
+import json
+import pytest
+from src.web.browser_pool import BrowserPool
+
+
+class FakeDriver:
+    """模拟WebDriver：记录Cookie和调用，dead=True 时会话已断开"""
+    def __init__(self, user_data_dir, headless, cookie_jar):
+        self.user_data_dir = user_data_dir
+        self.cookie_jar = cookie_jar
+        self.cookies = []
+        self.dead = False
+        self.quit_called = False
+
+    @property
+    def current_url(self):
+        if self.dead:
+            raise RuntimeError("invalid session id")
+        return "about:blank"
+
+    def execute_cdp_cmd(self, cmd, params):
+        if cmd == "Storage.setCookies":
+            self.cookies = list(params["cookies"])
+            return {}
+        if cmd == "Storage.getCookies":
+            return {"cookies": self.cookies or self.cookie_jar}
+        raise ValueError(cmd)
+
+    def quit(self):
+        self.quit_called = True
+
+
+def make_pool(tmp_path, size=2, login=None, **kwargs):
+    drivers = []
+    cookie_jar = [{"name": "session", "value": "abc", "domain": "example.com"}]
+
+    def factory(user_data_dir, headless):
+        driver = FakeDriver(user_data_dir, headless, cookie_jar)
+        drivers.append(driver)
+        return driver
+
+    pool = BrowserPool(size=size, profile_dir=str(tmp_path), login=login,
+                       driver_factory=factory, **kwargs)
+    return pool, drivers
+
+
+def test_released_session_is_reused(tmp_path):
+    async def run():
+        pool, drivers = make_pool(tmp_path)
+        first = await pool.acquire()
+        await pool.release(first)
+        second = await pool.acquire()
+        await pool.release(second)
+        return pool, drivers, first, second
+
+    pool, drivers, first, second = asyncio.run(run())
+    assert second is first
+    assert second.uses == 2
+    assert pool.launched == 1 and len(drivers) == 1
+
+
+def test_dead_session_is_replaced(tmp_path):
+    async def run():
+        pool, drivers = make_pool(tmp_path)
+        first = await pool.acquire()
+        await pool.release(first)
+        first.driver.dead = True
+        second = await pool.acquire()
+        await pool.release(second)
+        return pool, drivers, first, second
+
+    pool, drivers, first, second = asyncio.run(run())
+    assert second is not first
+    assert first.driver.quit_called
+    assert pool.launched == 2 and pool.recycled == 1
+
+
+def test_failed_session_is_recycled(tmp_path):
+    async def run():
+        pool, drivers = make_pool(tmp_path)
+        with pytest.raises(RuntimeError):
+            async with pool.session():
+                raise RuntimeError("page error")
+        async with pool.session() as driver:
+            return pool, drivers, driver
+
+    pool, drivers, driver = asyncio.run(run())
+    assert drivers[0].quit_called
+    assert driver is drivers[1]
+    assert pool.recycled == 1
+
+
+def test_cookies_are_restored_and_login_runs_once(tmp_path):
+    saved = [{"name": "session", "value": "saved", "domain": "example.com"}]
+    (tmp_path / "cookies.json").write_text(json.dumps(saved), encoding="utf-8")
+    logins = []
+
+    def login(driver):
+        # 已恢复Cookie时视为已登录
+        if driver.cookies:
+            return False
+        logins.append(driver)
+        return True
+
+    async def run():
+        pool, drivers = make_pool(tmp_path, size=3, login=login)
+        await pool.start()
+        return pool, drivers
+
+    pool, drivers = asyncio.run(run())
+    assert len(drivers) == 3
+    assert all(driver.cookies == saved for driver in drivers)
+    assert logins == []
+
+
+def test_login_saves_cookies_for_later_browsers(tmp_path):
+    logins = []
+
+    def login(driver):
+        if driver.cookies:
+            return False
+        logins.append(driver)
+        return True
+
+    async def run():
+        pool, drivers = make_pool(tmp_path, size=2, login=login)
+        await pool.start()
+        return drivers
+
+    drivers = asyncio.run(run())
+    assert logins == [drivers[0]]
+    assert drivers[1].cookies == drivers[0].cookie_jar
+    assert json.loads((tmp_path / "cookies.json").read_text(encoding="utf-8")) == drivers[0].cookie_jar
+
+
+def test_close_quits_idle_browsers_and_saves_cookies(tmp_path):
+    async def run():
+        pool, drivers = make_pool(tmp_path, size=2)
+        await pool.start()
+        busy = await pool.acquire()
+        await pool.close()
+        idle_quit = [driver.quit_called for driver in drivers]
+        await pool.release(busy)
+        with pytest.raises(RuntimeError):
+            await pool.acquire()
+        return pool, drivers, busy, idle_quit
+
+    pool, drivers, busy, idle_quit = asyncio.run(run())
+    assert idle_quit.count(True) == 1  # 使用中的浏览器在归还时才退出
+    assert all(driver.quit_called for driver in drivers)
+    assert busy.driver.quit_called
+    assert pool.recycled == 0
+    assert (tmp_path / "cookies.json").exists()
@@ -0,0 +1,34 @@
+import os
+from src.speech.id_resolver import RosterIdResolver
+from src.speech.transcript_parser import TranscriptParser
+from src.utils.roster_index import RosterIndex
+
+TEST_TABLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "test_table.xlsx")
+
+
+def test_non_confusable_substitution_is_not_auto_resolved():
+    resolver = RosterIdResolver(["2007", "3456"])
+    resolution = resolver.resolve("0007")
+    assert resolution.student_id is None
+    assert resolution.alternatives == [("2007", 2)]
+
+
+def test_confusable_substitution_is_auto_resolved():
+    resolver = RosterIdResolver(["2007", "3456"])
+    resolution = resolver.resolve("2001")  # 1/7 读音相近
+    assert resolution.student_id == "2007"
+    assert resolution.corrected
+
+
+def test_unresolved_id_is_not_staged():
+    parser = TranscriptParser(resolver=RosterIdResolver(["2007", "3456"]))
+    parsed = parser.parse_line("学号0007成绩90")
+    assert parsed.entries == []
+    assert "2007" in parsed.reasons[0]
+
+
+def test_test_table_does_not_snap_0007():
+    resolver = RosterIdResolver(RosterIndex.build(TEST_TABLE).suffix_rows.keys())
+    resolution = resolver.resolve("0007")
+    assert resolution.student_id is None
+    assert ("2007", 2) in resolution.alternatives
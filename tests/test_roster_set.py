@@ -0,0 +1,55 @@
+import json
+from openpyxl import Workbook, load_workbook
+import src.utils.excel_processor as excel_processor
+from src.utils.roster_set import RosterSet
+
+
+def make_workbook(path):
+    workbook = Workbook()
+    first = workbook.active
+    first.title = "一班"
+    first.append(["学号", "姓名", "期中", "期末(必填)"])
+    first.append(["20230001", "甲", None, None])
+    first.append(["20230002", "乙", 80, None])
+    second = workbook.create_sheet("二班")
+    second.append(["学号", "期末"])
+    second.append(["20240001", None])
+    second.append(["20240003", None])
+    workbook.save(path)
+    return str(path)
+
+
+def test_sections_share_one_output_file(tmp_path):
+    rosters = RosterSet([make_workbook(tmp_path / "c.xlsx")], output_dir=str(tmp_path)).load_index()
+    assert rosters.stage_grade("0001", 90)[0] == "ambiguous"
+    rosters.select(section="一班")
+    assert rosters.stage_grade("0001", 90)[0] == "new"
+    assert rosters.stage_grade("0002", 70, kind="期中")[0] == "updated"
+    rosters.select(section="二班")
+    assert rosters.stage_grade("0003", 60)[0] == "new"
+    assert rosters.flush() == 3
+
+    workbook = load_workbook(tmp_path / "updated_c.xlsx")
+    assert workbook["一班"]["D2"].value == 90
+    assert workbook["一班"]["C3"].value == 70
+    assert workbook["二班"]["B3"].value == 60
+
+
+def test_process_grades_retries_only_the_save(tmp_path, monkeypatch):
+    monkeypatch.setattr(excel_processor.time, "sleep", lambda seconds: None)
+    json_path = tmp_path / "grades.json"
+    json_path.write_text(json.dumps({"0002": "66"}), encoding="utf-8")
+    rosters = RosterSet([make_workbook(tmp_path / "c.xlsx")], output_dir=str(tmp_path), default_kind="期中")
+    flush = rosters.flush
+    attempts = []
+
+    def locked_once():
+        attempts.append(len(rosters.undo_log))
+        if len(attempts) == 1:
+            raise PermissionError("文件被占用")
+        return flush()
+
+    monkeypatch.setattr(rosters, "flush", locked_once)
+    assert rosters.process_grades(str(json_path), interactive=False)
+    assert attempts == [1, 1]  # 重试时不重复暂存
+    assert load_workbook(tmp_path / "updated_c.xlsx")["一班"]["C3"].value == 66
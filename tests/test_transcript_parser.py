@@ -0,0 +1,35 @@
+from src.speech.transcript_parser import TranscriptParser
+
+
+def test_cancel_word_inside_a_phrase_keeps_grades():
+    parser = TranscriptParser()
+    assert parser.parse_line("不错").cancel_previous == 0
+    assert parser.parse_line("不对劲").cancel_previous == 0
+    line = parser.parse_line("1234得分90不错")
+    assert line.entries == [("1234", "90")]
+    assert not line.cancelled
+
+
+def test_standalone_cancel_word_undoes_previous_line():
+    parser = TranscriptParser()
+    assert parser.parse_line("作废").cancel_previous == 1
+    assert parser.parse_line("说错了").cancel_previous == 1
+    assert parser.parse_line("不对不对").cancel_previous == 2
+    line = parser.parse_line("不对，1234得分95")
+    assert line.cancel_previous == 1
+    assert line.entries == [("1234", "95")]
+
+
+def test_cancel_word_followed_by_other_words_does_not_undo():
+    parser = TranscriptParser()
+    line = parser.parse_line("删除线1234得分95")
+    assert line.cancel_previous == 0
+    assert line.entries == [("1234", "95")]
+    assert parser.parse_line("1234得分90不对").entries == []
+
+
+def test_fen_ban_is_half_a_point():
+    parser = TranscriptParser()
+    assert parser.parse_line("一二三四得分八十五分半").entries == [("1234", "85.5")]
+    assert parser.parse_line("1234得分85分半").entries == [("1234", "85.5")]
+    assert parser.parse_line("1234得分一百分半").reasons == ["分数 100.5 超出有效范围(0-100)"]